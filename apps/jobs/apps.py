@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        import apps.jobs.signals
+        from .search import ensure_fulltext_index
+        post_migrate.connect(ensure_fulltext_index, sender=self)
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.jobs.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tombstones older than TOMBSTONE_RETENTION_DAYS. Delta-sync cursors older "
+        "than that are refused anyway, so clients holding them re-fetch full lists. Run from cron."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.models import Job, JobSearchDocument
+from apps.jobs.search import ensure_fulltext_index, index_job, uses_fulltext
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the in-app job search index for every job (or ensure the FULLTEXT index on MySQL). "
+        "Jobs are re-indexed on save, so this is only needed for backfills."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-index jobs whose text has not changed.')
+
+    def handle(self, *args, **options):
+        if uses_fulltext():
+            ensure_fulltext_index()
+            self.stdout.write(self.style.SUCCESS("MySQL FULLTEXT index is in place; nothing to build."))
+            return
+        if options['force']:
+            JobSearchDocument.objects.all().delete()
+        indexed = 0
+        jobs = Job.objects.only('id', 'title', 'skills', 'description')
+        for job in jobs.iterator(chunk_size=500):
+            indexed += index_job(job)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} of {jobs.count()} jobs."))
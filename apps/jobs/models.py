@@ -15,6 +15,10 @@ class Job(models.Model):
     client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='jobs')
     title = models.CharField(max_length=200)
     location = models.CharField(max_length=200)
+    # Gazetteer entry for location, resolved on save
+    place = models.ForeignKey(
+        'recommendations.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs'
+    )
     skills = models.CharField(max_length=500)
     description = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
@@ -27,6 +31,17 @@ class Job(models.Model):
         Worker, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_jobs'
     )
 
+    class Meta:
+        indexes = [
+            # Open-job listing: status filter, then the cursor order
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'category', 'created_at']),
+            models.Index(fields=['status', 'payment_method', 'created_at']),
+            models.Index(fields=['status', 'place']),
+            # Delta sync: open jobs changed since a cursor
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.client.username}"
 
@@ -44,6 +59,27 @@ class Job(models.Model):
             self.assigned_worker is not None
         )
 
+class JobSearchDocument(models.Model):
+    """Per-job statistics of the in-app search index (used when the database has no FULLTEXT)."""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)  # Weighted token count, for BM25 length normalisation
+    checksum = models.PositiveBigIntegerField(default=0)  # Of the indexed text; unchanged text is not re-indexed
+
+    def __str__(self):
+        return f"Search document for job {self.job_id} ({self.length} tokens)"
+
+class JobSearchPosting(models.Model):
+    """Inverted index entry: a token and its weighted frequency in one job's title, skills and description."""
+    term = models.CharField(max_length=64)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'job')
+
+    def __str__(self):
+        return f"{self.term} -> job {self.job_id} ({self.frequency})"
+
 class JobImage(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='job_images/')
@@ -56,6 +92,7 @@ class JobApplication(models.Model):
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='applications')
     status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('job', 'worker')
@@ -82,6 +119,7 @@ class JobRequest(models.Model):
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='job_requests')
     status = models.CharField(max_length=20, choices=JOB_REQUEST_STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('job', 'worker')
@@ -89,6 +127,33 @@ class JobRequest(models.Model):
     def __str__(self):
         return f"Request for {self.worker.user.username} on {self.job.title}"
 
+class Tombstone(models.Model):
+    """A deleted job, application or job request, reported to delta-sync clients as removed.
+
+    ``open_job`` marks a job leaving the open listing, deleted or no longer open.
+    """
+    ENTITY_TYPES = [
+        ('job', 'Job'),
+        ('open_job', 'Job leaving the open listing'),
+        ('application', 'Job application'),
+        ('request', 'Job request'),
+    ]
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    entity_id = models.PositiveBigIntegerField()
+    # Plain ids rather than foreign keys: the rows they point at may be gone too
+    job_id = models.PositiveBigIntegerField(null=True, blank=True)
+    client_id = models.PositiveBigIntegerField(null=True, blank=True)
+    worker_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity_type', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.entity_type} {self.entity_id}"
+
 class PaymentRequest(models.Model):
     job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='payment_request')
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE)
@@ -248,7 +313,7 @@ class Dispute(models.Model):
 
     def notify_parties(self, subject, message):
         """Send notifications to both parties."""
-        from apps.jobs.utils import send_notification
+        from apps.management.notifications import send_notification
         
         # Notify reporter
         send_notification(
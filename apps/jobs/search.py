@@ -0,0 +1,147 @@
+"""Ranked full-text search over job titles, skills and descriptions.
+
+On MySQL the ``jobs_job_search`` FULLTEXT index does the work. Other backends use an
+in-app inverted index (JobSearchPosting rows, kept current on Job save) ranked with BM25.
+"""
+from collections import Counter, defaultdict
+import logging
+import math
+import re
+import zlib
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.db.models.expressions import RawSQL
+
+from .models import Job, JobSearchDocument, JobSearchPosting
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_INDEX = 'jobs_job_search'
+FULLTEXT_COLUMNS = ('title', 'skills', 'description')
+# A term in the title counts three times, in the skills twice
+FIELD_WEIGHTS = {'title': 3, 'skills': 2, 'description': 1}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_QUERY_TERMS = 10
+
+TOKEN = re.compile(r'[^\W_]+')
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'the', 'to', 'with', 'we', 'you', 'our', 'will',
+}
+
+
+def tokenize(text):
+    return [
+        token[:64] for token in TOKEN.findall((text or '').lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def uses_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def ensure_fulltext_index(sender=None, using='default', **kwargs):
+    """post_migrate hook: create the FULLTEXT index on MySQL if it is missing."""
+    from django.db import connections
+    db = connections[using]
+    if db.vendor != 'mysql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            [Job._meta.db_table, FULLTEXT_INDEX]
+        )
+        if cursor.fetchone():
+            return
+        cursor.execute(
+            f"ALTER TABLE {Job._meta.db_table} ADD FULLTEXT INDEX {FULLTEXT_INDEX} ({', '.join(FULLTEXT_COLUMNS)})"
+        )
+    logger.info(f"Created FULLTEXT index {FULLTEXT_INDEX}")
+
+
+def job_terms(job):
+    """Weighted term frequencies of a job's searchable text."""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(job, field)):
+            terms[token] += weight
+    return terms
+
+
+def index_job(job):
+    """(Re)write a job's postings; a no-op when its searchable text has not changed."""
+    text = '\x1f'.join(getattr(job, field) or '' for field in FIELD_WEIGHTS)
+    checksum = zlib.crc32(text.encode('utf-8'))
+    if JobSearchDocument.objects.filter(job_id=job.id, checksum=checksum).exists():
+        return False
+    terms = job_terms(job)
+    with transaction.atomic():
+        JobSearchPosting.objects.filter(job_id=job.id).delete()
+        JobSearchPosting.objects.bulk_create([
+            JobSearchPosting(term=term, job_id=job.id, frequency=frequency) for term, frequency in terms.items()
+        ])
+        JobSearchDocument.objects.update_or_create(
+            job_id=job.id, defaults={'length': sum(terms.values()), 'checksum': checksum}
+        )
+    return True
+
+
+def jobs_with_terms(terms):
+    """Ids (as a subquery) of jobs whose title, skills or description hold any of the words,
+    from the index rather than a scan of every row."""
+    terms = list(dict.fromkeys(token for term in terms for token in tokenize(term)))
+    if not terms:
+        return Job.objects.none().values('id')
+    if uses_fulltext():
+        # Boolean mode without operators matches any word, with no 50% threshold
+        return Job.objects.annotate(
+            matched=RawSQL(f"MATCH ({', '.join(FULLTEXT_COLUMNS)}) AGAINST (%s IN BOOLEAN MODE)", (' '.join(terms),))
+        ).filter(matched__gt=0).values('id')
+    return JobSearchPosting.objects.filter(term__in=terms).values('job_id')
+
+
+def search_open_jobs(query):
+    """Open jobs matching ``query``, best first.
+
+    Returns an ordered queryset on MySQL and a list of (job id, score) pairs otherwise,
+    so callers can paginate before loading any Job rows.
+    """
+    if uses_fulltext():
+        return Job.objects.filter(status='open').annotate(
+            relevance=RawSQL(
+                f"MATCH ({', '.join(FULLTEXT_COLUMNS)}) AGAINST (%s IN NATURAL LANGUAGE MODE)", (query,)
+            )
+        ).filter(relevance__gt=0).order_by('-relevance', '-id')
+    return rank_bm25(query)
+
+
+def rank_bm25(query):
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    # One indexed lookup on (term, job) for every posting of the query terms
+    postings = JobSearchPosting.objects.filter(term__in=terms, job__status='open').values_list(
+        'term', 'job_id', 'frequency', 'job__search_document__length'
+    )
+    by_term = defaultdict(list)
+    for term, job_id, frequency, length in postings:
+        by_term[term].append((job_id, frequency, length or 0))
+    if not by_term:
+        return []
+
+    corpus = JobSearchDocument.objects.filter(job__status='open').aggregate(
+        documents=Count('job_id'), average_length=Avg('length')
+    )
+    documents = corpus['documents'] or 1
+    average_length = corpus['average_length'] or 1.0
+    scores = defaultdict(float)
+    for term, matches in by_term.items():
+        idf = math.log(1 + (documents - len(matches) + 0.5) / (len(matches) + 0.5))
+        for job_id, frequency, length in matches:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            scores[job_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
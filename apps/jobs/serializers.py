@@ -5,12 +5,13 @@ from .models import PaymentRequest
 from apps.users.serializers import UserSerializer
 from core.constants import JOB_STATUS_CHOICES, PAYMENT_METHOD_CHOICES, JOB_REQUEST_STATUS_CHOICES
 from .feedback_serializers import FeedbackSerializer
+from core.serializers import ExpandableFieldsMixin
 import uuid
 import logging
 from django.views.decorators.csrf import csrf_exempt
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Prefetch
 from apps.users.models import User
 
 logger = logging.getLogger('django')
@@ -71,7 +72,17 @@ class PublicWorkerProfileSerializer(serializers.ModelSerializer):
             'last_name': user.last_name
         }
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Users and skills loaded, rating stats annotated: a fixed number of queries per list."""
+        return queryset.select_related('user').prefetch_related('skills').annotate(
+            avg_rating=Avg('assigned_jobs__feedback__rating'),
+            rating_count=Count('assigned_jobs__feedback__rating'),
+        )
+
     def get_rating_stats(self, obj):
+        if hasattr(obj, 'avg_rating'):
+            return {'average_rating': obj.avg_rating or 0.0, 'rating_count': obj.rating_count or 0}
         # Calculate rating stats from Feedback and ClientFeedback
         try:
             worker_ratings = Feedback.objects.filter(job__assigned_worker=obj).aggregate(
@@ -97,6 +108,12 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         fields = ['id', 'job', 'worker', 'worker_id', 'status', 'applied_at']
         read_only_fields = ['status', 'applied_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(
+            Prefetch('worker', queryset=PublicWorkerProfileSerializer.setup_eager_loading(Worker.objects.all()))
+        )
+
     def validate(self, data):
         job = self.context.get('job')
         worker = data['worker']
@@ -154,6 +171,12 @@ class JobRequestSerializer(serializers.ModelSerializer):
         fields = ['id', 'job', 'worker', 'worker_id', 'status', 'created_at']
         read_only_fields = ['status', 'created_at']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('worker__user').prefetch_related(
+            'worker__educations', 'worker__skills', 'worker__target_jobs'
+        )
+
     def validate(self, data):
         job = self.context.get('job')
         worker = data['worker']
@@ -240,11 +263,13 @@ class PaymentRequestSerializer(serializers.ModelSerializer):
         )
 
 
-class JobSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
-    images = JobImageSerializer(many=True, read_only=True)
-    applications = JobApplicationSerializer(many=True, read_only=True)
-    assigned_worker = WorkerProfileSerializer(read_only=True)
+class JobSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    """Job with related objects as ids; ?expand=category,images,applications,assigned_worker nests them.
+
+    A single top-level job expands everything by default, lists and nested jobs nothing.
+    """
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+    assigned_worker = serializers.PrimaryKeyRelatedField(read_only=True)
     status = serializers.ChoiceField(choices=JOB_STATUS_CHOICES, read_only=True)
     
     category_id = serializers.PrimaryKeyRelatedField(
@@ -265,14 +290,52 @@ class JobSerializer(serializers.ModelSerializer):
         model = Job
         fields = [
             'id', 'title', 'location', 'skills', 'description', 'client',
-            'created_at', 'updated_at', 'category', 'category_id', 'images',
-            'uploaded_images', 'payment_method', 'status', 'applications',
-            'assigned_worker'
+            'created_at', 'updated_at', 'category', 'category_id',
+            'uploaded_images', 'payment_method', 'status', 'assigned_worker'
         ]
         read_only_fields = [
-            'id', 'client', 'status', 'created_at', 'updated_at',
-            'images', 'applications', 'assigned_worker'
+            'id', 'client', 'status', 'created_at', 'updated_at', 'assigned_worker'
         ]
+        expandable_fields = {
+            'category': (CategorySerializer, {}),
+            'images': (JobImageSerializer, {'many': True}),
+            'applications': (JobApplicationSerializer, {'many': True}),
+            'assigned_worker': (WorkerProfileSerializer, {}),
+        }
+
+    def get_default_expansions(self):
+        return set(self.Meta.expandable_fields) if self.parent is None else set()
+
+    @staticmethod
+    def setup_eager_loading(queryset, expand=(), prefix=''):
+        """Prune related loading to the requested expansions; ``prefix`` is the path to the job
+        (e.g. ``'job__'``) when loading it through another model."""
+        queryset = queryset.select_related(f'{prefix}client')
+        if 'category' in expand:
+            queryset = queryset.select_related(f'{prefix}category')
+        if 'images' in expand:
+            queryset = queryset.prefetch_related(f'{prefix}images')
+        if 'applications' in expand:
+            queryset = queryset.prefetch_related(Prefetch(
+                f'{prefix}applications', queryset=JobApplicationSerializer.setup_eager_loading(JobApplication.objects.all())
+            ))
+        if 'assigned_worker' in expand:
+            queryset = queryset.select_related(f'{prefix}assigned_worker__user').prefetch_related(
+                f'{prefix}assigned_worker__educations', f'{prefix}assigned_worker__skills',
+                f'{prefix}assigned_worker__target_jobs'
+            )
+        return queryset
+
+    @staticmethod
+    def list_validator_fields(expand=()):
+        """(timestamps, counts) for ListValidators over a list of jobs with these expansions."""
+        timestamps, counts = ['updated_at'], []
+        if 'applications' in expand:
+            timestamps.append('applications__updated_at')
+            counts.append('applications')
+        if 'images' in expand:
+            counts.append('images')
+        return timestamps, counts
 
     def create(self, validated_data):
         uploaded_images = validated_data.pop('uploaded_images', [])
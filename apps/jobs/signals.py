@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+import logging
+
+from . import search
+from .models import Job, Tombstone
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender='jobs.Job')
+def index_job_for_search(sender, instance, **kwargs):
+    """Keep the in-app search index current; MySQL searches its FULLTEXT index instead."""
+    if search.uses_fulltext():
+        return
+    try:
+        search.index_job(instance)
+    except Exception as e:
+        logger.error(f"Error indexing job {instance.id} for search: {str(e)}")
+
+TOMBSTONE_TYPES = {'Job': 'job', 'JobApplication': 'application', 'JobRequest': 'request'}
+
+@receiver(post_delete, sender='jobs.Job')
+@receiver(post_delete, sender='jobs.JobApplication')
+@receiver(post_delete, sender='jobs.JobRequest')
+def record_tombstone(sender, instance, **kwargs):
+    """Remember deletions, cascades included, so delta-sync clients can drop them."""
+    entity_type = TOMBSTONE_TYPES[sender.__name__]
+    if entity_type == 'job':
+        scope = {'job_id': instance.id, 'client_id': instance.client_id}
+    else:
+        scope = {'job_id': instance.job_id, 'worker_id': instance.worker_id}
+    try:
+        Tombstone.objects.create(entity_type=entity_type, entity_id=instance.id, **scope)
+        if entity_type == 'job' and instance.status == 'open':
+            Tombstone.objects.create(entity_type='open_job', entity_id=instance.id, **scope)
+    except Exception as e:
+        logger.error(f"Error recording tombstone for {entity_type} {instance.id}: {str(e)}")
+
+@receiver(pre_save, sender='jobs.Job')
+def note_leaving_open_listing(sender, instance, **kwargs):
+    instance._leaving_open = (
+        instance.pk is not None and instance.status != 'open'
+        and Job.objects.filter(pk=instance.pk, status='open').exists()
+    )
+
+@receiver(post_save, sender='jobs.Job')
+def record_left_open_listing(sender, instance, created, **kwargs):
+    """Jobs that stop being open are removals for the open listing's delta-sync clients."""
+    if not getattr(instance, '_leaving_open', False):
+        return
+    try:
+        Tombstone.objects.create(
+            entity_type='open_job', entity_id=instance.id, job_id=instance.id, client_id=instance.client_id
+        )
+    except Exception as e:
+        logger.error(f"Error recording tombstone for open job {instance.id}: {str(e)}")
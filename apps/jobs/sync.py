@@ -0,0 +1,148 @@
+"""Delta sync for polled listings: ``?changed_since=<cursor>`` returns only what moved.
+
+A cursor is the server time, in microseconds, at which a response was built; full
+listings send theirs in ``X-Sync-Cursor``. A delta response holds the rows created or
+updated since the cursor, the ids removed since it (deleted rows, from Tombstone, and
+rows that no longer match the listing) and the cursor for the next call.
+``list_response()`` serves a polled listing end to end: 304, delta or full listing.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.conditional import ListValidators
+from core.serializers import parse_list_param
+from .models import Tombstone
+from .serializers import JobSerializer
+
+CURSOR_HEADER = 'X-Sync-Cursor'
+# Rows committed just after a cursor was taken can carry an earlier timestamp;
+# re-sending this much history makes them arrive twice rather than never
+SYNC_OVERLAP = timedelta(seconds=5)
+
+changed_since_parameter = openapi.Parameter(
+    'changed_since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Cursor from X-Sync-Cursor or a previous delta: return {changed, removed, cursor} "
+                "with only what changed since then, unpaginated"
+)
+
+
+def new_cursor():
+    return str(int(timezone.now().timestamp() * 1_000_000))
+
+
+def parse_since(request):
+    """(since, None) for ``?changed_since=``, (None, None) without one, or (None, error response)."""
+    value = request.query_params.get('changed_since')
+    if value is None:
+        return None, None
+    try:
+        since = datetime.fromtimestamp(int(value) / 1_000_000, tz=dt_timezone.utc)
+    except (ValueError, OverflowError, OSError):
+        return None, Response(
+            {"error": "changed_since must be a cursor from a previous response."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if since < timezone.now() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS):
+        return None, Response(
+            {"error": "changed_since is too old; fetch the full list again."},
+            status=status.HTTP_410_GONE
+        )
+    return since, None
+
+
+def delta(listing, candidates, since, entity_type, timestamps=('updated_at',), touched=None, **scope):
+    """(changed rows, removed ids) of ``listing`` since ``since``.
+
+    ``candidates`` are the rows a client of this listing may hold (the listing itself,
+    or a superset when rows can be edited out of its filters); changed candidates
+    outside the listing are reported removed along with tombstones of ``entity_type``
+    matching ``scope``, such as ``open_job`` for jobs that stopped being open.
+    ``timestamps`` are the lookups whose change alters a row's representation and
+    ``touched`` an optional Q of further changed rows.
+    """
+    window = since - SYNC_OVERLAP
+    changed = Q()
+    for lookup in timestamps:
+        changed |= Q(**{f'{lookup}__gte': window})
+    if touched is not None:
+        changed |= touched
+    changed_ids = set(candidates.filter(changed).values_list('id', flat=True))
+    listed_ids = set(listing.filter(id__in=changed_ids).values_list('id', flat=True))
+    deleted_ids = Tombstone.objects.filter(
+        entity_type=entity_type, deleted_at__gte=window, **scope
+    ).values_list('entity_id', flat=True)
+    # A row can leave and come back within the window
+    removed = sorted((changed_ids | set(deleted_ids)) - listed_ids)
+    return listing.filter(id__in=listed_ids), removed
+
+
+def job_delta(listing, candidates, since, expand=(), entity_type='job', **scope):
+    """delta() for jobs, counting changes to expanded applications as changes to their job."""
+    timestamps, _ = JobSerializer.list_validator_fields(expand)
+    touched = None
+    if 'applications' in expand:
+        touched = Q(id__in=Tombstone.objects.filter(
+            entity_type='application', deleted_at__gte=since - SYNC_OVERLAP
+        ).values('job_id'))
+    return delta(listing, candidates, since, entity_type, timestamps, touched, **scope)
+
+
+def delta_response(changed, removed, cursor):
+    return Response({'changed': changed, 'removed': removed, 'cursor': cursor})
+
+
+def list_response(request, listing, load, serialize, changes, timestamps=('updated_at',), counts=(),
+                  paginator=None, view=None):
+    """The response to a poll of ``listing``: 304 when the client's copy is current, the
+    delta for ``?changed_since=``, else the full listing with its sync cursor.
+
+    ``load`` eager-loads a queryset of rows and ``serialize`` renders loaded rows;
+    ``changes(since)`` returns the delta's (changed rows, removed ids). ``timestamps`` and
+    ``counts`` are as for ListValidators; ``paginator`` pages the full listing.
+    """
+    since, error = parse_since(request)
+    if error:
+        return error
+    cursor = new_cursor()
+    validators = ListValidators(request, listing, timestamps, counts)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    if since is not None:
+        changed, removed = changes(since)
+        return validators.apply(delta_response(serialize(load(changed)), removed, cursor))
+    if paginator is None:
+        response = Response(serialize(load(listing)))
+    else:
+        page = paginator.paginate_queryset(load(listing), request, view=view)
+        response = paginator.get_paginated_response(serialize(page))
+    response = validators.apply(response)
+    response[CURSOR_HEADER] = cursor
+    return response
+
+
+def job_list_response(request, listing, candidates, entity_type='job', paginator=None, view=None, **scope):
+    """list_response() for jobs with their ``?expand=`` relations; see delta() for ``candidates``."""
+    expand = parse_list_param(request, 'expand')
+    return list_response(
+        request, listing,
+        lambda jobs: JobSerializer.setup_eager_loading(jobs, expand),
+        lambda jobs: JobSerializer(jobs, many=True, context={'request': request}).data,
+        lambda since: job_delta(listing, candidates, since, expand, entity_type, **scope),
+        *JobSerializer.list_validator_fields(expand), paginator=paginator, view=view
+    )
+
+
+def entity_list_response(request, listing, serializer_class, entity_type, **scope):
+    """list_response() for a worker's applications or job requests."""
+    return list_response(
+        request, listing, serializer_class.setup_eager_loading,
+        lambda rows: serializer_class(rows, many=True).data,
+        lambda since: delta(listing, listing, since, entity_type, **scope)
+    )
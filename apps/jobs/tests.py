@@ -0,0 +1,271 @@
+from datetime import timedelta
+import math
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users.models import Client, User, Worker
+from .models import Category, Feedback, Job, JobApplication, JobSearchPosting, Tombstone
+from .search import rank_bm25, tokenize
+from .sync import CURSOR_HEADER
+
+
+class OpenJobListQueryCountTests(TestCase):
+    """A page of 50 open jobs with 20 applicants each costs a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        workers = []
+        for i in range(20):
+            user = User.objects.create(username=f'worker{i}', email=f'worker{i}@example.com')
+            workers.append(Worker.objects.create(user=user, location='Adama'))
+        cls.viewer = workers[0].user
+        # Rated past work, so applicants carry rating stats
+        for i, worker in enumerate(workers):
+            job = Job.objects.create(
+                client=client, title=f'Past job {i}', location='Adama', skills='pipe',
+                description='Done', category=category, payment_method='cash', status='completed',
+                assigned_worker=worker
+            )
+            Feedback.objects.create(job=job, worker=worker, client=client, rating=i % 5 + 1)
+        jobs = [
+            Job.objects.create(
+                client=client, title=f'Job {i}', location='Adama', skills='pipe,drain',
+                description='Fix a leak', category=category, payment_method='cash'
+            )
+            for i in range(50)
+        ]
+        JobApplication.objects.bulk_create([
+            JobApplication(job=job, worker=worker, status='pending') for job in jobs for worker in workers
+        ])
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.viewer)
+
+    def get(self, query, queries):
+        with self.assertNumQueries(queries):
+            response = self.api.get(f'/jobs/jobs/open/?page_size=50{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 50)
+        return response
+
+    def test_flat(self):
+        response = self.get('', 2)
+        self.assertNotIn('applications', response.data['results'][0])
+
+    def test_expand_applications(self):
+        response = self.get('&expand=applications', 5)
+        applications = response.data['results'][0]['applications']
+        self.assertEqual(len(applications), 20)
+        self.assertTrue(all(application['worker']['rating_stats']['rating_count'] == 1 for application in applications))
+
+
+class OpenJobListConditionalTests(TestCase):
+    """Polls revalidate by ETag, which notices jobs leaving the list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        user = User.objects.create(username='worker', email='worker@example.com')
+        cls.viewer = Worker.objects.create(user=user, location='Adama').user
+        cls.jobs = [
+            Job.objects.create(
+                client=client, title=f'Job {i}', location='Adama', skills='pipe',
+                description='Fix a leak', category=category, payment_method='cash'
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.viewer)
+
+    def test_cancelled_job_invalidates_the_list(self):
+        response = self.api.get('/jobs/jobs/open/')
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.api.get('/jobs/jobs/open/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # The most recently updated open job leaves the list
+        job = self.jobs[-1]
+        job.status = 'cancelled'
+        job.save()
+        response = self.api.get('/jobs/jobs/open/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.api.get('/jobs/jobs/open/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+
+class DeltaSyncTests(TestCase):
+    """``?changed_since=`` returns what changed and what left each listing, and nothing else."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        cls.client_user = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=cls.client_user)
+        user = User.objects.create(username='worker', email='worker@example.com')
+        cls.worker = Worker.objects.create(user=user, location='Adama')
+        cls.jobs = [
+            Job.objects.create(
+                client=cls.client_user, title=f'Job {i}', location='Adama', skills='pipe',
+                description='Fix a leak', category=category, payment_method='cash'
+            )
+            for i in range(3)
+        ]
+        cls.unlisted = Job.objects.create(
+            client=cls.client_user, title='Direct hire', location='Adama', skills='pipe',
+            description='Fix a leak', category=category, payment_method='cash', status='in_progress'
+        )
+        cls.application = JobApplication.objects.create(job=cls.jobs[0], worker=cls.worker)
+        # Out of reach of the cursor's overlap window
+        Job.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        JobApplication.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        self.worker_api = APIClient()
+        self.worker_api.force_authenticate(self.worker.user)
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(self.client_user)
+
+    def cursor(self, api, path):
+        response = api.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response[CURSOR_HEADER]
+
+    def changes(self, api, path, cursor):
+        separator = '&' if '?' in path else '?'
+        response = api.get(f'{path}{separator}changed_since={cursor}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['id'] for row in response.data['changed']), response.data['removed']
+
+    def test_open_jobs(self):
+        cursor = self.cursor(self.worker_api, '/jobs/jobs/open/')
+        cancelled, edited, deleted = self.jobs
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        edited.title = 'Fix two leaks'
+        edited.save()
+        self.assertEqual(self.client_api.delete(f'/jobs/jobs/{deleted.id}/delete/').status_code, 204)
+        # Never open: edits to it are nobody's business on the open listing
+        self.unlisted.description = 'Fix a bigger leak'
+        self.unlisted.save()
+
+        self.assertEqual(
+            self.changes(self.worker_api, '/jobs/jobs/open/', cursor), ([edited.id], sorted([cancelled.id, deleted.id]))
+        )
+        self.assertEqual(
+            set(Tombstone.objects.filter(entity_type='open_job').values_list('entity_id', flat=True)),
+            {cancelled.id, deleted.id}
+        )
+        self.assertTrue(Tombstone.objects.filter(
+            entity_type='job', entity_id=deleted.id, client_id=self.client_user.id
+        ).exists())
+        # The client's own list reports the deletion; the cancelled job is still theirs
+        self.assertEqual(
+            self.changes(self.client_api, '/jobs/jobs/', cursor),
+            (sorted([cancelled.id, edited.id, self.unlisted.id]), [deleted.id])
+        )
+
+    def test_filtered_open_jobs(self):
+        cursor = self.cursor(self.worker_api, '/jobs/jobs/open/?payment_method=cash')
+        edited = self.jobs[1]
+        edited.payment_method = 'chapa'
+        edited.save()
+        self.assertEqual(self.changes(self.worker_api, '/jobs/jobs/open/?payment_method=cash', cursor), ([], [edited.id]))
+
+    def test_withdrawn_application(self):
+        cursor = self.cursor(self.worker_api, '/jobs/my-applications/')
+        expanded_cursor = self.cursor(self.worker_api, '/jobs/jobs/open/?expand=applications')
+        response = self.worker_api.post(f'/jobs/jobs/{self.jobs[0].id}/apply/', {'action': 'withdraw'})
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(Tombstone.objects.filter(
+            entity_type='application', entity_id=self.application.id,
+            job_id=self.jobs[0].id, worker_id=self.worker.id
+        ).exists())
+        self.assertEqual(self.changes(self.worker_api, '/jobs/my-applications/', cursor), ([], [self.application.id]))
+        # Expanded jobs embed their applications, so the job itself changed
+        self.assertEqual(
+            self.changes(self.worker_api, '/jobs/jobs/open/?expand=applications', expanded_cursor), ([self.jobs[0].id], [])
+        )
+
+    def test_bad_cursors(self):
+        expired = timezone.now() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS + 1)
+        response = self.worker_api.get(f'/jobs/jobs/open/?changed_since={int(expired.timestamp() * 1_000_000)}')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.worker_api.get('/jobs/jobs/open/?changed_since=yesterday').status_code, 400)
+
+
+class SearchTests(TestCase):
+    """BM25 over the search postings, as used on every backend but MySQL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        user = User.objects.create(username='worker', email='worker@example.com')
+        cls.viewer = Worker.objects.create(user=user, location='Adama').user
+        # Six weighted terms each: title x3, skills x2, description x1
+        cls.plumber, cls.painter, cls.cleaner, cls.closed = [
+            Job.objects.create(
+                client=client, title=title, location='Adama', skills=skills, description=description,
+                category=category, payment_method='cash', status=status
+            )
+            for title, skills, description, status in [
+                ('Plumber', 'pipe', 'leak', 'open'),
+                ('Painter', 'brush', 'plumber', 'open'),
+                ('Cleaner', 'mop', 'floor', 'open'),
+                ('Plumber', 'pipe', 'drain', 'completed'),
+            ]
+        ]
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize('Fix the LEAKING pipe_fitting, 2 taps & a 10m hose!'),
+            ['fix', 'leaking', 'pipe', 'fitting', 'taps', '10m', 'hose']
+        )
+        # Amharic words are single tokens
+        self.assertEqual(tokenize('የቧንቧ ሥራ'), ['የቧንቧ', 'ሥራ'])
+        self.assertEqual(tokenize('x' * 100), ['x' * 64])
+        self.assertEqual(tokenize(None), [])
+
+    def test_postings(self):
+        self.assertEqual(
+            dict(JobSearchPosting.objects.filter(job=self.plumber).values_list('term', 'frequency')),
+            {'plumber': 3, 'pipe': 2, 'leak': 1}
+        )
+
+    def test_bm25(self):
+        # Three open documents of average length 6, two holding "plumber"
+        idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+        ranked = rank_bm25('Plumber')
+        self.assertEqual([job_id for job_id, _ in ranked], [self.plumber.id, self.painter.id])
+        # tf 3 (title) against tf 1 (description), with k1 = 1.2 at average length
+        self.assertAlmostEqual(ranked[0][1], idf * 3 * 2.2 / (3 + 1.2))
+        self.assertAlmostEqual(ranked[1][1], idf)
+        self.assertEqual(rank_bm25('the and of'), [])
+        self.assertEqual(rank_bm25('carpenter'), [])
+
+    def test_edits_are_reindexed(self):
+        self.painter.description = 'walls'
+        self.painter.save()
+        self.assertEqual([job_id for job_id, _ in rank_bm25('plumber')], [self.plumber.id])
+        self.assertEqual([job_id for job_id, _ in rank_bm25('walls')], [self.painter.id])
+
+    def test_view(self):
+        api = APIClient()
+        api.force_authenticate(self.viewer)
+        response = api.get('/jobs/jobs/search/?q=plumber leak')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.data['results']], [self.plumber.id, self.painter.id])
+        self.assertEqual(api.get('/jobs/jobs/search/').status_code, 400)
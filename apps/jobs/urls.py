@@ -8,7 +8,7 @@ from .views import (
     PaymentConfirmView, JobApplicationResponseView, JobReviewsView,
     ClientJobCompletionView, WorkerJobCompletionView,
     DisputeCreateView, DisputeListView, DisputeDetailView,
-    UserApplicationsView
+    UserApplicationsView, JobSearchView, NearbyJobListView
 )
 
 urlpatterns = [
@@ -18,6 +18,8 @@ urlpatterns = [
     path('jobs/<int:id>/update/', JobUpdateView.as_view(), name='job_update'),
     path('jobs/<int:pk>/delete/', JobDeleteView.as_view(), name='job_delete'),
     path('jobs/open/', OpenJobListView.as_view(), name='open_jobs'),
+    path('jobs/search/', JobSearchView.as_view(), name='job_search'),
+    path('jobs/nearby/', NearbyJobListView.as_view(), name='nearby_jobs'),
     path('jobs/<int:id>/apply/', JobApplicationView.as_view(), name='job_apply'),
     path('jobs/<int:id>/applications/', JobApplicationsListView.as_view(), name='job_applications'),
     path('jobs/<int:job_id>/applications/<int:application_id>/respond/', JobApplicationResponseView.as_view(), name='job_application_response'),
@@ -12,12 +12,16 @@ from .serializers import (
     DisputeSerializer, PublicWorkerProfileSerializer
 )
 from core.utils import IsClient, IsWorker
+from core.constants import PAYMENT_METHOD_CHOICES
+from core.pagination import CreatedAtCursorPagination, RankedResultsPagination
+from core.serializers import parse_list_param
+from .sync import changed_since_parameter, entity_list_response, job_list_response
+from .search import search_open_jobs
+from apps.recommendations.gazetteer import search_center, within_radius
 from apps.management.permissions import IsSuperuser
-from .utils import initialize_payment, verify_payment, send_notification
-from django.core.mail import send_mail
+from .utils import initialize_payment, verify_payment
+from apps.management.notifications import send_notification
 from django.conf import settings
-from twilio.base.exceptions import TwilioRestException
-from twilio.rest import Client as TwilioClient
 from django.contrib.auth import get_user_model
 from django.views.decorators.csrf import csrf_exempt
 from .serializers import TransactionSerializer
@@ -36,53 +40,6 @@ User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
-def send_notification(user, subject, email_message, sms_message):
-    try:
-        send_mail(
-            subject=subject,
-            message=email_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-    except Exception as e:
-        logger.error(f"Failed to send email to {user.email}: {str(e)}")
-
-    if user.phone_number:
-        if not re.match(r'^\+\d{9,15}$', user.phone_number):
-            logger.warning(f"Invalid phone number format for user {user.id}: {user.phone_number}")
-            try:
-                send_mail(
-                    subject=subject,
-                    message=email_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                logger.error(f"Failed to send fallback email to {user.email}: {str(e)}")
-            return
-        try:
-            twilio_client = TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-            twilio_client.messages.create(
-                body=sms_message,
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=user.phone_number
-            )
-        except TwilioRestException as e:
-            logger.error(f"Failed to send SMS to {user.phone_number}: {str(e)}")
-            try:
-                send_mail(
-                    subject=subject,
-                    message=email_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                logger.error(f"Failed to send fallback email to {user.email}: {str(e)}")
-
-
 class JobCreateView(APIView):
     permission_classes = [IsAuthenticated, IsClient]
 
@@ -116,12 +73,18 @@ class JobCreateView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+job_representation_parameters = [
+    openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma-separated fields to return, e.g. id,title,location"),
+    openapi.Parameter('expand', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Comma-separated relations to nest: category, images, applications, assigned_worker"),
+]
+
 class JobListView(APIView):
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated, IsClient]
 
     @swagger_auto_schema(
         operation_description="List all jobs",
+        manual_parameters=[changed_since_parameter] + job_representation_parameters,
         responses={
             200: openapi.Response(
                 description='List of jobs',
@@ -142,19 +105,23 @@ class JobListView(APIView):
                     )
                 )
             ),
+            304: 'Not Modified',
             401: 'Unauthorized'
         }
     )
     def get(self, request):  
-        queryset = Job.objects.filter(client=self.request.user)
-        serializer = JobSerializer(queryset, many=True)
-        return Response(serializer.data)
+        jobs = Job.objects.filter(client=self.request.user)
+        return job_list_response(request, jobs, jobs, client_id=request.user.id)
 
 class JobDetailView(generics.RetrieveAPIView):  
     queryset = Job.objects.all()
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated, IsClient]
 
+    def get_queryset(self):
+        expand = parse_list_param(self.request, 'expand') or JobSerializer.Meta.expandable_fields
+        return JobSerializer.setup_eager_loading(super().get_queryset(), expand)
+
     def get_object(self):  
         job = super().get_object()
         if job.client != self.request.user:
@@ -270,38 +237,155 @@ class JobDeleteView(APIView):
         job.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+def filter_open_jobs(queryset, params):
+    """Apply the open-job list filters; returns (queryset, error message)."""
+    category = params.get('category')
+    if category:
+        if not category.isdigit():
+            return queryset, "category must be a category id."
+        queryset = queryset.filter(category_id=int(category))
+    payment_method = params.get('payment_method')
+    if payment_method:
+        if payment_method not in dict(PAYMENT_METHOD_CHOICES):
+            return queryset, f"payment_method must be one of: {', '.join(dict(PAYMENT_METHOD_CHOICES))}."
+        queryset = queryset.filter(payment_method=payment_method)
+    location = params.get('location', '').strip()
+    if location:
+        queryset = queryset.filter(location__iexact=location)
+    skill = params.get('skill', '').strip()
+    if skill:
+        queryset = queryset.filter(skills__icontains=skill)
+    return queryset, None
+
 class OpenJobListView(APIView):
     permission_classes = [IsAuthenticated, IsWorker]
+    pagination_class = CreatedAtCursorPagination
 
     @swagger_auto_schema(
-        operation_description="List all open jobs",
+        operation_description="List open jobs, newest first, in cursor-paginated pages.",
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Page cursor from a previous next/previous link"),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Jobs per page (default 20, max 100)"),
+            openapi.Parameter('category', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Category id"),
+            openapi.Parameter('location', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Exact location (case-insensitive)"),
+            openapi.Parameter('payment_method', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[choice for choice, _ in PAYMENT_METHOD_CHOICES]),
+            openapi.Parameter('skill', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Skill the job lists"),
+            changed_since_parameter,
+        ] + job_representation_parameters,
         responses={
             200: openapi.Response(
-                description='List of open jobs',
+                description='A page of open jobs',
                 schema=openapi.Schema(
-                    type=openapi.TYPE_ARRAY,
-                    items=openapi.Schema(
-                        type=openapi.TYPE_OBJECT,
-                        properties={
-                            'id': openapi.Schema(type=openapi.TYPE_INTEGER),
-                            'title': openapi.Schema(type=openapi.TYPE_STRING),
-                            'location': openapi.Schema(type=openapi.TYPE_STRING),
-                            'skills': openapi.Schema(type=openapi.TYPE_STRING),
-                            'description': openapi.Schema(type=openapi.TYPE_STRING),
-                            'payment_method': openapi.Schema(type=openapi.TYPE_STRING),
-                            'status': openapi.Schema(type=openapi.TYPE_STRING),
-                            'created_at': openapi.Schema(type=openapi.TYPE_STRING, format='date-time')
-                        }
-                    )
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'next': openapi.Schema(type=openapi.TYPE_STRING, format='uri', x_nullable=True),
+                        'previous': openapi.Schema(type=openapi.TYPE_STRING, format='uri', x_nullable=True),
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    'title': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'location': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'skills': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'description': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'payment_method': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'status': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'created_at': openapi.Schema(type=openapi.TYPE_STRING, format='date-time')
+                                }
+                            )
+                        )
+                    }
                 )
             ),
+            400: 'Invalid filter',
+            304: 'Not Modified',
             401: 'Unauthorized'
         }
     )
     def get(self, request):
-        jobs = Job.objects.filter(status='open')
-        serializer = JobSerializer(jobs, many=True)
-        return Response(serializer.data)
+        jobs, error = filter_open_jobs(Job.objects.filter(status='open'), request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        # Open jobs edited out of the filters, and jobs that stopped being open, come back as removed
+        return job_list_response(
+            request, jobs, Job.objects.filter(status='open'), 'open_job', paginator=self.pagination_class(), view=self
+        )
+
+class JobSearchView(APIView):
+    permission_classes = [IsAuthenticated, IsWorker]
+    pagination_class = RankedResultsPagination
+
+    @swagger_auto_schema(
+        operation_description="Search open jobs by title, skills and description, best match first.",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description="Search terms"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Jobs per page (default 20, max 100)"),
+            openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Jobs to skip"),
+        ] + job_representation_parameters,
+        responses={
+            200: JobSerializer(many=True),
+            400: 'Missing search terms',
+            401: 'Unauthorized'
+        }
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+        expand = parse_list_param(request, 'expand')
+        results = search_open_jobs(query)
+        if isinstance(results, models.QuerySet):
+            results = JobSerializer.setup_eager_loading(results, expand)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(results, request, view=self)
+        if not isinstance(results, models.QuerySet):
+            # (job id, score) pairs: load only this page's jobs, keeping the ranking
+            jobs = JobSerializer.setup_eager_loading(Job.objects.all(), expand).in_bulk([job_id for job_id, _ in page])
+            page = [jobs[job_id] for job_id, _ in page if job_id in jobs]
+        serializer = JobSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+radius_parameters = [
+    openapi.Parameter('radius_km', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Search radius in km (default 10, max 300)"),
+    openapi.Parameter('lat', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Centre latitude (with lng)"),
+    openapi.Parameter('lng', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Centre longitude (with lat)"),
+    openapi.Parameter('location', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Centre place name; defaults to your own location"),
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Results per page (default 20, max 100)"),
+    openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Results to skip"),
+]
+
+class NearbyJobListView(APIView):
+    permission_classes = [IsAuthenticated, IsWorker]
+    pagination_class = RankedResultsPagination
+
+    @swagger_auto_schema(
+        operation_description="List open jobs within a radius, nearest first. Accepts the open job list filters too.",
+        manual_parameters=radius_parameters + job_representation_parameters,
+        responses={
+            200: JobSerializer(many=True),
+            400: 'Invalid centre, radius or filter',
+            401: 'Unauthorized'
+        }
+    )
+    def get(self, request):
+        center, error = search_center(request.query_params, request.user.worker.location)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        query_params = request.query_params.copy()
+        query_params.pop('location', None)  # The centre here, not an exact-location filter
+        jobs, error = filter_open_jobs(Job.objects.filter(status='open'), query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        expand = parse_list_param(request, 'expand')
+        jobs = within_radius(JobSerializer.setup_eager_loading(jobs, expand), *center).order_by('distance_km', '-created_at', '-id')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(jobs, request, view=self)
+        data = JobSerializer(page, many=True, context={'request': request}).data
+        for item, job in zip(data, page):
+            item['distance_km'] = round(job.distance_km, 1)
+        return paginator.get_paginated_response(data)
 
 class JobApplicationView(APIView):
     permission_classes = [IsAuthenticated, IsWorker]
@@ -413,7 +497,7 @@ class JobApplicationsListView(APIView):
             job = Job.objects.get(pk=id, client=request.user)
         except Job.DoesNotExist:
             return Response({"error": "Job not found or not authorized"}, status=status.HTTP_404_NOT_FOUND)
-        applications = job.applications.all()
+        applications = JobApplicationSerializer.setup_eager_loading(job.applications.all())
         serializer = JobApplicationSerializer(applications, many=True)
         return Response(serializer.data)
 
@@ -424,16 +508,19 @@ class UserApplicationsView(APIView):
 
     @swagger_auto_schema(
         operation_description="List all applications submitted by the authenticated worker.",
+        manual_parameters=[changed_since_parameter],
         responses={
             200: JobApplicationSerializer(many=True),
+            304: 'Not Modified',
             401: 'Unauthorized',
             403: 'Forbidden'
         }
     )
     def get(self, request):  
         applications = JobApplication.objects.filter(worker=request.user.worker)
-        serializer = JobApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
+        return entity_list_response(
+            request, applications, JobApplicationSerializer, 'application', worker_id=request.user.worker.id
+        )
         
 class JobRequestView(APIView):
     permission_classes = [IsAuthenticated, IsClient]
@@ -820,8 +907,10 @@ class WorkerJobRequestsView(APIView):
 
     @swagger_auto_schema(
         operation_description="List all job requests sent to the authenticated worker.",
+        manual_parameters=[changed_since_parameter],
         responses={
             200: JobRequestSerializer(many=True),
+            304: 'Not Modified',
             401: 'Unauthorized',
             403: 'Forbidden'
         }
@@ -836,8 +925,7 @@ class WorkerJobRequestsView(APIView):
             return Response({"error": "User does not have worker profile"}, status=status.HTTP_403_FORBIDDEN)
         
         requests = JobRequest.objects.filter(worker=request.user.worker)
-        serializer = JobRequestSerializer(requests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return entity_list_response(request, requests, JobRequestSerializer, 'request', worker_id=request.user.worker.id)
 
 class ClientSentRequestsView(APIView):
     permission_classes = [IsAuthenticated, IsClient]
@@ -1239,7 +1327,7 @@ class DisputeListView(APIView):
     def get(self, request):
         disputes = Dispute.objects.filter(
             models.Q(reported_by=request.user) | models.Q(reported_user=request.user)
-        )
+        ).select_related('job__client', 'reported_by', 'reported_user', 'resolved_by')
         serializer = DisputeSerializer(disputes, many=True)
         return Response(serializer.data)
 
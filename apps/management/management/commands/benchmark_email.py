@@ -0,0 +1,125 @@
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.management.notifications import EmailBatchSender
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP stand-in that accepts and discards every message."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, handshake_latency):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.handshake_latency = handshake_latency
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+    def count(self, attribute):
+        with self.lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, text):
+        self.wfile.write(text.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.count('connections')
+        # Stands in for TCP setup and the TLS handshake of a real relay
+        time.sleep(self.server.handshake_latency)
+        self.reply('220 localhost ESMTP sink')
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line in (b'.\r\n', b'.\n'):
+                    in_data = False
+                    self.server.count('messages')
+                    self.reply('250 OK')
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure email throughput against a local SMTP stand-in: one connection per message "
+        "(as send_mail does) versus EmailBatchSender's persistent connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent connections for the batched run.')
+        parser.add_argument('--per-connection', type=int, default=100, help='Messages per connection when batched.')
+        parser.add_argument(
+            '--handshake-ms', type=float, default=50.0,
+            help='Delay the sink adds to each new connection, standing in for the TLS handshake.'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['messages'], options['threads'], options['per_connection']) < 1 or options['handshake_ms'] < 0:
+            raise CommandError("--messages, --threads and --per-connection must be positive.")
+
+        sink = SMTPSink(options['handshake_ms'] / 1000)
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        host, port = sink.server_address
+
+        def connect():
+            return get_connection(
+                'django.core.mail.backends.smtp.EmailBackend', host=host, port=port,
+                username='', password='', use_tls=False, use_ssl=False, timeout=10, fail_silently=False
+            )
+
+        messages = [
+            EmailMessage(f"Benchmark {i}", "Body " * 40, 'bench@localhost', [f"user{i}@localhost"])
+            for i in range(options['messages'])
+        ]
+        try:
+            for label, run in (
+                ('connection per message', lambda: self._per_message(connect, messages, options['threads'])),
+                ('batched', lambda: self._batched(connect, messages, options['threads'], options['per_connection'])),
+            ):
+                connections, delivered = sink.connections, sink.messages
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                delivered = sink.messages - delivered
+                self.stdout.write(
+                    f"{label:<24} {delivered} messages in {elapsed:.2f}s = {delivered / elapsed:.0f} msg/s "
+                    f"over {sink.connections - connections} connections"
+                )
+        finally:
+            sink.shutdown()
+            sink.server_close()
+
+    @staticmethod
+    def _per_message(connect, messages, threads):
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda message: connect().send_messages([message]), messages))
+
+    @staticmethod
+    def _batched(connect, messages, threads, per_connection):
+        def send(share):
+            with EmailBatchSender(connect, per_connection) as sender:
+                for message in share:
+                    sender.send(message)
+
+        size = -(-len(messages) // threads)
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(send, [messages[i:i + size] for i in range(0, len(messages), size)]))
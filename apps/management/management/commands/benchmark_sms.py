@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.management.sms import FakeTransport, SMSGateway
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SMS gateway throughput offline against the fake transport: one send at a "
+        "time versus the gateway's pool, with and without its rate limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--rate', type=float, default=50.0, help='Messages per second for the rate-limited run.')
+        parser.add_argument('--latency-ms', type=float, default=100.0, help='Simulated provider round trip per message.')
+
+    def handle(self, *args, **options):
+        if min(options['messages'], options['concurrency']) < 1 or options['rate'] <= 0 or options['latency_ms'] < 0:
+            raise CommandError("--messages, --concurrency and --rate must be positive.")
+
+        messages = [(f"+2519{i:08d}", f"Benchmark message {i}") for i in range(options['messages'])]
+        latency = options['latency_ms'] / 1000
+        for label, concurrency, rate in (
+            ('sequential', 1, 0),
+            (f"pool of {options['concurrency']}", options['concurrency'], 0),
+            (f"pool of {options['concurrency']}, {options['rate']:g}/s", options['concurrency'], options['rate']),
+        ):
+            transport = FakeTransport(latency=latency)
+            gateway = SMSGateway(transport=transport, concurrency=concurrency, rate=rate)
+            started = time.perf_counter()
+            failed = sum(1 for future in gateway.send_many(messages) if future.exception() is not None)
+            elapsed = time.perf_counter() - started
+            gateway.shutdown()
+            self.stdout.write(
+                f"{label:<28} {len(transport.sent)} sent, {failed} failed in {elapsed:.2f}s "
+                f"= {len(transport.sent) / elapsed:.1f} msg/s"
+            )
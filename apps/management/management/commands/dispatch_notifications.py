@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.management.notifications import Dispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued email and SMS notifications from the outbox, retrying failures with "
+        "backoff. Runs until interrupted; use --once from cron instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain what is due now, then exit.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows claimed per round.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['interval'] <= 0:
+            raise CommandError("--batch-size and --interval must be positive.")
+
+        dispatcher = Dispatcher()
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                attempted = dispatcher.dispatch(options['batch_size'])
+                total += attempted
+                if options['once'] and not attempted:
+                    break
+                if not attempted:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Attempted {total} notifications."))
@@ -54,6 +54,24 @@ class NotificationLog(models.Model):
         self.error_message = error_message
         self.save()
 
+class NotificationOutbox(models.Model):
+    """A queued delivery of one NotificationLog, drained by ``manage.py dispatch_notifications``."""
+    log = models.OneToOneField(NotificationLog, on_delete=models.CASCADE, related_name='outbox')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a dispatcher holds the row; an expired lease means it died mid-send
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Outbox {self.log.channel} to {self.log.recipient_id} (attempt {self.attempts})"
+
 class SystemAnalytics(models.Model):
     """Store system-wide analytics data."""
     date = models.DateField(unique=True)
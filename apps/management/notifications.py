@@ -0,0 +1,240 @@
+"""Outbox-backed user notifications.
+
+``send_notification`` records a NotificationLog and an outbox row per channel in the
+caller's transaction and returns at once. ``manage.py dispatch_notifications`` claims
+due rows, sends emails on its own thread pool and SMS through the process-wide gateway
+(``sms.py``), and records the outcome on the log; failed sends are retried with
+exponential backoff up to NOTIFICATION_MAX_ATTEMPTS. Delivery is at-least-once: a
+dispatcher that dies mid-send leaves its rows to be claimed again when their lease
+expires.
+
+Emails in a batch are split across the email pool and each share goes out over one
+SMTP connection (EmailBatchSender), so a broadcast pays for a handful of TLS
+handshakes rather than one per message.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+import logging
+import math
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import sms
+from .models import NotificationLog, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+class PermanentDeliveryError(Exception):
+    """A send that retrying cannot fix, such as a refused recipient address."""
+
+
+def send_notification(user, subject, email_message, sms_message):
+    """Queue an email and an SMS to ``user``; returns the NotificationLog rows created."""
+    logs = []
+    with transaction.atomic():
+        if user.email:
+            logs.append(NotificationLog.objects.create(
+                recipient=user, subject=subject[:200], message=email_message, channel='email'
+            ))
+        if user.phone_number and sms_message:
+            logs.append(NotificationLog.objects.create(
+                recipient=user, subject=subject[:200], message=sms_message, channel='sms'
+            ))
+        NotificationOutbox.objects.bulk_create([NotificationOutbox(log=log) for log in logs])
+    return logs
+
+
+class EmailBatchSender:
+    """Sends messages one by one over a single persistent SMTP connection.
+
+    The connection is opened on first use, replaced after EMAIL_MESSAGES_PER_CONNECTION
+    messages, and reopened (with the send tried once more) when the server drops it.
+    """
+    RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+    def __init__(self, connection_factory=None, per_connection=None):
+        self.connection_factory = connection_factory or (lambda: get_connection(fail_silently=False))
+        self.per_connection = per_connection or settings.EMAIL_MESSAGES_PER_CONNECTION
+        self.connection = None
+        self.sent_on_connection = 0
+        self.connections_opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        self.close()
+        self.connection = self.connection_factory()
+        self.connection.open()
+        self.connections_opened += 1
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.error(f"Error closing SMTP connection: {str(e)}")
+        self.connection = None
+        self.sent_on_connection = 0
+
+    def send(self, message):
+        for attempt in range(2):
+            if self.connection is None or self.sent_on_connection >= self.per_connection:
+                self.open()
+            try:
+                self.connection.send_messages([message])
+                self.sent_on_connection += 1
+                return
+            except self.RECONNECT_ERRORS:
+                self.close()
+                if attempt:
+                    raise
+            except smtplib.SMTPRecipientsRefused as e:
+                raise PermanentDeliveryError(str(e))
+            except Exception:
+                # The session is in an unknown state; start the next message on a fresh one
+                self.close()
+                raise
+
+
+def deliver_email(log, sender=None):
+    message = EmailMessage(
+        subject=log.subject,
+        body=log.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[log.recipient.email],
+    )
+    if sender is not None:
+        sender.send(message)
+        return
+    with EmailBatchSender() as sender:
+        sender.send(message)
+
+
+def deliver_sms(log):
+    sms.send_sms(log.recipient.phone_number, log.message)
+
+
+CHANNELS = {'email': deliver_email, 'sms': deliver_sms}
+
+
+def claim(limit):
+    """Lease up to ``limit`` due outbox rows to this dispatcher, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now), next_attempt_at__lte=now
+        ).order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+        NotificationOutbox.objects.filter(id__in=ids).update(locked_until=now + LEASE)
+    return list(NotificationOutbox.objects.filter(id__in=ids).select_related('log__recipient'))
+
+
+def finish(item, error=None):
+    """Record the outcome on the log and drop the outbox row."""
+    with transaction.atomic():
+        if error is None:
+            item.log.mark_as_sent()
+        else:
+            item.log.mark_as_failed(error)
+        item.delete()
+
+
+def retry(item, error):
+    attempts = item.attempts + 1
+    if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        logger.error(f"Giving up on {item.log.channel} notification {item.log_id} after {attempts} attempts: {error}")
+        finish(item, error)
+        return
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    NotificationOutbox.objects.filter(id=item.id).update(
+        attempts=attempts, next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        locked_until=None, last_error=error
+    )
+
+
+def settle(item, error=None):
+    """Record a send's outcome: sent, failed for good, or due for another attempt."""
+    if error is None:
+        finish(item)
+    elif isinstance(error, (PermanentDeliveryError, sms.SMSRejected)):
+        logger.error(f"Failed to send {item.log.channel} notification {item.log_id}: {str(error)}")
+        finish(item, str(error))
+    else:
+        logger.error(f"Error sending {item.log.channel} notification {item.log_id}: {str(error)}")
+        retry(item, str(error))
+
+
+def deliver(item, **kwargs):
+    try:
+        CHANNELS[item.log.channel](item.log, **kwargs)
+    except Exception as e:
+        settle(item, e)
+    else:
+        settle(item)
+
+
+def _run(item, **kwargs):
+    close_old_connections()
+    try:
+        deliver(item, **kwargs)
+    except Exception as e:
+        logger.error(f"Error dispatching notification {item.log_id}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def _run_emails(items):
+    with EmailBatchSender() as sender:
+        for item in items:
+            _run(item, sender=sender)
+
+
+class Dispatcher:
+    """Drains the outbox: emails on NOTIFICATION_EMAIL_CONCURRENCY threads, SMS through the gateway."""
+
+    def __init__(self, email_concurrency=None, sms_gateway=None):
+        self.email_concurrency = email_concurrency or settings.NOTIFICATION_EMAIL_CONCURRENCY
+        self.email_pool = ThreadPoolExecutor(max_workers=self.email_concurrency, thread_name_prefix='notify-email')
+        self.sms_gateway = sms_gateway or sms.gateway()
+
+    def dispatch(self, batch_size=100):
+        """Deliver one batch of due notifications; returns how many were attempted."""
+        items = claim(batch_size)
+        emails, texts = [], []
+        for item in items:
+            if item.log.channel == 'email':
+                emails.append(item)
+            elif item.log.channel == 'sms':
+                texts.append(item)
+            else:
+                finish(item, f"Unknown channel: {item.log.channel}")
+        futures = []
+        # One connection per share, as few shares as the pool and the per-connection cap allow
+        share = min(
+            settings.EMAIL_MESSAGES_PER_CONNECTION,
+            math.ceil(len(emails) / self.email_concurrency) if emails else 1
+        )
+        for start in range(0, len(emails), share):
+            futures.append(self.email_pool.submit(_run_emails, emails[start:start + share]))
+        # The gateway sends on its own rate-limited pool; outcomes are recorded on this thread
+        sent = self.sms_gateway.send_many((item.log.recipient.phone_number, item.log.message) for item in texts)
+        wait(futures + sent)
+        for item, future in zip(texts, sent):
+            settle(item, future.exception())
+        return len(items)
+
+    def shutdown(self):
+        self.email_pool.shutdown(wait=True)
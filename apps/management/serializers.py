@@ -10,7 +10,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from apps.management.permissions import IsSuperuser, IsAdminUser
-from apps.jobs.utils import send_notification
+from .notifications import send_notification
 from apps.users.models import VerificationToken
 import random
 import logging
@@ -143,7 +143,7 @@ class ManagementUserResetPasswordView(APIView):
                 email_subject = ''
                 email_message = ''
                 sms_message = f"Your SkillConnect password reset code is: {reset_code}"
-            send_notification(user, identifier, email_subject, email_message, sms_message)
+            send_notification(user, email_subject, email_message, sms_message)
             # Log action
             ManagementLog.objects.create(
                 admin=request.user,
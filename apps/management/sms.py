@@ -0,0 +1,140 @@
+"""Process-wide SMS gateway.
+
+One gateway per process owns the transport (``SMS_TRANSPORT``: Twilio over a single
+pooled HTTP session, or an in-memory fake for offline runs and benchmarks), a bounded
+thread pool of ``SMS_CONCURRENCY`` senders and a token bucket holding submissions to
+``SMS_RATE_LIMIT`` messages per second. Numbers are validated once, here.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client as TwilioClient
+
+logger = logging.getLogger(__name__)
+
+PHONE_NUMBER = re.compile(r'^\+\d{9,15}$')
+HTTP_TIMEOUT = 15
+
+
+class SMSRejected(Exception):
+    """The number or message was refused; sending it again will not help."""
+
+
+def validate_phone_number(phone_number):
+    """The number in E.164 form (spaces removed), or SMSRejected."""
+    normalized = re.sub(r'\s+', '', phone_number or '')
+    if not PHONE_NUMBER.match(normalized):
+        raise SMSRejected(f"Invalid phone number format: {phone_number}")
+    return normalized
+
+
+class TwilioTransport:
+    """Twilio's REST API through one client whose HTTP session keeps ``pool_size`` connections alive."""
+
+    def __init__(self, pool_size=10):
+        http_client = TwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT)
+        http_client.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.client = TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+
+    def send(self, to, body):
+        try:
+            return self.client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to).sid
+        except TwilioRestException as e:
+            # 4xx other than rate limiting: the request itself is wrong
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                raise SMSRejected(str(e))
+            raise
+
+
+class FakeTransport:
+    """Accepts every message without network I/O, optionally after ``latency`` seconds."""
+
+    def __init__(self, pool_size=None, latency=0.0):
+        self.latency = latency
+        self.sent = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.sent.append((to, body))
+            return f"FAKE{next(self._ids)}"
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` acquisitions per second on average, in bursts of up to ``rate``.
+    A rate of 0 disables the limit."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class SMSGateway:
+    def __init__(self, transport=None, concurrency=None, rate=None):
+        concurrency = concurrency or settings.SMS_CONCURRENCY
+        self.transport = transport or import_string(settings.SMS_TRANSPORT)(pool_size=concurrency)
+        self.limiter = RateLimiter(settings.SMS_RATE_LIMIT if rate is None else rate)
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='sms')
+
+    def send(self, to, body):
+        """Send on the calling thread; returns the provider's message id."""
+        to = validate_phone_number(to)
+        self.limiter.acquire()
+        return self.transport.send(to, body)
+
+    def submit(self, to, body):
+        """Send on the gateway's pool; returns a Future of the message id."""
+        return self.pool.submit(self.send, to, body)
+
+    def send_many(self, messages):
+        """Futures, in order, for an iterable of (to, body) pairs."""
+        return [self.submit(to, body) for to, body in messages]
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def gateway():
+    """The process-wide SMSGateway, built on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = SMSGateway()
+    return _gateway
+
+
+def send_sms(to, body):
+    return gateway().send(to, body)
@@ -0,0 +1,282 @@
+from datetime import timedelta
+import os
+import smtplib
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.core.mail import EmailMessage
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from core import profiling
+from . import notifications, sms
+from .models import NotificationLog, NotificationOutbox
+
+
+@override_settings(NOTIFICATION_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    """Outbox rows are leased, retried with backoff, and settled on their log."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='worker', email='worker@example.com', phone_number='+251911000000')
+
+    def queue(self):
+        return notifications.send_notification(self.user, 'Hello', 'Email body', 'SMS body')
+
+    def test_send_notification_only_enqueues(self):
+        email, text = mock.Mock(), mock.Mock()
+        with mock.patch.dict(notifications.CHANNELS, {'email': email, 'sms': text}):
+            logs = self.queue()
+        self.assertEqual([log.channel for log in logs], ['email', 'sms'])
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+        self.assertTrue(all(log.status == 'pending' for log in logs))
+        self.assertFalse(email.called or text.called)
+
+    def test_send_notification_rolls_back_with_the_caller(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.queue()
+            raise RuntimeError
+        self.assertFalse(NotificationLog.objects.exists())
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_claim_leases(self):
+        self.queue()
+        claimed = notifications.claim(10)
+        self.assertEqual(len(claimed), 2)
+        self.assertTrue(all(item.locked_until > timezone.now() for item in claimed))
+        # Held by the first dispatcher
+        self.assertEqual(notifications.claim(10), [])
+        # Its lease expired: it died mid-send
+        NotificationOutbox.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(notifications.claim(1)), 1)
+        self.assertEqual(len(notifications.claim(10)), 1)
+
+    def test_claim_skips_rows_not_due(self):
+        self.queue()
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(notifications.claim(10), [])
+
+    def test_sent(self):
+        log = self.queue()[0]
+        with mock.patch.dict(notifications.CHANNELS, {'email': mock.Mock()}):
+            notifications.deliver(notifications.claim(1)[0])
+        log.refresh_from_db()
+        self.assertEqual(log.status, 'sent')
+        self.assertIsNotNone(log.sent_at)
+        self.assertFalse(NotificationOutbox.objects.filter(log=log).exists())
+
+    def test_retry_then_fail(self):
+        log = self.queue()[0]
+        NotificationOutbox.objects.exclude(log=log).delete()
+        failing = mock.Mock(side_effect=ConnectionError('Connection reset'))
+        with mock.patch.dict(notifications.CHANNELS, {'email': failing}):
+            for attempt, delay in ((1, 30), (2, 60)):
+                started = timezone.now()
+                notifications.deliver(notifications.claim(1)[0])
+                item = NotificationOutbox.objects.get(log=log)
+                self.assertEqual(item.attempts, attempt)
+                self.assertIsNone(item.locked_until)
+                self.assertEqual(item.last_error, 'Connection reset')
+                self.assertAlmostEqual((item.next_attempt_at - started).total_seconds(), delay, delta=5)
+                log.refresh_from_db()
+                self.assertEqual(log.status, 'pending')
+                # Not due until the backoff has passed
+                self.assertEqual(notifications.claim(1), [])
+                NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+            # The third attempt is the last
+            notifications.deliver(notifications.claim(1)[0])
+        self.assertEqual(failing.call_count, 3)
+        log.refresh_from_db()
+        self.assertEqual((log.status, log.error_message), ('failed', 'Connection reset'))
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_permanent_failure_is_not_retried(self):
+        log = self.queue()[0]
+        rejected = mock.Mock(side_effect=notifications.PermanentDeliveryError('Recipient refused'))
+        with mock.patch.dict(notifications.CHANNELS, {'email': rejected}):
+            notifications.deliver(notifications.claim(1)[0])
+        log.refresh_from_db()
+        self.assertEqual((log.status, log.error_message), ('failed', 'Recipient refused'))
+        self.assertFalse(NotificationOutbox.objects.filter(log=log).exists())
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Only admins opt in to profiling, and only they are told where the profile went."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        cls.user = User.objects.create(username='worker', email='worker@example.com')
+        cls.admin_token = Token.objects.get_or_create(user=cls.admin)[0].key
+        cls.user_token = Token.objects.get_or_create(user=cls.user)[0].key
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def get(self, token, sample_rate=0, **headers):
+        with override_settings(PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=sample_rate):
+            api = APIClient()
+            api.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            return api.get('/management/profiles/', **headers)
+
+    def test_admin_opt_in(self):
+        response = self.get(self.admin_token, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f"{response['X-Profile-Id']}.prof")))
+
+    def test_others_cannot_opt_in(self):
+        response = self.get(self.user_token, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_sampled_profiles_are_not_announced(self):
+        for token in (self.user_token, self.admin_token):
+            self.assertNotIn('X-Profile-Id', self.get(token, sample_rate=1))
+        # Both were still profiled
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.prof')]), 2)
+
+    def test_admin_check_leaves_the_request_alone(self):
+        request = RequestFactory().get('/management/profiles/', HTTP_AUTHORIZATION=f'Token {self.admin_token}')
+        request.user = AnonymousUser()
+        self.assertTrue(profiling._is_admin(request))
+        self.assertIsInstance(request.user, AnonymousUser)
+        request = RequestFactory().get('/management/profiles/', HTTP_AUTHORIZATION='Token nonsense')
+        request.user = AnonymousUser()
+        self.assertFalse(profiling._is_admin(request))
+
+
+class FakeSMTPConnection:
+    """Records what it sent; ``failures`` are raised by the first sends, in order."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.sent = []
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def send_messages(self, messages):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class EmailBatchSenderTests(SimpleTestCase):
+    """One SMTP connection per EMAIL_MESSAGES_PER_CONNECTION messages, reopened once when dropped."""
+
+    def sender(self, *failures, per_connection=None):
+        """A sender whose successive connections raise the given failures."""
+        self.connections = []
+        failures = list(failures)
+
+        def connect():
+            self.connections.append(FakeSMTPConnection(failures.pop(0) if failures else ()))
+            return self.connections[-1]
+        return notifications.EmailBatchSender(connect, per_connection=per_connection)
+
+    @staticmethod
+    def message(i=0):
+        return EmailMessage(subject=f'Message {i}', body='Body', to=['worker@example.com'])
+
+    @override_settings(EMAIL_MESSAGES_PER_CONNECTION=2)
+    def test_rollover(self):
+        with self.sender() as sender:
+            for i in range(5):
+                sender.send(self.message(i))
+        self.assertEqual(sender.connections_opened, 3)
+        self.assertEqual([len(connection.sent) for connection in self.connections], [2, 2, 1])
+        self.assertTrue(all(connection.closed for connection in self.connections))
+
+    def test_reconnects_once(self):
+        with self.sender([smtplib.SMTPServerDisconnected('Gone')]) as sender:
+            sender.send(self.message())
+        self.assertEqual(sender.connections_opened, 2)
+        self.assertEqual([len(connection.sent) for connection in self.connections], [0, 1])
+
+    def test_fails_when_the_retry_is_dropped_too(self):
+        sender = self.sender([ConnectionResetError()], [smtplib.SMTPServerDisconnected('Gone')])
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            sender.send(self.message())
+        self.assertEqual(sender.connections_opened, 2)
+        self.assertIsNone(sender.connection)
+        # The next message starts on a fresh connection
+        sender.send(self.message())
+        self.assertEqual(len(self.connections[-1].sent), 1)
+
+    def test_refused_recipient_is_permanent(self):
+        sender = self.sender([smtplib.SMTPRecipientsRefused({'worker@example.com': (550, b'No such user')})])
+        with self.assertRaises(notifications.PermanentDeliveryError):
+            sender.send(self.message())
+        self.assertEqual(sender.connections_opened, 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SMSGatewayTests(SimpleTestCase):
+    """Numbers are validated before sending, and submissions held to the rate limit."""
+
+    def test_validate_phone_number(self):
+        self.assertEqual(sms.validate_phone_number('+251 911 000 000'), '+251911000000')
+        self.assertEqual(sms.validate_phone_number('+14155550100'), '+14155550100')
+        for number in ('0911000000', '+25191', '+2519110000001234', '+251-911-000-000', '', None):
+            with self.subTest(number=number), self.assertRaises(sms.SMSRejected):
+                sms.validate_phone_number(number)
+
+    def test_rate_limit(self):
+        clock = FakeClock()
+        with mock.patch.object(sms, 'time', clock):
+            # A rate whose intervals are exact in binary, so the clock lands on each one
+            limiter = sms.RateLimiter(4)
+            # A full bucket's burst goes out at once
+            for _ in range(4):
+                limiter.acquire()
+            self.assertEqual(clock.now, 0.0)
+            # Then one every 1/rate seconds
+            for _ in range(8):
+                limiter.acquire()
+            self.assertEqual(clock.now, 2.0)
+            # Idle time refills the bucket, up to its size
+            clock.now += 10
+            for _ in range(5):
+                limiter.acquire()
+            self.assertEqual(clock.now, 12.25)
+
+    def test_no_rate_limit(self):
+        clock = FakeClock()
+        with mock.patch.object(sms, 'time', clock):
+            limiter = sms.RateLimiter(0)
+            for _ in range(100):
+                limiter.acquire()
+        self.assertEqual(clock.now, 0.0)
+
+    def test_gateway(self):
+        transport = sms.FakeTransport()
+        gateway = sms.SMSGateway(transport=transport, concurrency=2, rate=0)
+        self.addCleanup(gateway.shutdown)
+        futures = gateway.send_many([('+251 911 000 001', 'One'), ('12345', 'Two'), ('+251911000003', 'Three')])
+        self.assertEqual(futures[0].result(), 'FAKE1')
+        self.assertIsInstance(futures[1].exception(), sms.SMSRejected)
+        futures[2].result()
+        self.assertEqual(sorted(transport.sent), [('+251911000001', 'One'), ('+251911000003', 'Three')])
@@ -20,6 +20,11 @@ urlpatterns = [
     path('recommendations/worker/<int:worker_id>/jobs/', RecommendedJobsForWorkerView.as_view(), name='recommended-jobs-for-worker'),
     path('recommendations/', views.RecommendationManagementView.as_view(), name='recommendation-management'),
     
+    # Request profiling
+    path('profiles/', views.ProfileListView.as_view(), name='profile-list'),
+    path('profiles/<str:profile_id>/', views.ProfileDetailView.as_view(), name='profile-detail'),
+    path('profiles/<str:profile_id>/download/', views.ProfileDownloadView.as_view(), name='profile-download'),
+
     # Admin Dispute URLs
     path('admin/disputes/', AdminDisputeListView.as_view(), name='admin_list_disputes'),
     path('admin/disputes/<int:dispute_id>/resolve/', AdminDisputeResolveView.as_view(), name='admin_resolve_dispute'),
@@ -7,7 +7,7 @@ from .permissions import IsSuperuser, IsAdminUser
 from django.contrib.auth import get_user_model
 from .serializers import ManagementUserSerializer, ManagementUserUpdateSerializer
 from .models import ManagementLog, NotificationLog, SystemAnalytics, NotificationTemplate
-from apps.jobs.utils import send_notification
+from .notifications import send_notification
 from django.db.models import Avg, Count, Sum
 from django.utils import timezone
 from datetime import timedelta
@@ -31,8 +31,11 @@ from apps.recommendations.signals import invalidate_worker_matches, invalidate_j
 from apps.recommendations.serializers import MatchResultSerializer
 from apps.jobs.models import Job
 from apps.jobs.serializers import JobSerializer
+from core.serializers import parse_list_param
 from apps.users.serializers import UserSerializer, WorkerProfileSerializer
 from apps.management.serializers import PremiumPlanSerializer
+from core.profiling import SORT_KEYS as PROFILE_SORT_KEYS, list_profiles, profile_path, top_functions
+from django.http import FileResponse
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -232,7 +235,7 @@ class DisputeManagementViewSet(viewsets.ModelViewSet):
     Admin API for managing disputes (CRUD, resolve, statistics).
     Only accessible to admin/superuser accounts.
     """
-    queryset = Dispute.objects.all()
+    queryset = Dispute.objects.select_related('job__client', 'reported_by', 'reported_user', 'resolved_by')
     serializer_class = DisputeSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -481,6 +484,12 @@ class JobViewSet(viewsets.ModelViewSet):
     serializer_class = JobSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
 
+    def get_queryset(self):
+        expand = parse_list_param(self.request, 'expand')
+        if not expand and self.action != 'list':
+            expand = JobSerializer.Meta.expandable_fields
+        return JobSerializer.setup_eager_loading(super().get_queryset(), expand)
+
 class RecommendedWorkersForJobView(APIView):
     """
     Admin API to get recommended workers for a specific job (for a client).
@@ -536,4 +545,58 @@ class PremiumPlanViewSet(viewsets.ModelViewSet):
     """
     queryset = PremiumPlan.objects.all()
     serializer_class = PremiumPlanSerializer
-    permission_classes = [IsAuthenticated, IsAdminUser]
\ No newline at end of file
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+
+class ProfileListView(APIView):
+    """
+    Admin API listing stored request profiles (see core.profiling), newest first.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="List captured request profiles.",
+        responses={200: 'List of profile metadata', 401: 'Unauthorized', 403: 'Forbidden'}
+    )
+    def get(self, request):
+        return Response(list_profiles())
+
+class ProfileDetailView(APIView):
+    """
+    Admin API showing a stored profile as a sorted top-N function table.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Show a captured profile as a top-N table.",
+        manual_parameters=[
+            openapi.Parameter('sort', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(PROFILE_SORT_KEYS), default='cumulative'),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=30),
+        ],
+        responses={200: 'Profile table', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found'}
+    )
+    def get(self, request, profile_id):
+        sort = request.query_params.get('sort', 'cumulative')
+        if sort not in PROFILE_SORT_KEYS:
+            return Response({"error": f"sort must be one of {', '.join(PROFILE_SORT_KEYS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 30)), 500))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        table = top_functions(profile_id, sort=sort, limit=limit)
+        if table is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        meta = next((p for p in list_profiles() if p['id'] == profile_id), {'id': profile_id})
+        return Response({**meta, **table})
+
+class ProfileDownloadView(APIView):
+    """
+    Admin API downloading a stored profile in pstats format (e.g. for snakeviz).
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, profile_id):
+        path = profile_path(profile_id)
+        if path is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f"{profile_id}.prof")
@@ -0,0 +1,218 @@
+"""Append-only, memory-mapped store of job and worker keyword vectors.
+
+The Embedding table stays the source of truth; this store holds the same keywords
+as sorted uint32 feature hashes so readers get zero-copy numpy slices instead of
+decoding JSON per row. Layout under ``settings.EMBEDDING_STORE_PATH``:
+
+    CURRENT            name of the live generation (replaced atomically)
+    <generation>/data  concatenated uint32 vectors
+    <generation>/index fixed-size records (entity type, entity id, offset, length);
+                       the last record for a key wins
+
+Appends take an exclusive flock on ``lock``; compaction writes a new generation
+with only the latest record per key and switches CURRENT.
+"""
+from contextlib import contextmanager
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ENTITY_CODES = {'job': 0, 'worker': 1}
+INDEX_DTYPE = np.dtype([('entity', '<u1'), ('entity_id', '<u8'), ('offset', '<u8'), ('length', '<u4')])
+VALUE_DTYPE = np.dtype('<u4')
+
+
+def keyword_vector(keywords):
+    """Sorted, de-duplicated CRC32 hashes of the keywords."""
+    return np.unique(np.array([zlib.crc32(k.encode('utf-8')) for k in keywords], dtype=VALUE_DTYPE))
+
+
+def _read_current(root):
+    try:
+        with open(os.path.join(root, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_current(root, generation):
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.current-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(generation)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, 'CURRENT'))
+
+
+def _memmap(path, dtype):
+    size = os.path.getsize(path) // dtype.itemsize
+    if not size:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(size,))
+
+
+class EmbeddingStore:
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._view = None  # (generation, index size, data, {(entity, id): (offset, length)})
+
+    @contextmanager
+    def _exclusive(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _generation(self):
+        """The live generation, creating an empty one on first use. Call with the lock held."""
+        generation = _read_current(self.root)
+        if generation is None:
+            generation = 'g0'
+            os.makedirs(os.path.join(self.root, generation), exist_ok=True)
+            for name in ('data', 'index'):
+                open(os.path.join(self.root, generation, name), 'ab').close()
+            _write_current(self.root, generation)
+        return generation
+
+    def _load(self):
+        generation = _read_current(self.root)
+        if generation is None:
+            return None
+        directory = os.path.join(self.root, generation)
+        try:
+            index_size = os.path.getsize(os.path.join(directory, 'index'))
+        except FileNotFoundError:  # Compacted away since CURRENT was read
+            return self._load()
+        view = self._view
+        if view is not None and view[0] == generation and view[1] == index_size:
+            return view
+        with self._lock:
+            view = self._view
+            if view is not None and view[0] == generation and view[1] == index_size:
+                return view
+            # Within a generation the index only grows, so read just the records appended since
+            if view is not None and view[0] == generation and view[1] < index_size:
+                start, offsets = view[1], view[3]
+            else:
+                start, offsets = 0, {}
+            count = (index_size - start) // INDEX_DTYPE.itemsize
+            records = np.fromfile(os.path.join(directory, 'index'), dtype=INDEX_DTYPE, count=count, offset=start)
+            # Later records overwrite earlier ones for the same key
+            for entity, entity_id, offset, length in records.tolist():
+                offsets[(entity, entity_id)] = (offset, length)
+            data = _memmap(os.path.join(directory, 'data'), VALUE_DTYPE)
+            self._view = (generation, start + count * INDEX_DTYPE.itemsize, data, offsets)
+        return self._view
+
+    def get(self, entity_type, entity_id):
+        """Zero-copy vector for one entity, or None when the store has no record of it."""
+        view = self._load()
+        if view is None:
+            return None
+        location = view[3].get((ENTITY_CODES[entity_type], int(entity_id)))
+        if location is None:
+            return None
+        offset, length = location
+        data = view[2]
+        if offset + length > len(data):  # Appended after this view's data was mapped
+            data = self._remap(view)
+            if offset + length > len(data):
+                return None
+        return data[offset:offset + length]
+
+    def _remap(self, view):
+        """Map the data file of ``view``'s generation again, now that it has grown."""
+        try:
+            data = _memmap(os.path.join(self.root, view[0], 'data'), VALUE_DTYPE)
+        except FileNotFoundError:  # Compacted away; the old mapping is all there is
+            return view[2]
+        with self._lock:
+            if self._view is view:
+                self._view = (view[0], view[1], data, view[3])
+        return data
+
+    def get_many(self, entity_type, entity_ids):
+        vectors = {}
+        for entity_id in entity_ids:
+            vector = self.get(entity_type, entity_id)
+            if vector is not None:
+                vectors[entity_id] = vector
+        return vectors
+
+    def put(self, entity_type, entity_id, vector):
+        """Append a vector unless the stored one is already identical."""
+        vector = np.ascontiguousarray(vector, dtype=VALUE_DTYPE)
+        current = self.get(entity_type, entity_id)
+        if current is not None and np.array_equal(current, vector):
+            return False
+        with self._exclusive():
+            directory = os.path.join(self.root, self._generation())
+            # Data before index, so readers never see a record pointing past the data
+            with open(os.path.join(directory, 'data'), 'ab') as data:
+                offset = data.tell() // VALUE_DTYPE.itemsize
+                data.write(vector.tobytes())
+            record = np.array([(ENTITY_CODES[entity_type], entity_id, offset, len(vector))], dtype=INDEX_DTYPE)
+            with open(os.path.join(directory, 'index'), 'ab') as index:
+                index.write(record.tobytes())
+        return True
+
+    def compact(self):
+        """Rewrite the live records into a new generation; returns (records kept, records dropped)."""
+        with self._exclusive():
+            old_generation = self._generation()
+            old_directory = os.path.join(self.root, old_generation)
+            index = _memmap(os.path.join(old_directory, 'index'), INDEX_DTYPE)
+            data = _memmap(os.path.join(old_directory, 'data'), VALUE_DTYPE)
+            latest = {}
+            for position, (entity, entity_id, _, _) in enumerate(index.tolist()):
+                latest[(entity, entity_id)] = position
+
+            generation = f"g{int(old_generation[1:]) + 1}"
+            directory = os.path.join(self.root, generation)
+            os.makedirs(directory, exist_ok=True)
+            records = np.empty(len(latest), dtype=INDEX_DTYPE)
+            with open(os.path.join(directory, 'data'), 'wb') as out:
+                offset = 0
+                for i, position in enumerate(sorted(latest.values())):
+                    entity, entity_id, old_offset, length = index[position].tolist()
+                    out.write(data[old_offset:old_offset + length].tobytes())
+                    records[i] = (entity, entity_id, offset, length)
+                    offset += length
+                out.flush()
+                os.fsync(out.fileno())
+            with open(os.path.join(directory, 'index'), 'wb') as out:
+                out.write(records.tobytes())
+                out.flush()
+                os.fsync(out.fileno())
+            _write_current(self.root, generation)
+            dropped = len(index) - len(latest)
+        # Readers still mapping the old generation keep their open mappings
+        for name in ('data', 'index'):
+            os.unlink(os.path.join(old_directory, name))
+        os.rmdir(old_directory)
+        return len(latest), dropped
+
+
+_stores = {}
+
+
+def get_store():
+    """The configured store, or None when embeddings are kept in the database only."""
+    if getattr(settings, 'EMBEDDING_BACKEND', 'db') != 'mmap':
+        return None
+    root = settings.EMBEDDING_STORE_PATH
+    if root not in _stores:
+        _stores[root] = EmbeddingStore(root)
+    return _stores[root]
@@ -0,0 +1,210 @@
+"""Offline replay of historical matches, used to tune WeightConfig without rerunning MatchEngine."""
+from collections import defaultdict
+from itertools import combinations
+import logging
+import math
+
+import numpy as np
+
+from apps.jobs.models import Job, JobApplication, JobRequest
+from apps.users.models import Worker
+from .models import MatchResult
+from .utils import MatchEngine, CRITERIA_WEIGHT_KEYS
+
+logger = logging.getLogger(__name__)
+
+CRITERIA = tuple(CRITERIA_WEIGHT_KEYS)
+WEIGHT_KEYS = tuple(CRITERIA_WEIGHT_KEYS.values())
+# evaluate() keeps a (jobs, weight vectors) array per metric, so the grid has to stay modest
+MAX_GRID_SIZE = 250_000
+
+
+class ReplaySnapshot:
+    """Historical (job, worker, criteria) rows packed into padded NumPy arrays.
+
+    Row ``g`` of every array belongs to one job; column ``m`` to one of its candidates.
+    ``mask`` marks real candidates, ``labels`` marks the accepted ones.
+    """
+
+    def __init__(self, features, bonus, labels, mask, job_ids, category_ids, category_names):
+        self.features = features          # (jobs, candidates, criteria) float32
+        self.bonus = bonus                # (jobs, candidates) float32 tie-breakers
+        self.labels = labels              # (jobs, candidates) bool
+        self.mask = mask                  # (jobs, candidates) bool
+        self.job_ids = job_ids            # (jobs,) int64
+        self.category_ids = category_ids  # (jobs,) int64, -1 for uncategorised
+        self.category_names = category_names
+
+    @property
+    def job_count(self):
+        return self.features.shape[0]
+
+    @property
+    def pair_count(self):
+        return int(self.mask.sum())
+
+
+def accepted_pairs():
+    """(job_id, worker_id) pairs that ended in an accepted application or request."""
+    pairs = set(JobApplication.objects.filter(status='accepted').values_list('job_id', 'worker_id'))
+    pairs.update(JobRequest.objects.filter(status='accepted').values_list('job_id', 'worker_id'))
+    return pairs
+
+
+def build_snapshot(min_candidates=2):
+    """Collect candidates and outcomes for every job with an accepted worker."""
+    positives = accepted_pairs()
+    job_ids = {job_id for job_id, _ in positives}
+
+    # Candidates: everyone who applied, was requested or was recommended.
+    candidates = defaultdict(set)
+    for job_id, worker_id in positives:
+        candidates[job_id].add(worker_id)
+    for model in (JobApplication, JobRequest):
+        for job_id, worker_id in model.objects.filter(job_id__in=job_ids).values_list('job_id', 'worker_id'):
+            candidates[job_id].add(worker_id)
+
+    cached_criteria = {}
+    criteria_fields = [MatchResult.CRITERIA_FIELDS[name] for name in CRITERIA]
+    for job_id, worker_id, *values in MatchResult.objects.filter(job_id__in=job_ids).values_list(
+        'job_id', 'worker_id', *criteria_fields
+    ):
+        candidates[job_id].add(worker_id)
+        cached_criteria[(job_id, worker_id)] = dict(zip(CRITERIA, values))
+
+    jobs = {
+        job.id: job
+        for job in Job.objects.filter(id__in=job_ids, category__isnull=False).select_related('category')
+    }
+    worker_ids = {worker_id for job_id in jobs for worker_id in candidates[job_id]}
+    workers = {
+        worker.id: worker
+        for worker in Worker.objects.filter(id__in=worker_ids).select_related('user').prefetch_related(
+            'skills', 'educations', 'target_jobs'
+        )
+    }
+
+    rows = []
+    for job_id, job in jobs.items():
+        job_rows = []
+        for worker_id in sorted(candidates[job_id]):
+            worker = workers.get(worker_id)
+            if worker is None:
+                continue
+            criteria = cached_criteria.get((job_id, worker_id))
+            if not criteria:
+                try:
+                    criteria = MatchEngine.compute_criteria(job, worker)
+                except Exception as e:
+                    logger.error(f"Error replaying job {job_id} for worker {worker_id}: {str(e)}")
+                    continue
+            job_rows.append((
+                [float(criteria.get(name) or 0.0) for name in CRITERIA],
+                MatchEngine.calculate_tie_breaker(worker),
+                (job_id, worker_id) in positives,
+            ))
+        if len(job_rows) >= min_candidates and any(label for _, _, label in job_rows):
+            rows.append((job, job_rows))
+
+    width = max((len(job_rows) for _, job_rows in rows), default=0)
+    features = np.zeros((len(rows), width, len(CRITERIA)), dtype=np.float32)
+    bonus = np.zeros((len(rows), width), dtype=np.float32)
+    labels = np.zeros((len(rows), width), dtype=bool)
+    mask = np.zeros((len(rows), width), dtype=bool)
+    category_ids = np.full(len(rows), -1, dtype=np.int64)
+    category_names = {}
+    for g, (job, job_rows) in enumerate(rows):
+        n = len(job_rows)
+        features[g, :n] = [criteria for criteria, _, _ in job_rows]
+        bonus[g, :n] = [tie_breaker for _, tie_breaker, _ in job_rows]
+        labels[g, :n] = [label for _, _, label in job_rows]
+        mask[g, :n] = True
+        category_ids[g] = job.category_id
+        category_names[job.category_id] = job.category.name
+
+    return ReplaySnapshot(
+        features, bonus, labels, mask,
+        np.array([job.id for job, _ in rows], dtype=np.int64),
+        category_ids, category_names,
+    )
+
+
+def grid_units(step):
+    """How many ``step``s make up 1; ValueError unless ``step`` divides 1 evenly."""
+    units = round(1 / step)
+    if units < 1 or not math.isclose(units * step, 1.0, abs_tol=1e-9):
+        raise ValueError(f"step {step} does not divide 1 evenly")
+    return units
+
+
+def grid_size(step):
+    """Number of weight vectors weight_grid(step) would produce."""
+    dims = len(WEIGHT_KEYS)
+    return math.comb(grid_units(step) + dims - 1, dims - 1)
+
+
+def weight_grid(step=0.05):
+    """Every weight vector on the simplex whose components are multiples of ``step``.
+
+    Raises ValueError for a step that does not divide 1 or a grid above MAX_GRID_SIZE.
+    """
+    units = grid_units(step)
+    dims = len(WEIGHT_KEYS)
+    size = grid_size(step)
+    if size > MAX_GRID_SIZE:
+        raise ValueError(f"step {step} gives {size} weight vectors, more than {MAX_GRID_SIZE}")
+    # Stars and bars: choose where the dims - 1 dividers go among units + dims - 1 slots.
+    dividers = np.fromiter(
+        combinations(range(units + dims - 1), dims - 1), dtype=np.dtype((np.int64, dims - 1)), count=size
+    )
+    padded = np.hstack([
+        np.full((len(dividers), 1), -1, dtype=np.int64),
+        dividers,
+        np.full((len(dividers), 1), units + dims - 1, dtype=np.int64),
+    ])
+    return (np.diff(padded, axis=1) - 1).astype(np.float32) / units
+
+
+def random_weights(samples, seed=None):
+    """Uniform samples from the weight simplex."""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(len(WEIGHT_KEYS)), size=samples).astype(np.float32)
+
+
+def evaluate(snapshot, weights, k=10, batch_size=256):
+    """Score every weight vector against the snapshot.
+
+    Returns ``(precision, reciprocal_rank)``, each shaped (jobs, weight vectors).
+    """
+    weights = np.asarray(weights, dtype=np.float32)
+    precision = np.zeros((snapshot.job_count, len(weights)), dtype=np.float32)
+    reciprocal_rank = np.zeros_like(precision)
+    if snapshot.job_count == 0:
+        return precision, reciprocal_rank
+
+    labels = snapshot.labels[:, :, None]
+    for start in range(0, len(weights), batch_size):
+        batch = weights[start:start + batch_size]
+        # (jobs, candidates, criteria) @ (criteria, batch) -> (jobs, candidates, batch)
+        scores = snapshot.features @ batch.T
+        scores += snapshot.bonus[:, :, None]
+        np.clip(scores, 0.0, 1.0, out=scores)
+        scores[~snapshot.mask] = -np.inf
+
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranked = np.take_along_axis(labels, order, axis=1)
+
+        end = start + len(batch)
+        precision[:, start:end] = ranked[:, :k, :].sum(axis=1) / k
+        first_hit = ranked.argmax(axis=1)
+        reciprocal_rank[:, start:end] = np.where(ranked.any(axis=1), 1.0 / (first_hit + 1), 0.0)
+    return precision, reciprocal_rank
+
+
+def summarize_by_category(snapshot, precision, reciprocal_rank):
+    """Mean precision@k and MRR per category: {category_id: (precision, mrr)} with (weight vectors,) arrays."""
+    summary = {}
+    for category_id in np.unique(snapshot.category_ids):
+        rows = snapshot.category_ids == category_id
+        summary[int(category_id)] = (precision[rows].mean(axis=0), reciprocal_rank[rows].mean(axis=0))
+    return summary
@@ -0,0 +1,361 @@
+"""Columnar, memory-mapped snapshot of worker matching features.
+
+``build_snapshot`` writes every matchable worker's features to one binary file:
+
+    MAGIC | uint64 header length | JSON header | padding | column data
+
+Each web process opens the columns with ``numpy.memmap``, so all gunicorn workers
+share the page cache instead of loading workers from MySQL per request. Workers
+edited after the build are listed in WorkerFeatureChange and scored from the
+database on top of the snapshot (the delta overlay) until the next build.
+"""
+from datetime import datetime
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg
+from django.utils import timezone
+
+from apps.jobs.models import Category, Feedback, ClientFeedback
+from apps.users.models import Worker
+from . import gazetteer, skills
+from .models import WorkerFeatureChange
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SCFEAT01'
+ALIGNMENT = 64
+# Seconds between checks for a newer snapshot file
+RELOAD_INTERVAL = 30
+BUILD_CHUNK_SIZE = 2000
+
+
+def _column(name, dtype, rows, width=None):
+    shape = (rows,) if width is None else (rows, width)
+    return {'name': name, 'dtype': np.dtype(dtype).str, 'shape': list(shape)}
+
+
+def _skill_words(bits, words):
+    return np.frombuffer(bits.to_bytes(words * 8, 'little'), dtype='<u8')
+
+
+def _rating_scores(workers=None):
+    """calculate_rating_score for every rated worker (of ``workers``), in two aggregate queries."""
+    def averages(model):
+        queryset = model.objects.all()
+        if workers is not None:
+            queryset = queryset.filter(worker__in=workers.values('id'))
+        return dict(queryset.values('worker_id').annotate(avg=Avg('rating')).values_list('worker_id', 'avg'))
+
+    worker_ratings = averages(Feedback)
+    client_ratings = averages(ClientFeedback)
+    scores = {}
+    for worker_id in worker_ratings.keys() | client_ratings.keys():
+        ratings = [r for r in [worker_ratings.get(worker_id) or 0, client_ratings.get(worker_id) or 0] if r > 0]
+        scores[worker_id] = sum(r / 5 for r in ratings) / len(ratings) if ratings else 0.0
+    return scores
+
+
+def _epoch(value):
+    return value.timestamp() if value else np.nan
+
+
+def collect_features(workers=None, categories=None, profiles=None, deadline=None, chunk_size=BUILD_CHUNK_SIZE):
+    """Feature columns for ``workers`` (default: every matchable worker) and the header describing them.
+
+    Target-job and education columns cover ``categories`` and education ``profiles``
+    (default: all of them). Past ``deadline`` (a time.monotonic() value) no further
+    chunks are collected, so the columns may hold only some of the workers.
+    """
+    from .utils import MatchEngine
+
+    built_at = timezone.now()
+    categories = list(Category.objects.order_by('id')) if categories is None else sorted(categories, key=lambda c: c.id)
+    profiles = MatchEngine.education_profiles() if profiles is None else list(profiles)
+    if workers is None:
+        workers = Worker.objects.filter(is_matchable=True)
+    ratings = _rating_scores(workers)
+    workers = workers.order_by('id').prefetch_related('skills', 'educations', 'target_jobs')
+    rows = []
+    chunk = []
+    for worker in workers.iterator(chunk_size=chunk_size):
+        chunk.append(worker)
+        if len(chunk) == chunk_size:
+            rows.extend(_feature_rows(chunk, categories, profiles, ratings))
+            chunk = []
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    rows.extend(_feature_rows(chunk, categories, profiles, ratings))
+
+    count = len(rows)
+    words = max([(row['bits'].bit_length() + 63) // 64 for row in rows] + [1])
+    locations = sorted({row['location'] for row in rows if row['location']})
+    location_keys = {name: index for index, name in enumerate(locations)}
+
+    columns = {
+        'worker_id': np.array([row['id'] for row in rows], dtype='<i8'),
+        'skill_bits': np.array([_skill_words(row['bits'], words) for row in rows], dtype='<u8').reshape(count, words),
+        'has_experience': np.array([row['has_experience'] for row in rows], dtype='u1'),
+        'join_date': np.array([row['join_date'] for row in rows], dtype='<f8'),
+        'last_activity': np.array([row['last_activity'] for row in rows], dtype='<f8'),
+        'rating': np.array([row['rating'] for row in rows], dtype='<f8'),
+        'location_key': np.array([location_keys.get(row['location'], -1) for row in rows], dtype='<i4'),
+        'target_job': np.array([row['target_job'] for row in rows], dtype='<f8').reshape(count, len(categories)),
+        'education': np.array([row['education'] for row in rows], dtype='<f8').reshape(count, len(profiles)),
+    }
+
+    specs = []
+    offset = 0
+    for name, array in columns.items():
+        spec = _column(name, array.dtype, *array.shape)
+        spec['offset'] = offset
+        specs.append(spec)
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = {
+        'built_at': built_at.isoformat(),
+        'count': count,
+        'words': words,
+        'categories': [category.id for category in categories],
+        'education_profiles': [[field, list(levels)] for field, levels in profiles],
+        'locations': locations,
+        'columns': specs,
+    }
+    return header, columns
+
+
+def build_snapshot(path=None):
+    """Write a fresh snapshot atomically and return its header."""
+    path = path or settings.FEATURE_SNAPSHOT_PATH
+    header, columns = collect_features()
+    _write(path, header, columns)
+    logger.info(f"Built feature snapshot of {header['count']} workers at {path}")
+    return header
+
+
+def experience_scores(has_experience, join_date, now):
+    """calculate_experience_score over arrays; ``now`` and ``join_date`` are epoch seconds."""
+    days = np.floor((now - join_date) / 86400)
+    years = np.nan_to_num(np.round(days / 365.25, 2))
+    return np.where(has_experience, np.minimum(years / 5, 1.0), 0.0)
+
+
+def tie_breakers(has_experience, last_activity, now):
+    """calculate_tie_breaker over arrays."""
+    return 0.01 * has_experience + 0.01 * (last_activity > now - 30 * 86400)
+
+
+def _feature_rows(workers, categories, profiles, ratings):
+    from .utils import MatchEngine
+
+    bitsets = skills.get_worker_bitsets(workers)
+    for worker in workers:
+        target_jobs = worker.target_jobs.all()
+        educations = worker.educations.all()
+        yield {
+            'id': worker.id,
+            'bits': bitsets[worker.id].bits,
+            'has_experience': worker.has_experience,
+            'join_date': _epoch(worker.join_date),
+            'last_activity': _epoch(worker.last_activity),
+            'rating': ratings.get(worker.id, 0.0),
+            'location': MatchEngine.normalize_string(worker.location or ''),
+            'target_job': [MatchEngine.compute_target_job_similarity(c, target_jobs) for c in categories],
+            'education': [MatchEngine.score_education(profile, educations) for profile in profiles],
+        }
+
+
+def _write(path, header, columns):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix_length = len(MAGIC) + 8 + len(header_bytes)
+    data_start = -(-prefix_length // ALIGNMENT) * ALIGNMENT
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.features-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header_bytes)))
+            f.write(header_bytes)
+            for spec, array in zip(header['columns'], columns.values()):
+                f.seek(data_start + spec['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)  # Readers keep their old mapping until they reopen
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class FeatureSnapshot:
+    """Read-only view of a snapshot file; columns are numpy.memmap arrays."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a feature snapshot")
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length))
+            stat = os.fstat(f.fileno())
+        self.path = path
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        self.built_at = datetime.fromisoformat(header['built_at'])
+        self.count = header['count']
+        self.words = header['words']
+        self.category_columns = {category_id: i for i, category_id in enumerate(header['categories'])}
+        self.education_columns = {
+            (field, tuple(levels)): i for i, (field, levels) in enumerate(header['education_profiles'])
+        }
+        self.locations = header['locations']
+
+        data_start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+        for spec in header['columns']:
+            shape = tuple(spec['shape'])
+            if all(shape):
+                array = np.memmap(path, dtype=spec['dtype'], mode='r', offset=data_start + spec['offset'], shape=shape)
+            else:
+                array = np.empty(shape, dtype=spec['dtype'])
+            setattr(self, spec['name'], array)
+
+    def covers(self, job):
+        return job.category_id in self.category_columns
+
+
+_current = None
+_checked_at = None
+_lock = threading.Lock()
+
+
+def current_snapshot():
+    """The newest snapshot on disk, reopened when the file is replaced; None if there is none."""
+    global _current, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _current
+    with _lock:
+        _checked_at = now
+        path = settings.FEATURE_SNAPSHOT_PATH
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _current = None
+            return None
+        if _current is None or _current.identity != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                _current = FeatureSnapshot(path)
+            except Exception as e:
+                logger.error(f"Error opening feature snapshot {path}: {str(e)}")
+                _current = None
+        return _current
+
+
+def changed_worker_ids(since):
+    return set(WorkerFeatureChange.objects.filter(changed_at__gte=since).values_list('worker_id', flat=True))
+
+
+def record_worker_change(worker_id):
+    WorkerFeatureChange.objects.update_or_create(worker_id=worker_id)
+
+
+def location_index():
+    """The gazetteer's cached names, hierarchy and coordinates."""
+    return gazetteer.location_index.ensure_loaded()
+
+
+def location_scores(job_location, names, index=None):
+    """compute_location_similarity for one job location against many worker locations."""
+    if not names:
+        return np.full(0, 0.5)
+    index = index or location_index()
+    job_location_id = index.resolve(job_location)
+    if job_location_id is None:
+        return np.full(len(names), 0.5)
+    return np.array([index.similarity(job_location_id, index.resolve(name)) for name in names])
+
+
+def match_job(snapshot, job, weights, limit=10, deadline=None):
+    """Score snapshot workers for a job with array operations, plus the delta overlay, best first.
+
+    ``deadline`` only bounds the overlay, which is scored from the database.
+    """
+    from .utils import MatchEngine, MatchResults, CRITERIA_WEIGHT_KEYS
+
+    changed = changed_worker_ids(snapshot.built_at)
+    job_bitset = skills.get_job_bitset(job)
+    # Terms beyond the snapshot's width belong to no snapshot worker
+    width_mask = (1 << (snapshot.words * 64)) - 1
+    job_words = _skill_words(job_bitset.bits & width_mask, snapshot.words)
+    listed_skills = [s for s in job.skills.split(',') if s.strip()]
+    listed_words = _skill_words(skills.to_bits(skills.vocabulary.term_ids(listed_skills)) & width_mask, snapshot.words)
+    job_loc = MatchEngine.normalize_string(job.location)
+    try:
+        job_location_key = snapshot.locations.index(job_loc)
+    except ValueError:
+        job_location_key = -2
+
+    # Same candidates as MatchEngine.candidate_workers: shared location or a skill folding onto a listed one
+    location_key = np.asarray(snapshot.location_key)
+    skill_bits = np.asarray(snapshot.skill_bits)
+    mask = (location_key == job_location_key) | (skill_bits & listed_words).any(axis=1)
+    if changed:
+        mask &= ~np.isin(snapshot.worker_id, list(changed))
+    index = np.flatnonzero(mask)
+
+    now = timezone.now().timestamp()
+    bits = skill_bits[index]
+    has_experience = np.asarray(snapshot.has_experience)[index].astype(bool)
+    location_table = location_scores(job.location, snapshot.locations)
+    location_table = np.append(location_table, 0.5)  # key -1: worker without a location
+
+    criteria = {
+        'skills': (np.bitwise_count(bits & job_words).sum(axis=1) / job_bitset.term_count
+                   if job_bitset.term_count else np.zeros(len(index))),
+        'target_job': np.asarray(snapshot.target_job)[index, snapshot.category_columns[job.category_id]],
+        'experience': experience_scores(has_experience, np.asarray(snapshot.join_date)[index], now),
+        'education': np.asarray(snapshot.education)[
+            index, snapshot.education_columns[MatchEngine.education_requirements(job)]
+        ],
+        'location': location_table[location_key[index]],
+        'rating': np.asarray(snapshot.rating)[index],
+    }
+    scores = sum(weights[weight_key] * criteria[criterion] for criterion, weight_key in CRITERIA_WEIGHT_KEYS.items())
+    scores = scores + tie_breakers(has_experience, np.asarray(snapshot.last_activity)[index], now)
+    scores = np.clip(scores, 0.0, 1.0)
+
+    top = np.argpartition(-scores, min(limit, len(scores)) - 1)[:limit] if len(scores) else np.array([], dtype=int)
+    top = top[np.argsort(-scores[top], kind='stable')]
+    worker_ids = [int(snapshot.worker_id[index[i]]) for i in top]
+    workers = Worker.objects.select_related('user').in_bulk(worker_ids)
+
+    results = []
+    for i in top:
+        worker = workers.get(int(snapshot.worker_id[index[i]]))
+        if worker is None:  # Deleted since the build without a recorded change
+            continue
+        results.append({
+            'worker': worker,
+            'score': float(scores[i]),
+            'criteria': {criterion: float(values[i]) for criterion, values in criteria.items()},
+        })
+
+    MatchEngine.store_worker_embeddings([result['worker'] for result in results])
+
+    overlay = MatchResults()
+    if changed:
+        overlay = MatchEngine.score_workers(job, MatchEngine.candidate_workers(job, worker_ids=changed, budget=0), weights, deadline)
+        results.extend(overlay)
+    return MatchResults(
+        sorted(results, key=lambda x: x['score'], reverse=True),
+        partial=overlay.partial,
+        evaluated=len(index) + overlay.evaluated,
+    )
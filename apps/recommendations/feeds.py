@@ -0,0 +1,158 @@
+"""Computing and caching recommendation lists as MatchResult rows."""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from apps.jobs.models import Job
+from apps.users.models import Worker
+from .market import match_jobs
+from .models import MatchResult
+from .singleflight import SingleFlightTimeout, single_flight
+from .utils import MatchEngine
+
+logger = logging.getLogger(__name__)
+
+# Seconds a request may spend scoring before returning the best matches so far
+MATCH_TIME_BUDGET = 2.0
+# Seconds a background completion may spend; what it has by then is cached as complete
+BACKGROUND_TIME_BUDGET = 30.0
+BACKGROUND_THREADS = 2
+# Seconds a partial list stays marked for completion
+PARTIAL_MARK_TIMEOUT = 3600
+
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_THREADS, thread_name_prefix='recommendations')
+
+
+def _run(func, *args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception as e:
+        logger.error(f"Error in background {func.__name__}{args}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    """Run ``func(*args)`` on the background pool once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run, func, *args))
+
+
+def cached_job_matches(job):
+    return MatchResult.objects.filter(job=job)
+
+
+def cached_feed(worker):
+    return MatchResult.objects.filter(worker=worker, job__status='open')
+
+
+def partial_key(entity_type, entity_id):
+    return f"recommendations:partial:{entity_type}:{entity_id}:v{MatchEngine.VERSION}"
+
+
+def mark_partial(entity_type, entity_id, partial):
+    """Remember, across processes, whether a cached list is waiting for background completion."""
+    if partial:
+        cache.set(partial_key(entity_type, entity_id), True, timeout=PARTIAL_MARK_TIMEOUT)
+    else:
+        cache.delete(partial_key(entity_type, entity_id))
+
+
+def is_complete(entity_type, entity_id, cached):
+    return cached.exists() and not cache.get(partial_key(entity_type, entity_id))
+
+
+def build_job_matches(job, time_budget=None, complete_later=True):
+    """Match a job to workers and cache the top 10 as MatchResult rows.
+
+    A partial (budget-bounded) result is cached right away and, with ``complete_later``,
+    completed in the background.
+    """
+    started = time.perf_counter()
+    match_results = MatchEngine.match_job_to_workers(job, time_budget)
+    match_results.duration = time.perf_counter() - started
+    with transaction.atomic():
+        cached_job_matches(job).delete()
+        MatchResult.objects.bulk_create([
+            MatchResult(job=job, worker=result['worker'], score=result['score'], criteria=result['criteria'])
+            for result in match_results[:10]  # Top 10
+        ], ignore_conflicts=True)
+    complete_later = complete_later and match_results.partial
+    mark_partial('job', job.id, complete_later)
+    if complete_later:
+        run_in_background(complete_job_matches, job.id)
+    return match_results
+
+
+def build_worker_feed(worker, time_budget=None, complete_later=True):
+    """Match a worker to jobs and cache the top 10 as MatchResult rows.
+
+    A partial (budget-bounded) result is cached right away and, with ``complete_later``,
+    completed in the background.
+    """
+    started = time.perf_counter()
+    match_results = MatchEngine.match_worker_to_jobs(worker, time_budget)
+    match_results.duration = time.perf_counter() - started
+    with transaction.atomic():
+        cached_feed(worker).delete()
+        MatchResult.objects.bulk_create([
+            MatchResult(job=result['job'], worker=worker, score=result['score'], criteria=result['criteria'])
+            for result in match_results[:10]  # Top 10
+        ], ignore_conflicts=True)
+    complete_later = complete_later and match_results.partial
+    mark_partial('worker', worker.id, complete_later)
+    if complete_later:
+        run_in_background(complete_worker_feed, worker.id)
+    return match_results
+
+
+def complete_in_background(entity_type, entity_id, build, cached):
+    """Rebuild a partial list within BACKGROUND_TIME_BUDGET, once across processes; skipped
+    when another request completed it meanwhile or is computing it now."""
+    try:
+        single_flight(
+            entity_type, entity_id,
+            lambda: build(BACKGROUND_TIME_BUDGET, complete_later=False),
+            lambda: is_complete(entity_type, entity_id, cached)
+        )
+    except SingleFlightTimeout:
+        logger.info(f"Skipped completing {entity_type} {entity_id}: another request is computing it")
+
+
+def complete_job_matches(job_id):
+    job = Job.objects.filter(id=job_id).select_related('category').first()
+    if job is not None:
+        complete_in_background('job', job.id, partial(build_job_matches, job), cached_job_matches(job))
+
+
+def complete_worker_feed(worker_id):
+    worker = Worker.objects.filter(id=worker_id).first()
+    if worker is not None:
+        complete_in_background('worker', worker.id, partial(build_worker_feed, worker), cached_feed(worker))
+
+
+def build_batch_job_matches(jobs, time_budget=None):
+    """Match several jobs in one market pass and cache each one's top 10 as MatchResult rows.
+
+    Jobs the time budget left partial are cached as far as they got and completed in the background.
+    """
+    started = time.perf_counter()
+    matches = match_jobs(jobs, time_budget=time_budget)
+    duration = time.perf_counter() - started
+    with transaction.atomic():
+        MatchResult.objects.filter(job_id__in=list(matches)).delete()
+        MatchResult.objects.bulk_create([
+            MatchResult(job_id=job_id, worker=result['worker'], score=result['score'], criteria=result['criteria'])
+            for job_id, match_results in matches.items()
+            for result in match_results[:10]  # Top 10
+        ], ignore_conflicts=True)
+    for job_id, match_results in matches.items():
+        match_results.duration = duration
+        mark_partial('job', job_id, match_results.partial)
+        if match_results.partial:
+            run_in_background(complete_job_matches, job_id)
+    return matches
@@ -0,0 +1,267 @@
+"""Offline gazetteer: coordinates for Location rows, free-text resolution and radius lookups.
+
+The bundled ``data/gazetteer.csv`` (name, parent, latitude, longitude, aliases) is
+loaded with ``manage.py load_gazetteer``. Job and Worker locations are resolved to a
+Location on save; each Location carries a geohash cell, so "within R km" is a prefix
+scan over a few cells followed by an exact great-circle check.
+"""
+import csv
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, FloatField, Q, Value, When
+
+from .models import Location
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+GEOHASH_PRECISION = 6  # ~1.2 x 0.6 km cells
+EARTH_RADIUS_KM = 6371.0088
+# Different places score on distance for the location criterion, from just under a
+# sub-location's 0.9 down to the unknown-location floor of 0.5 at this many km
+LOCATION_DISTANCE_KM = 150.0
+UNKNOWN_LOCATION_SCORE = 0.5
+INDEX_TTL = 300
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 300.0
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def normalize_place(text):
+    return re.sub(r'\s+', ' ', (text or '').lower().strip())
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        bounds, value = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    lat_bits = precision * 5 // 2
+    lng_bits = precision * 5 - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius_km, max_cells=16):
+    """Geohash prefixes, as long as possible within ``max_cells``, covering the circle's bounding box."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = min(dlat / max(math.cos(math.radians(latitude)), 0.01), 180.0)
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    west, east = longitude - dlng, longitude + dlng
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if (int((north - south) / height) + 2) * (int((east - west) / width) + 2) <= max_cells:
+            break
+
+    # Steps of at most one cell visit every cell the box touches
+    cells = set()
+    lat = south
+    while True:
+        lng = west
+        while True:
+            cells.add(encode_geohash(lat, (lng + 180.0) % 360.0 - 180.0, precision))
+            if lng >= east:
+                break
+            lng = min(lng + width, east)
+        if lat >= north:
+            break
+        lat = min(lat + height, north)
+    return cells
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance; accepts scalars or NumPy arrays."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_score(distance_km):
+    """Location criterion for two different places this far apart: never below a place we
+    cannot resolve, so a real location ranks above a typo however far away it is."""
+    closeness = max(0.0, 1.0 - distance_km / LOCATION_DISTANCE_KM)
+    return UNKNOWN_LOCATION_SCORE + (0.9 - UNKNOWN_LOCATION_SCORE) * closeness
+
+
+class LocationIndex:
+    """Process-local cache of location names, aliases, hierarchy and coordinates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self.ids = {}
+        self.parents = {}
+        self.coordinates = {}
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < INDEX_TTL:
+            return self
+        with self._lock:
+            ids, parents, coordinates = {}, {}, {}
+            rows = list(Location.objects.values_list('id', 'name', 'parent_id', 'aliases', 'latitude', 'longitude'))
+            for location_id, name, parent_id, _, latitude, longitude in rows:
+                ids[normalize_place(name)] = location_id
+                parents[location_id] = parent_id
+                if latitude is not None and longitude is not None:
+                    coordinates[location_id] = (latitude, longitude)
+            # Names win over aliases
+            for location_id, _, _, aliases, _, _ in rows:
+                for alias in aliases or []:
+                    ids.setdefault(normalize_place(alias), location_id)
+            self.ids, self.parents, self.coordinates = ids, parents, coordinates
+            self._loaded_at = time.monotonic()
+        return self
+
+    def resolve(self, text):
+        """Location id for free text: a name or alias, else its first comma-separated part."""
+        self.ensure_loaded()
+        name = normalize_place(text)
+        if not name:
+            return None
+        location_id = self.ids.get(name)
+        if location_id is None and ',' in name:
+            location_id = self.ids.get(normalize_place(name.split(',')[0]))
+        return location_id
+
+    def similarity(self, job_location_id, worker_location_id):
+        """Same place 1.0, a sub-location of the job's place 0.9, else by distance when both
+        have coordinates, else UNKNOWN_LOCATION_SCORE."""
+        if job_location_id is None or worker_location_id is None:
+            return UNKNOWN_LOCATION_SCORE
+        if job_location_id == worker_location_id:
+            return 1.0
+        current, seen = worker_location_id, set()
+        while current is not None and current not in seen:
+            seen.add(current)
+            current = self.parents.get(current)
+            if current == job_location_id:
+                return 0.9
+        job_point = self.coordinates.get(job_location_id)
+        worker_point = self.coordinates.get(worker_location_id)
+        if job_point is None or worker_point is None:
+            return UNKNOWN_LOCATION_SCORE
+        return distance_score(float(haversine_km(*job_point, *worker_point)))
+
+
+location_index = LocationIndex()
+
+
+def resolve_location(text):
+    return location_index.resolve(text)
+
+
+def locations_within(latitude, longitude, radius_km):
+    """{location id: distance in km} for gazetteer entries within ``radius_km`` of the point."""
+    query = Q()
+    for cell in covering_cells(latitude, longitude, radius_km):
+        query |= Q(geohash__startswith=cell)
+    rows = list(Location.objects.filter(query).values_list('id', 'latitude', 'longitude'))
+    if not rows:
+        return {}
+    ids, latitudes, longitudes = zip(*rows)
+    distances = haversine_km(latitude, longitude, np.array(latitudes), np.array(longitudes))
+    return {location_id: float(distance) for location_id, distance in zip(ids, distances) if distance <= radius_km}
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Rows of a Job or Worker queryset whose place is within ``radius_km``, annotated with ``distance_km``."""
+    distances = locations_within(latitude, longitude, radius_km)
+    if not distances:
+        return queryset.none()
+    return queryset.filter(place_id__in=distances).annotate(distance_km=Case(
+        *[When(place_id=location_id, then=Value(distance)) for location_id, distance in distances.items()],
+        output_field=FloatField()
+    ))
+
+
+def search_center(params, fallback_location=None):
+    """((latitude, longitude, radius_km), None) for a radius query's parameters, or (None, error).
+
+    The centre is ``lat``/``lng``, else the ``location`` parameter, else ``fallback_location``.
+    """
+    try:
+        radius_km = float(params.get('radius_km') or DEFAULT_RADIUS_KM)
+    except ValueError:
+        return None, "radius_km must be a number."
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        return None, f"radius_km must be greater than 0 and at most {MAX_RADIUS_KM:g}."
+    if params.get('lat') or params.get('lng'):
+        try:
+            latitude, longitude = float(params.get('lat')), float(params.get('lng'))
+        except (TypeError, ValueError):
+            return None, "lat and lng must both be numbers."
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None, "lat and lng are out of range."
+        return (latitude, longitude, radius_km), None
+    location_id = resolve_location(params.get('location') or fallback_location)
+    point = location_index.coordinates.get(location_id)
+    if point is None:
+        return None, "Unknown location. Pass lat and lng, or a known location."
+    return (point[0], point[1], radius_km), None
+
+
+def load_gazetteer(path=DATA_FILE):
+    """Create or update Location rows from a gazetteer CSV; returns (created, updated)."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    created = updated = 0
+    with transaction.atomic():
+        existing = {normalize_place(location.name): location for location in Location.objects.all()}
+        # Parents first, so children can point at them
+        for row in sorted(rows, key=lambda row: bool(row['parent'])):
+            name = row['name'].strip()
+            location = existing.get(normalize_place(name))
+            if location is None:
+                location = Location(name=name)
+                existing[normalize_place(name)] = location
+                created += 1
+            else:
+                updated += 1
+            parent = existing.get(normalize_place(row['parent']))
+            if parent is not None:
+                location.parent = parent
+            location.latitude = float(row['latitude']) if row['latitude'] else None
+            location.longitude = float(row['longitude']) if row['longitude'] else None
+            location.aliases = sorted({normalize_place(a) for a in row['aliases'].split('|') if a.strip()})
+            location.save()
+    location_index.clear()
+    return created, updated
+
+
+def resolve_places(model):
+    """Re-resolve ``place`` for every row of Job or Worker from its location text; returns rows changed."""
+    changed = []
+    for pk, location, place_id in model.objects.values_list('pk', 'location', 'place_id').iterator(chunk_size=2000):
+        resolved = resolve_location(location)
+        if resolved != place_id:
+            changed.append(model(pk=pk, place_id=resolved))
+    model.objects.bulk_update(changed, ['place'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,42 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.recommendations.feature_snapshot import build_snapshot, current_snapshot
+from apps.recommendations.models import WorkerFeatureChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the memory-mapped worker feature snapshot used by the matcher. "
+        "Run from cron; --min-changes/--max-age skip builds that are not needed yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-changes', type=int, default=0,
+                            help='Only rebuild once this many workers changed since the last build.')
+        parser.add_argument('--max-age', type=int,
+                            help='Rebuild regardless of --min-changes when the snapshot is older than this many seconds.')
+        parser.add_argument('--path', help='Write here instead of settings.FEATURE_SNAPSHOT_PATH.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.FEATURE_SNAPSHOT_PATH
+        if os.path.exists(path) and options['min_changes']:
+            pending = WorkerFeatureChange.objects.count()
+            age = time.time() - os.path.getmtime(path)
+            stale = options['max_age'] is not None and age >= options['max_age']
+            if pending < options['min_changes'] and not stale:
+                self.stdout.write(f"Skipped: {pending} pending changes, snapshot is {int(age)}s old.")
+                return
+
+        started = timezone.now()
+        header = build_snapshot(path)
+        # Changes made during the build stay in the overlay until the next one
+        cleared, _ = WorkerFeatureChange.objects.filter(changed_at__lt=started).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Built feature snapshot of {header['count']} workers at {path} "
+            f"({os.path.getsize(path)} bytes, {cleared} overlay entries cleared)."
+        ))
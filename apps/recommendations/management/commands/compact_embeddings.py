@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.embedding_store import get_store, keyword_vector
+from apps.recommendations.models import Embedding
+
+
+class Command(BaseCommand):
+    help = "Compact the memory-mapped embedding store, or reload it from the Embedding table with --rebuild."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Append every Embedding row that differs from the store before compacting.')
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if store is None:
+            raise CommandError("EMBEDDING_BACKEND is not 'mmap'.")
+
+        if options['rebuild']:
+            appended = 0
+            for entity_type, entity_id, vector in Embedding.objects.values_list(
+                'entity_type', 'entity_id', 'vector'
+            ).iterator(chunk_size=2000):
+                data = json.loads(vector) if isinstance(vector, str) else vector
+                appended += store.put(entity_type, entity_id, keyword_vector(data.get('keywords', [])))
+            self.stdout.write(f"Appended {appended} changed embeddings.")
+
+        kept, dropped = store.compact()
+        self.stdout.write(self.style.SUCCESS(f"Compacted embedding store: kept {kept}, dropped {dropped} stale records."))
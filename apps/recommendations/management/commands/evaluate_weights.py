@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.models import Category
+from apps.recommendations.evaluation import (
+    WEIGHT_KEYS, build_snapshot, evaluate, random_weights, summarize_by_category, weight_grid
+)
+from apps.recommendations.utils import MatchEngine
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay accepted applications/requests against candidate weight vectors and report "
+        "precision@k and MRR per category."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--step', type=float, default=0.05, help='Grid step on the weight simplex.')
+        parser.add_argument('--samples', type=int, help='Use this many random weight vectors instead of a grid.')
+        parser.add_argument('--seed', type=int, help='Random seed for --samples.')
+        parser.add_argument('--k', type=int, default=10, help='Cut-off for precision@k.')
+        parser.add_argument('--top', type=int, default=3, help='Best weight vectors to list per category.')
+        parser.add_argument('--batch-size', type=int, default=256, help='Weight vectors scored per matrix product.')
+        parser.add_argument('--min-candidates', type=int, default=2, help='Skip jobs with fewer candidates.')
+
+    def handle(self, *args, **options):
+        if options['samples']:
+            candidates = random_weights(options['samples'], options['seed'])
+        else:
+            if not 0 < options['step'] <= 0.5:
+                raise CommandError("--step must be in (0, 0.5].")
+            try:
+                candidates = weight_grid(options['step'])
+            except ValueError as e:
+                raise CommandError(f"{e}; choose another --step or use --samples.")
+
+        started = time.perf_counter()
+        snapshot = build_snapshot(min_candidates=options['min_candidates'])
+        snapshot_time = time.perf_counter() - started
+        if snapshot.job_count == 0:
+            self.stdout.write("No jobs with accepted workers to replay.")
+            return
+
+        categories = Category.objects.in_bulk(list(snapshot.category_names))
+        current = np.array([
+            [MatchEngine.get_weights(categories.get(category_id))[key] for key in WEIGHT_KEYS]
+            for category_id in snapshot.category_names
+        ], dtype=np.float32)
+        weights = np.vstack([current, candidates])
+
+        started = time.perf_counter()
+        precision, reciprocal_rank = evaluate(
+            snapshot, weights, k=options['k'], batch_size=options['batch_size']
+        )
+        replay_time = time.perf_counter() - started
+        self.stdout.write(
+            f"Snapshot: {snapshot.job_count} jobs, {snapshot.pair_count} candidate pairs ({snapshot_time:.2f}s). "
+            f"Replayed {len(candidates)} weight vectors in {replay_time:.2f}s."
+        )
+
+        summary = summarize_by_category(snapshot, precision, reciprocal_rank)
+        k = options['k']
+        for index, category_id in enumerate(snapshot.category_names):
+            category_precision, category_mrr = summary[category_id]
+            jobs = int((snapshot.category_ids == category_id).sum())
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{snapshot.category_names[category_id]} ({jobs} jobs)"
+            ))
+            self.stdout.write(self._format_row(
+                'current', category_precision[index], category_mrr[index], current[index], k
+            ))
+            # Rank candidates by MRR, then precision@k; current configs occupy the first rows.
+            offset = len(current)
+            order = np.lexsort((-category_precision[offset:], -category_mrr[offset:]))
+            for rank, candidate in enumerate(order[:options['top']], start=1):
+                self.stdout.write(self._format_row(
+                    f"best #{rank}", category_precision[offset + candidate],
+                    category_mrr[offset + candidate], candidates[candidate], k
+                ))
+
+    @staticmethod
+    def _format_row(label, precision, mrr, weights, k):
+        weight_text = ' '.join(f"{key}={value:.2f}" for key, value in zip(WEIGHT_KEYS, weights))
+        return f"  {label:<8} P@{k}={precision:.3f} MRR={mrr:.3f}  {weight_text}"
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.models import Job
+from apps.users.models import Worker
+from apps.recommendations.gazetteer import DATA_FILE, load_gazetteer, resolve_places
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the bundled gazetteer (or --path CSV) into Location, then re-resolve the place "
+        "of every job and worker from its location text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DATA_FILE, help='Gazetteer CSV: name,parent,latitude,longitude,aliases')
+        parser.add_argument('--skip-resolve', action='store_true', help='Only load locations.')
+
+    def handle(self, *args, **options):
+        try:
+            created, updated = load_gazetteer(options['path'])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Could not load gazetteer {options['path']}: {e}")
+        self.stdout.write(f"Locations: {created} created, {updated} updated.")
+        if options['skip_resolve']:
+            return
+        jobs = resolve_places(Job)
+        workers = resolve_places(Worker)
+        self.stdout.write(self.style.SUCCESS(f"Re-resolved places of {jobs} jobs and {workers} workers."))
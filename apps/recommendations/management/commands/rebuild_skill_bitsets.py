@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.jobs.models import Job
+from apps.users.models import Worker
+from apps.recommendations.skills import refresh_job_bitset, refresh_worker_bitset, vocabulary
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored skill bitsets of every worker and job (e.g. after bulk synonym edits)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--open-only', action='store_true', help='Only rebuild bitsets for open jobs.')
+
+    def handle(self, *args, **options):
+        vocabulary.clear()
+        workers = Worker.objects.prefetch_related('skills')
+        for worker in workers.iterator(chunk_size=500):
+            refresh_worker_bitset(worker)
+        jobs = Job.objects.filter(status='open') if options['open_only'] else Job.objects.all()
+        for job in jobs.iterator(chunk_size=500):
+            refresh_job_bitset(job)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt skill bitsets for {workers.count()} workers and {jobs.count()} jobs."
+        ))
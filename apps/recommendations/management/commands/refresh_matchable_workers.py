@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.models import Worker
+from apps.recommendations.feature_snapshot import record_worker_change
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Worker.is_matchable for every worker. Signals keep it current on saves; "
+        "run this from cron so expired suspensions are picked up, and once to backfill."
+    )
+
+    def handle(self, *args, **options):
+        changed = Worker.refresh_matchable()
+        for worker_id in changed:
+            record_worker_change(worker_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated is_matchable for {len(changed)} workers; "
+            f"{Worker.objects.filter(is_matchable=True).count()} are matchable."
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recommendations.market import score_market, store_market
+
+
+class Command(BaseCommand):
+    help = (
+        "Score every open job against every matchable worker with sparse matrix products and cache "
+        "the top-k matches in both directions. Intended to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=10, help='Matches kept per job and per worker.')
+        parser.add_argument('--chunk-size', type=int, default=64, help='Jobs scored per block.')
+        parser.add_argument('--dry-run', action='store_true', help='Score without writing MatchResult rows.')
+
+    def handle(self, *args, **options):
+        if options['k'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--k and --chunk-size must be positive.")
+
+        started = time.perf_counter()
+        result = score_market(k=options['k'], chunk_size=options['chunk_size'])
+        scored = time.perf_counter() - started
+        self.stdout.write(
+            f"Scored {len(result.job_ids)} jobs x {len(result.worker_ids)} workers in {scored:.1f}s."
+        )
+        if options['dry_run']:
+            return
+        stored = store_market(result)
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} matches in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.recommendations.models import ShadowComparison
+from apps.recommendations.shadow import PERCENTILES, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare shadow engine runs with the production engine: top-k rank overlap, "
+        "score drift and latency percentiles per engine and recommendation direction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7, help='Only runs from the last N days.')
+        parser.add_argument('--engine', help='Only runs of this shadow engine (dotted path).')
+        parser.add_argument('--k', type=int, default=10, help='Cut-off for rank overlap.')
+
+    def handle(self, *args, **options):
+        if options['days'] <= 0 or options['k'] < 1:
+            raise CommandError("--days and --k must be positive.")
+
+        comparisons = ShadowComparison.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=options['days'])
+        ).order_by('engine', 'entity_type')
+        if options['engine']:
+            comparisons = comparisons.filter(engine=options['engine'])
+
+        groups = {}
+        for comparison in comparisons:
+            groups.setdefault((comparison.engine, comparison.entity_type), []).append(comparison)
+        if not groups:
+            self.stdout.write("No shadow runs recorded in that window.")
+            return
+
+        k = options['k']
+        for (engine, entity_type), rows in groups.items():
+            summary = summarize(rows, k=k)
+            direction = 'job -> workers' if entity_type == 'job' else 'worker -> jobs'
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{engine} ({direction}): {summary['runs']} runs, {summary['errors']} errors"
+            ))
+            self.stdout.write(
+                f"  overlap@{k}  mean={self._number(summary['overlap_mean'])} "
+                f"min={self._number(summary['overlap_min'])}  "
+                f"top-1 agreement={self._number(summary['top_match_rate'])}"
+            )
+            self.stdout.write(
+                f"  score drift  mean={self._number(summary['drift_mean'], signed=True)} "
+                f"mean |d|={self._number(summary['drift_abs_mean'])} "
+                f"max |d|={self._number(summary['drift_abs_max'])}"
+            )
+            for label, key, partial in (
+                ('production', 'production_ms', 'production_partial'),
+                ('shadow', 'shadow_ms', 'shadow_partial'),
+            ):
+                latency = ' '.join(
+                    f"p{p}={self._number(summary[key][p], '.1f', unit='ms')}" for p in PERCENTILES
+                )
+                self.stdout.write(f"  {label:<11}{latency}  partial={summary[partial]}")
+
+    @staticmethod
+    def _number(value, spec='.3f', signed=False, unit=''):
+        if value is None:
+            return '-'
+        return format(value, ('+' if signed else '') + spec) + unit
@@ -0,0 +1,252 @@
+"""Market-wide batch matching: every open job against every matchable worker in one pass.
+
+Skill overlap for all pairs is one sparse product of the job×term and worker×term
+matrices (terms are synonym-folded SkillTerm ids); the remaining criteria are
+per-worker vectors broadcast across each block of jobs. The top-k workers per job
+and jobs per worker are written to MatchResult, so the recommendation views are
+served from the cache instead of running MatchEngine per request. Every stored
+score uses the job's category weights, whichever direction picked the pair. ``match_jobs``
+runs the same pass for a client's batch of jobs over the union of their candidates.
+"""
+from collections import namedtuple
+import logging
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+
+from apps.jobs.models import Job
+from apps.users.models import Worker
+from . import skills
+from .feature_snapshot import (
+    BUILD_CHUNK_SIZE, collect_features, experience_scores, tie_breakers, location_index, location_scores
+)
+from .models import MatchResult
+from .utils import MatchEngine, MatchResults, CRITERIA_WEIGHT_KEYS
+
+logger = logging.getLogger(__name__)
+
+CRITERIA = tuple(CRITERIA_WEIGHT_KEYS)
+# Workers featurized between deadline checks on the request path
+DEADLINE_CHUNK_SIZE = 250
+
+MarketResult = namedtuple('MarketResult', ['job_ids', 'worker_ids', 'by_job', 'by_worker'])
+
+
+def term_matrix(bit_values, width):
+    """CSR matrix with one row per bitset and a 1 in every set term column."""
+    indptr = [0]
+    indices = []
+    for bits in bit_values:
+        while bits:
+            low = bits & -bits
+            term = low.bit_length() - 1
+            if term < width:
+                indices.append(term)
+            bits ^= low
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(bit_values), width))
+
+
+def _weights_vector(weights):
+    return np.array([weights[CRITERIA_WEIGHT_KEYS[name]] for name in CRITERIA])
+
+
+def _merge_top(top, new, k):
+    """Keep the k best along axis 1 of (scores, *payload) tuples, ranked by scores."""
+    merged = [np.concatenate([a, b], axis=1) for a, b in zip(top, new)]
+    if merged[0].shape[1] > k:
+        keep = np.argpartition(-merged[0], k - 1, axis=1)[:, :k]
+        merged = [
+            np.take_along_axis(a, keep.reshape(keep.shape + (1,) * (a.ndim - 2)), axis=1) for a in merged
+        ]
+    return tuple(merged)
+
+
+def score_market(k=10, chunk_size=64):
+    """Top-k workers per open job (category weights) and jobs per matchable worker (default weights)."""
+    # Jobs first, so every job's category is among the collected target-job columns
+    jobs = list(Job.objects.filter(status='open', category__isnull=False).select_related('category').order_by('id'))
+    workers = Worker.objects.filter(is_matchable=True)
+    return score_jobs(jobs, workers, k=k, chunk_size=chunk_size, worker_direction=True)
+
+
+def match_jobs(jobs, k=10, time_budget=None):
+    """Batch MatchEngine.match_job_to_workers: {job id: MatchResults}, from one pass over the union
+    of the jobs' candidates, each job's capped by MATCH_CANDIDATE_BUDGET as candidate_workers does.
+
+    Candidates for every job come from one query (MatchEngine.batch_candidate_ids). With
+    ``time_budget`` (seconds), jobs whose candidates had to be sampled after the deadline
+    come back empty and ``partial``; so do jobs whose candidates were not all featurized
+    in time, with the best of those that were.
+    """
+    deadline = MatchEngine.deadline(time_budget)
+    jobs = [job for job in jobs if job.category_id is not None]
+    candidates, sampled = {}, {}
+    for job_id, (ids, left_out) in MatchEngine.batch_candidate_ids(jobs, deadline=deadline).items():
+        candidates[job_id], sampled[job_id] = ids, left_out
+    selected = [job for job in jobs if job.id in candidates]
+    workers = Worker.objects.filter(id__in=set().union(*candidates.values()))
+    result = score_jobs(selected, workers, k=k, candidate_ids=candidates, deadline=deadline)
+
+    scored = set(result.worker_ids.tolist())
+    worker_ids = {worker_id for ranked in result.by_job.values() for worker_id, _, _ in ranked}
+    workers = Worker.objects.select_related('user').in_bulk(worker_ids)
+    matches = {}
+    for job in jobs:
+        ranked = result.by_job.get(job.id, [])
+        job_candidates = candidates.get(job.id)
+        evaluated = len(job_candidates & scored) if job_candidates is not None else 0
+        matches[job.id] = MatchResults(
+            [
+                {
+                    'worker': workers[worker_id],
+                    'score': score,
+                    'criteria': {name: float(value) for name, value in zip(CRITERIA, criteria)},
+                }
+                for worker_id, score, criteria in sorted(ranked, key=lambda x: x[1], reverse=True)
+                if worker_id in workers
+            ],
+            partial=job_candidates is None or evaluated < len(job_candidates),
+            evaluated=evaluated,
+            sampled=sampled.get(job.id, 0),
+        )
+    return matches
+
+
+def score_jobs(jobs, workers, k=10, chunk_size=64, worker_direction=False, candidate_ids=None, deadline=None):
+    """Top-k of ``workers`` for each of ``jobs``, and optionally top-k jobs per worker.
+
+    Workers rank jobs by default weights, as MatchEngine.match_worker_to_jobs does, but
+    every returned score is the pair's score under the job's category weights.
+    ``candidate_ids`` ({job id: worker ids}) narrows each job's candidates further;
+    past ``deadline`` only the workers featurized so far are scored.
+    """
+    categories = {job.category_id: job.category for job in jobs}
+    profiles = dict.fromkeys(MatchEngine.education_requirements(job) for job in jobs)
+    header, columns = collect_features(
+        workers, categories.values(), profiles, deadline=deadline,
+        chunk_size=DEADLINE_CHUNK_SIZE if deadline is not None else BUILD_CHUNK_SIZE
+    )
+    worker_ids = columns['worker_id']
+    worker_count = len(worker_ids)
+    job_ids = np.array([job.id for job in jobs], dtype=np.int64)
+    if not jobs or not worker_count:
+        return MarketResult(job_ids, worker_ids, {}, {})
+
+    width = max(header['words'] * 64, 1)
+    worker_terms = term_matrix(
+        [int.from_bytes(row.tobytes(), 'little') for row in columns['skill_bits']], width
+    ).T.tocsr()
+    job_bitsets = skills.get_job_bitsets(jobs)
+    listed_bits = [
+        skills.to_bits(skills.vocabulary.term_ids([s for s in job.skills.split(',') if s.strip()])) for job in jobs
+    ]
+
+    now = timezone.now().timestamp()
+    has_experience = columns['has_experience'].astype(bool)
+    worker_vectors = {
+        'experience': experience_scores(has_experience, columns['join_date'], now),
+        'rating': columns['rating'],
+    }
+    bonus = tie_breakers(has_experience, columns['last_activity'], now)
+    location_key = columns['location_key']
+    category_columns = {category_id: i for i, category_id in enumerate(header['categories'])}
+    education_columns = {(field, tuple(levels)): i for i, (field, levels) in enumerate(header['education_profiles'])}
+    locations = header['locations']
+    loc_index = location_index()
+    default_weights = _weights_vector(MatchEngine.get_weights(None))
+    category_weights = {}
+
+    by_job = {}
+    worker_top = (np.empty((worker_count, 0)), np.empty((worker_count, 0)),
+                  np.empty((worker_count, 0), dtype=np.int64), np.empty((worker_count, 0, len(CRITERIA))))
+    for start in range(0, len(jobs), chunk_size):
+        block = jobs[start:start + chunk_size]
+        rows = range(start, start + len(block))
+        term_counts = np.array([job_bitsets[job.id].term_count for job in block], dtype=np.float64)
+
+        overlap = (term_matrix([job_bitsets[job.id].bits for job in block], width) @ worker_terms).toarray()
+        listed = (term_matrix([listed_bits[i] for i in rows], width) @ worker_terms).toarray() > 0
+        job_keys = np.array([
+            locations.index(loc) if loc in locations else -2
+            for loc in (MatchEngine.normalize_string(job.location) for job in block)
+        ])
+        candidates = listed | (job_keys[:, None] == location_key[None, :])
+        if candidate_ids is not None:
+            candidates &= np.array([np.isin(worker_ids, list(candidate_ids.get(job.id, ()))) for job in block])
+
+        # Location score per (job, worker location key); the extra last column is key -1
+        location_table = np.array([
+            np.append(location_scores(job.location, locations, loc_index), 0.5) for job in block
+        ])
+        criteria = np.stack([
+            np.divide(overlap, term_counts[:, None], out=np.zeros_like(overlap), where=term_counts[:, None] > 0),
+            columns['target_job'][:, [category_columns[job.category_id] for job in block]].T,
+            np.broadcast_to(worker_vectors['experience'], overlap.shape),
+            columns['education'][:, [education_columns[MatchEngine.education_requirements(job)] for job in block]].T,
+            location_table[:, location_key],
+            np.broadcast_to(worker_vectors['rating'], overlap.shape),
+        ], axis=-1, dtype=np.float32)  # (jobs, workers, criteria)
+
+        for job in block:
+            if job.category_id not in category_weights:
+                category_weights[job.category_id] = _weights_vector(MatchEngine.get_weights(job.category))
+        weights = np.array([category_weights[job.category_id] for job in block])
+        job_scores = np.clip(np.einsum('jwc,jc->jw', criteria, weights) + bonus, 0.0, 1.0)
+        job_scores[~candidates] = -np.inf
+        keep = min(k, worker_count)
+        top = np.argpartition(-job_scores, keep - 1, axis=1)[:, :keep]
+        for row, job in enumerate(block):
+            picked = [w for w in top[row] if np.isfinite(job_scores[row, w])]
+            by_job[job.id] = [
+                (int(worker_ids[w]), float(job_scores[row, w]), criteria[row, w]) for w in picked
+            ]
+
+        if not worker_direction:
+            continue
+        worker_scores = np.clip(criteria @ default_weights + bonus, 0.0, 1.0)
+        worker_scores[~candidates] = -np.inf
+        worker_top = _merge_top(worker_top, (
+            worker_scores.T,
+            job_scores.T,
+            np.broadcast_to(job_ids[start:start + len(block)], (worker_count, len(block))),
+            criteria.transpose(1, 0, 2),
+        ), k)
+
+    by_worker = {}
+    ranks, scores, ids, worker_criteria = worker_top
+    for w in range(worker_count):
+        picked = [i for i in range(ranks.shape[1]) if np.isfinite(ranks[w, i])]
+        if picked:
+            by_worker[int(worker_ids[w])] = [(int(ids[w, i]), float(scores[w, i]), worker_criteria[w, i]) for i in picked]
+    return MarketResult(job_ids, worker_ids, by_job, by_worker)
+
+
+def store_market(result):
+    """Replace cached matches for open jobs with the market pass: each job's top-k workers
+    plus each worker's top-k jobs, all scored with the job's category weights."""
+    pairs = {}
+    for worker_id, ranked in result.by_worker.items():
+        for job_id, score, criteria in ranked:
+            pairs[(job_id, worker_id)] = (score, criteria)
+    for job_id, ranked in result.by_job.items():
+        for worker_id, score, criteria in ranked:
+            pairs[(job_id, worker_id)] = (score, criteria)
+
+    rows = [
+        MatchResult(
+            job_id=job_id,
+            worker_id=worker_id,
+            score=score,
+            criteria={name: float(value) for name, value in zip(CRITERIA, criteria)},
+        )
+        for (job_id, worker_id), (score, criteria) in pairs.items()
+    ]
+    with transaction.atomic():
+        MatchResult.objects.filter(job_id__in=result.job_ids.tolist()).delete()
+        MatchResult.objects.bulk_create(rows, batch_size=1000)
+    logger.info(f"Stored {len(rows)} market matches for {len(result.job_ids)} jobs")
+    return len(rows)
@@ -18,9 +18,13 @@ class SkillSynonym(models.Model):
         return f"{self.skill}: {self.synonyms}"
 
 class Location(models.Model):
-    """Stores location hierarchy for matching."""
+    """Stores location hierarchy for matching, with gazetteer coordinates where known."""
     name = models.CharField(max_length=100, unique=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL)
+    aliases = models.JSONField(default=list)  # Other spellings, lower-case
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)  # Grid cell for radius queries
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -30,6 +34,14 @@ class Location(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .gazetteer import GEOHASH_PRECISION, encode_geohash
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude, GEOHASH_PRECISION)
+        else:
+            self.geohash = ''
+        super().save(*args, **kwargs)
+
 class WeightConfig(models.Model):
     """Stores category-specific matching weights."""
     category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
@@ -74,10 +86,26 @@ class MatchResult(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE)
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE)
     score = models.FloatField()
-    criteria = models.JSONField(default=dict)
+    # One column per criterion; the JSON shape is rebuilt by the criteria property
+    skills_score = models.FloatField(default=0.0)
+    target_job_score = models.FloatField(default=0.0)
+    experience_score = models.FloatField(default=0.0)
+    education_score = models.FloatField(default=0.0)
+    location_score = models.FloatField(default=0.0)
+    rating_score = models.FloatField(default=0.0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Criterion name -> column
+    CRITERIA_FIELDS = {
+        'skills': 'skills_score',
+        'target_job': 'target_job_score',
+        'experience': 'experience_score',
+        'education': 'education_score',
+        'location': 'location_score',
+        'rating': 'rating_score',
+    }
+
     class Meta:
         unique_together = ('job', 'worker')
         indexes = [
@@ -86,4 +114,78 @@ class MatchResult(models.Model):
         ]
 
     def __str__(self):
-        return f"Match: Job {self.job.id} - Worker {self.worker.id} ({self.score})"
\ No newline at end of file
+        return f"Match: Job {self.job.id} - Worker {self.worker.id} ({self.score})"
+
+    @property
+    def criteria(self):
+        return {name: getattr(self, field) for name, field in self.CRITERIA_FIELDS.items()}
+
+    @criteria.setter
+    def criteria(self, value):
+        for name, field in self.CRITERIA_FIELDS.items():
+            setattr(self, field, float((value or {}).get(name) or 0.0))
+
+class SkillTerm(models.Model):
+    """Canonical skill vocabulary (synonyms folded); the primary key is the term's bit position."""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Skill Terms'
+
+    def __str__(self):
+        return f"{self.name} (bit {self.id})"
+
+class SkillBitset(models.Model):
+    """Precomputed skill bitsets over SkillTerm ids for jobs and workers."""
+    ENTITY_TYPES = Embedding.ENTITY_TYPES
+    entity_type = models.CharField(max_length=10, choices=ENTITY_TYPES)
+    entity_id = models.PositiveIntegerField()
+    bits = models.BinaryField(default=bytes)  # Little-endian bytes of a Python int
+    term_count = models.PositiveIntegerField(default=0)  # Distinct canonical terms, including unmatched ones
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('entity_type', 'entity_id')
+        indexes = [
+            models.Index(fields=['entity_type', 'entity_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} {self.entity_id} ({self.term_count} terms)"
+
+    @property
+    def value(self):
+        return int.from_bytes(bytes(self.bits), 'little')
+
+class WorkerFeatureChange(models.Model):
+    """Workers edited since the last feature snapshot build; they are scored from the database."""
+    worker_id = models.PositiveIntegerField(unique=True)  # Not a FK: deletions must be recorded too
+    changed_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Worker {self.worker_id} changed at {self.changed_at}"
+
+class ShadowComparison(models.Model):
+    """A shadow engine's ranking and latency recorded next to the production engine's for one request."""
+    ENTITY_TYPES = Embedding.ENTITY_TYPES
+    entity_type = models.CharField(max_length=10, choices=ENTITY_TYPES)
+    entity_id = models.PositiveIntegerField()
+    engine = models.CharField(max_length=200)  # Dotted path of the shadow engine
+    # [[matched id, score], ...] best first
+    production_ranking = models.JSONField(default=list)
+    shadow_ranking = models.JSONField(default=list)
+    production_ms = models.FloatField()
+    shadow_ms = models.FloatField(null=True, blank=True)
+    production_partial = models.BooleanField(default=False)
+    shadow_partial = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['engine', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.engine} on {self.entity_type} {self.entity_id}"
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from apps.users.serializers import WorkerProfileSerializer
 from apps.jobs.serializers import JobSerializer
+from core.serializers import ExpandableFieldsMixin
 from .models import MatchResult
 
 class MatchResultSerializer(serializers.ModelSerializer):
@@ -11,4 +12,51 @@ class MatchResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = MatchResult
         fields = ['id', 'job', 'worker', 'score', 'criteria', 'created_at']
-        read_only_fields = ['id', 'job', 'worker', 'score', 'criteria', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'job', 'worker', 'score', 'criteria', 'created_at']
+
+class RecommendationSerializer(ExpandableFieldsMixin, serializers.ModelSerializer):
+    """Compact recommendation: ids and headline fields, with ?expand=job,worker for nested objects
+    (and e.g. job.applications for the job's own expansions)."""
+    job_title = serializers.CharField(source='job.title', read_only=True)
+    job_location = serializers.CharField(source='job.location', read_only=True)
+    job_category = serializers.CharField(source='job.category.name', read_only=True, default=None)
+    job_status = serializers.CharField(source='job.status', read_only=True)
+    worker_name = serializers.SerializerMethodField()
+    worker_location = serializers.CharField(source='worker.location', read_only=True)
+    criteria = serializers.JSONField(read_only=True)
+
+    class Meta:
+        model = MatchResult
+        fields = [
+            'id', 'job_id', 'job_title', 'job_location', 'job_category', 'job_status',
+            'worker_id', 'worker_name', 'worker_location', 'score', 'criteria', 'created_at'
+        ]
+        read_only_fields = fields
+        expandable_fields = {
+            'job': (JobSerializer, {}),
+            'worker': (WorkerProfileSerializer, {}),
+        }
+
+    def get_worker_name(self, obj):
+        # Defensive: Return None if related user does not exist
+        try:
+            user = obj.worker.user
+        except Exception:
+            return None
+        return f"{user.first_name} {user.last_name}".strip()
+
+    @staticmethod
+    def setup_eager_loading(queryset, expand=()):
+        """Load everything the requested representation needs in a fixed number of queries."""
+        queryset = queryset.select_related('job__category', 'worker__user')
+        if 'job' in expand:
+            job_expand = {name[len('job.'):] for name in expand if name.startswith('job.')}
+            queryset = JobSerializer.setup_eager_loading(queryset, job_expand, prefix='job__')
+        if 'worker' in expand:
+            queryset = queryset.prefetch_related(
+                'worker__educations', 'worker__skills', 'worker__target_jobs'
+            )
+        return queryset
+
+class BatchRecommendationRequestSerializer(serializers.Serializer):
+    job_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=50)
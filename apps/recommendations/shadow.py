@@ -0,0 +1,128 @@
+"""Shadow-mode comparison of a candidate match engine against the production MatchEngine.
+
+With ``SHADOW_ENGINE`` set to the dotted path of a MatchEngine-compatible class and
+``SHADOW_SAMPLE_RATE`` to a fraction of requests, sampled recommendation cache misses
+are re-run through the candidate engine on the background pool. Both rankings and
+latencies are stored as ShadowComparison rows and summarised by ``shadow_report``.
+"""
+import logging
+import random
+import time
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from apps.jobs.models import Job
+from apps.users.models import Worker
+from .feeds import MATCH_TIME_BUDGET, run_in_background
+from .models import ShadowComparison
+
+logger = logging.getLogger(__name__)
+
+# Entity type -> key of the matched object in each result dict
+RANKED_KEYS = {'job': 'worker', 'worker': 'job'}
+PERCENTILES = (50, 95, 99)
+
+
+def ranking(entity_type, results):
+    """[[matched id, score], ...] in result order."""
+    key = RANKED_KEYS[entity_type]
+    return [[result[key].id, round(float(result['score']), 6)] for result in results]
+
+
+def sample(entity_type, entity_id, results):
+    """Queue a shadow run next to a freshly computed production result, for a
+    SHADOW_SAMPLE_RATE fraction of calls. Returns whether one was queued."""
+    engine = getattr(settings, 'SHADOW_ENGINE', '')
+    rate = getattr(settings, 'SHADOW_SAMPLE_RATE', 0)
+    if not engine or not rate or results is None or results.duration is None:
+        return False
+    if random.random() >= rate:
+        return False
+    try:
+        run_in_background(
+            run_shadow, entity_type, entity_id, engine,
+            ranking(entity_type, results), results.duration * 1000, results.partial
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing shadow run for {entity_type} {entity_id}: {str(e)}")
+        return False
+
+
+def run_shadow(entity_type, entity_id, engine_path, production_ranking, production_ms, production_partial):
+    """Run the shadow engine under the production time budget and record it beside the production result."""
+    if entity_type == 'job':
+        entity = Job.objects.filter(id=entity_id).select_related('category').first()
+    else:
+        entity = Worker.objects.filter(id=entity_id).select_related('user').first()
+    if entity is None:
+        return None
+
+    comparison = ShadowComparison(
+        entity_type=entity_type, entity_id=entity_id, engine=engine_path,
+        production_ranking=production_ranking, production_ms=production_ms,
+        production_partial=production_partial,
+    )
+    try:
+        engine = import_string(engine_path)
+        started = time.perf_counter()
+        if entity_type == 'job':
+            results = engine.match_job_to_workers(entity, MATCH_TIME_BUDGET)
+        else:
+            results = engine.match_worker_to_jobs(entity, MATCH_TIME_BUDGET)
+        comparison.shadow_ms = (time.perf_counter() - started) * 1000
+        comparison.shadow_ranking = ranking(entity_type, results[:len(production_ranking) or 10])
+        comparison.shadow_partial = bool(getattr(results, 'partial', False))
+    except Exception as e:
+        logger.error(f"Error running shadow engine {engine_path} for {entity_type} {entity_id}: {str(e)}")
+        comparison.error = str(e)
+    comparison.save()
+    return comparison
+
+
+def rank_overlap(production, shadow, k):
+    """Share of the top-k ids the two rankings have in common (1.0 when both are empty)."""
+    production_ids = {item[0] for item in production[:k]}
+    shadow_ids = {item[0] for item in shadow[:k]}
+    size = max(len(production_ids), len(shadow_ids))
+    return len(production_ids & shadow_ids) / size if size else 1.0
+
+
+def score_drift(production, shadow):
+    """Shadow minus production score for every id ranked by both."""
+    production_scores = dict(map(tuple, production))
+    return [score - production_scores[item_id] for item_id, score in shadow if item_id in production_scores]
+
+
+def summarize(comparisons, k=10):
+    """Rank overlap, score drift and latency percentiles over ShadowComparison rows."""
+    comparisons = list(comparisons)
+    succeeded = [c for c in comparisons if not c.error]
+    drift = np.array([d for c in succeeded for d in score_drift(c.production_ranking, c.shadow_ranking)])
+    overlap = np.array([rank_overlap(c.production_ranking, c.shadow_ranking, k) for c in succeeded])
+    top_match = [
+        bool(c.production_ranking) and bool(c.shadow_ranking)
+        and c.production_ranking[0][0] == c.shadow_ranking[0][0]
+        for c in succeeded
+    ]
+
+    def percentiles(values):
+        values = np.array(values, dtype=float)
+        return {p: float(np.percentile(values, p)) if len(values) else None for p in PERCENTILES}
+
+    return {
+        'runs': len(comparisons),
+        'errors': len(comparisons) - len(succeeded),
+        'overlap_mean': float(overlap.mean()) if len(overlap) else None,
+        'overlap_min': float(overlap.min()) if len(overlap) else None,
+        'top_match_rate': sum(top_match) / len(top_match) if top_match else None,
+        'drift_mean': float(drift.mean()) if len(drift) else None,
+        'drift_abs_mean': float(np.abs(drift).mean()) if len(drift) else None,
+        'drift_abs_max': float(np.abs(drift).max()) if len(drift) else None,
+        'production_ms': percentiles([c.production_ms for c in comparisons]),
+        'shadow_ms': percentiles([c.shadow_ms for c in succeeded]),
+        'production_partial': sum(c.production_partial for c in comparisons),
+        'shadow_partial': sum(c.shadow_partial for c in succeeded),
+    }
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.apps import apps
 import logging
@@ -15,9 +15,61 @@ def invalidate_job_matches(sender, instance, **kwargs):
     except Exception as e:
         logger.error(f"Error invalidating MatchResult for job {instance.id}: {str(e)}")
 
+@receiver(post_save, sender='jobs.Job')
+def refresh_job_skill_bitset(sender, instance, **kwargs):
+    """Recompute the job's skill bitset when a Job is saved."""
+    try:
+        from .skills import refresh_job_bitset
+        refresh_job_bitset(instance)
+    except Exception as e:
+        logger.error(f"Error refreshing skill bitset for job {instance.id}: {str(e)}")
+
+@receiver(post_save, sender='users.Skill')
+@receiver(post_delete, sender='users.Skill')
+def refresh_worker_skill_bitset(sender, instance, **kwargs):
+    """Recompute the worker's skill bitset when one of their skills changes."""
+    try:
+        from .skills import refresh_worker_bitset
+        Worker = apps.get_model('users', 'Worker')
+        worker = Worker.objects.filter(id=instance.worker_id).first()
+        if worker is not None:  # Skills are also deleted when their worker is
+            refresh_worker_bitset(worker)
+    except Exception as e:
+        logger.error(f"Error refreshing skill bitset for worker {instance.worker_id}: {str(e)}")
+
+@receiver(post_delete, sender='jobs.Job')
+@receiver(post_delete, sender='users.Worker')
+def delete_skill_bitset(sender, instance, **kwargs):
+    """Drop the stored skill bitset of a deleted Job or Worker."""
+    try:
+        SkillBitset = apps.get_model('recommendations', 'SkillBitset')
+        entity_type = 'job' if sender._meta.model_name == 'job' else 'worker'
+        SkillBitset.objects.filter(entity_type=entity_type, entity_id=instance.id).delete()
+    except Exception as e:
+        logger.error(f"Error deleting skill bitset for {sender._meta.model_name} {instance.id}: {str(e)}")
+
+@receiver(post_save, sender='recommendations.SkillSynonym')
+@receiver(post_delete, sender='recommendations.SkillSynonym')
+def invalidate_skill_bitsets(sender, instance, **kwargs):
+    """Synonym changes alter canonical terms, so every stored bitset is stale."""
+    try:
+        from .skills import vocabulary
+        SkillBitset = apps.get_model('recommendations', 'SkillBitset')
+        vocabulary.clear()
+        SkillBitset.objects.all().delete()
+        logger.info(f"Invalidated skill bitsets due to synonym change for {instance.skill}")
+    except Exception as e:
+        logger.error(f"Error invalidating skill bitsets: {str(e)}")
+
+# Worker fields whose change leaves cached matches usable: activity only shifts tie-breaks,
+# and the feature snapshot's delta overlay still picks it up
+ACTIVITY_FIELDS = frozenset({'last_activity'})
+
 @receiver(post_save, sender='users.Worker')
-def invalidate_worker_matches(sender, instance, **kwargs):
+def invalidate_worker_matches(sender, instance, update_fields=None, **kwargs):
     """Invalidate MatchResult entries when a Worker is updated."""
+    if update_fields and ACTIVITY_FIELDS.issuperset(update_fields):
+        return
     try:
         MatchResult = apps.get_model('recommendations', 'MatchResult')
         MatchResult.objects.filter(worker=instance).delete()
@@ -51,4 +103,69 @@ try:
                 except Exception as e:
                     logger.error(f"Error invalidating MatchResult for worker {instance.id}: {str(e)}")
 except Exception as e:
-    logger.warning(f"Could not set up m2m_changed signal for Worker.target_jobs: {str(e)}")
\ No newline at end of file
+    logger.warning(f"Could not set up m2m_changed signal for Worker.target_jobs: {str(e)}")
+
+@receiver(post_save, sender='users.Worker')
+@receiver(post_delete, sender='users.Worker')
+def record_worker_feature_change(sender, instance, **kwargs):
+    """Route an edited or deleted Worker through the feature snapshot's delta overlay."""
+    try:
+        from .feature_snapshot import record_worker_change
+        record_worker_change(instance.id)
+    except Exception as e:
+        logger.error(f"Error recording feature change for worker {instance.id}: {str(e)}")
+
+@receiver(post_save, sender='users.Skill')
+@receiver(post_delete, sender='users.Skill')
+@receiver(post_save, sender='users.Education')
+@receiver(post_delete, sender='users.Education')
+@receiver(post_save, sender='users.TargetJob')
+@receiver(post_delete, sender='users.TargetJob')
+@receiver(post_save, sender='jobs.Feedback')
+@receiver(post_save, sender='jobs.ClientFeedback')
+def record_worker_related_feature_change(sender, instance, **kwargs):
+    """Route a Worker whose skills, education, target jobs or ratings changed through the delta overlay."""
+    try:
+        from .feature_snapshot import record_worker_change
+        record_worker_change(instance.worker_id)
+    except Exception as e:
+        logger.error(f"Error recording feature change for worker {instance.worker_id}: {str(e)}")
+
+
+@receiver(post_save, sender='users.Worker')
+@receiver(post_save, sender='users.TargetJob')
+@receiver(post_delete, sender='users.TargetJob')
+@receiver(post_save, sender='users.User')
+def refresh_worker_matchable(sender, instance, **kwargs):
+    """Keep Worker.is_matchable in sync with account state and availability."""
+    try:
+        from .feature_snapshot import record_worker_change
+        Worker = apps.get_model('users', 'Worker')
+        if sender is Worker:
+            worker_ids = [instance.id]
+        elif sender._meta.model_name == 'targetjob':
+            worker_ids = [instance.worker_id]
+        else:
+            worker_ids = list(Worker.objects.filter(user=instance).values_list('id', flat=True))
+        for worker_id in Worker.refresh_matchable(worker_ids):
+            record_worker_change(worker_id)
+    except Exception as e:
+        logger.error(f"Error refreshing matchable flag for {sender._meta.model_name} {instance.pk}: {str(e)}")
+
+@receiver(pre_save, sender='jobs.Job')
+@receiver(pre_save, sender='users.Worker')
+def resolve_place(sender, instance, update_fields=None, **kwargs):
+    """Normalize the free-text location to a gazetteer Location on write."""
+    if update_fields is not None and 'location' not in update_fields:
+        return
+    try:
+        from .gazetteer import resolve_location
+        instance.place_id = resolve_location(instance.location)
+    except Exception as e:
+        logger.error(f"Error resolving location for {sender._meta.model_name} {instance.id}: {str(e)}")
+
+@receiver(post_save, sender='recommendations.Location')
+@receiver(post_delete, sender='recommendations.Location')
+def invalidate_location_index(sender, instance, **kwargs):
+    from .gazetteer import location_index
+    location_index.clear()
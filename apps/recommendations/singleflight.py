@@ -0,0 +1,81 @@
+"""Cross-process single-flight for recommendation cache misses.
+
+Concurrent misses for the same (entity type, id, engine version) serialize on an
+flock'd file under ``settings.SINGLE_FLIGHT_LOCK_DIR``: the first caller computes,
+the rest wait for it and then find the result cached. flock works between
+threads too, because every call opens its own file description. The leader removes
+the file before unlocking, so the directory only holds keys in flight.
+"""
+import fcntl
+import logging
+import os
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a follower waits for the leader before giving up
+WAIT_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+
+class SingleFlightTimeout(Exception):
+    """Another request is still computing the same result."""
+
+
+def lock_path(entity_type, entity_id):
+    from .utils import MatchEngine
+    return os.path.join(settings.SINGLE_FLIGHT_LOCK_DIR, f"{entity_type}-{entity_id}-v{MatchEngine.VERSION}.lock")
+
+
+def _acquire(path, deadline, entity_type, entity_id):
+    """The lock file at ``path``, opened and flock'd, or SingleFlightTimeout."""
+    while True:
+        lock = open(path, 'a')
+        try:
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise SingleFlightTimeout(f"{entity_type} {entity_id} is being computed")
+                    time.sleep(POLL_INTERVAL)
+            # The previous holder unlinks the file before releasing it; a lock on that
+            # orphan excludes nobody who opens the path afresh, so start over
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            held = os.fstat(lock.fileno())
+            if current is not None and (current.st_dev, current.st_ino) == (held.st_dev, held.st_ino):
+                return lock
+        except BaseException:
+            lock.close()
+            raise
+        lock.close()
+
+
+def single_flight(entity_type, entity_id, compute, is_ready, timeout=WAIT_TIMEOUT):
+    """Run ``compute`` unless ``is_ready``, with at most one computation per key at a time.
+
+    Returns what ``compute`` returned, or None if the result was already there.
+    Raises SingleFlightTimeout if the lock is still held after ``timeout`` seconds.
+    The lock file is removed on release, so keys never seen again leave nothing behind.
+    """
+    path = lock_path(entity_type, entity_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock = _acquire(path, time.monotonic() + timeout, entity_type, entity_id)
+    try:
+        # A leader may have finished while we waited
+        if is_ready():
+            return None
+        return compute()
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
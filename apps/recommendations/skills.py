@@ -0,0 +1,217 @@
+"""Skill vocabulary and bitset encoding used for skill-overlap scoring.
+
+Every canonical skill (after synonym folding) gets a SkillTerm whose id is its bit
+position. Jobs and workers store the OR of their term bits in SkillBitset, so the
+skill criterion is a popcount of an AND with no string work at match time.
+
+Only listed job skills and worker skills become terms. Description keywords count
+towards a job's term total but only take the bit of a term that already exists, so
+free text never widens the bitsets; a job's bitset is recomputed when a new term
+appears in its description.
+"""
+from collections import namedtuple
+import re
+import threading
+import time
+import logging
+
+from django.db.models import Count, Max
+
+from .models import SkillSynonym, SkillTerm, SkillBitset
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a reading process checks for synonyms changed by other processes;
+# bitset writes always check first
+VOCABULARY_TTL = 300
+MAX_TERM_LENGTH = SkillTerm._meta.get_field('name').max_length
+
+Bitset = namedtuple('Bitset', ['bits', 'term_count'])
+EMPTY_BITSET = Bitset(0, 0)
+
+
+def normalize_skill(name):
+    return re.sub(r'\s+', ' ', (name or '').lower().strip())[:MAX_TERM_LENGTH]
+
+
+class SkillVocabulary:
+    """Process-local cache of synonym folding and canonical term ids."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._version = None
+        self._canonical = {}
+        self._term_ids = {}
+
+    def clear(self):
+        with self._lock:
+            self._loaded_at = None
+            self._version = None
+
+    @staticmethod
+    def _synonyms_version():
+        stats = SkillSynonym.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+        return stats['count'], stats['updated']
+
+    def _ensure_loaded(self, check=False):
+        if not check and self._loaded_at is not None and time.monotonic() - self._loaded_at < VOCABULARY_TTL:
+            return
+        with self._lock:
+            version = self._synonyms_version()
+            if version == self._version:
+                self._loaded_at = time.monotonic()
+                return
+            canonical = {}
+            for skill, synonyms in SkillSynonym.objects.values_list('skill', 'synonyms'):
+                name = normalize_skill(skill)
+                canonical[name] = name
+                for synonym in synonyms or []:
+                    canonical.setdefault(normalize_skill(synonym), name)
+            self._canonical = canonical
+            self._term_ids = dict(SkillTerm.objects.values_list('name', 'id'))
+            self._version = version
+            self._loaded_at = time.monotonic()
+
+    def sync(self):
+        """Reload now if another process changed the synonyms; call before storing bitsets."""
+        self._ensure_loaded(check=True)
+
+    def canonical(self, name):
+        """Fold a skill name onto its canonical synonym."""
+        self._ensure_loaded()
+        name = normalize_skill(name)
+        return self._canonical.get(name, name)
+
+    def canonical_terms(self, names):
+        terms = {self.canonical(name) for name in names}
+        terms.discard('')
+        return terms
+
+    def spellings(self, terms):
+        """Every known name that folds onto one of the canonical ``terms``, the terms included."""
+        self._ensure_loaded()
+        terms = set(terms)
+        return terms | {name for name, term in self._canonical.items() if term in terms}
+
+    def term_ids(self, names):
+        """Ids of the canonical terms for ``names``, adding unknown terms to the vocabulary."""
+        terms = self.canonical_terms(names)
+        missing = terms - self._term_ids.keys()
+        if missing:
+            existing = set(SkillTerm.objects.filter(name__in=missing).values_list('name', flat=True))
+            SkillTerm.objects.bulk_create([SkillTerm(name=name) for name in missing - existing], ignore_conflicts=True)
+            created = dict(SkillTerm.objects.filter(name__in=missing).values_list('name', 'id'))
+            with self._lock:
+                self._term_ids.update(created)
+            if missing - existing:
+                invalidate_keyword_bitsets(missing - existing)
+        return {self._term_ids[term] for term in terms}
+
+    def known_term_ids(self, names):
+        """Ids of the canonical terms for ``names`` that are already in the vocabulary."""
+        terms = self.canonical_terms(names)
+        missing = terms - self._term_ids.keys()
+        if missing:
+            found = dict(SkillTerm.objects.filter(name__in=missing).values_list('name', 'id'))
+            with self._lock:
+                self._term_ids.update(found)
+        return {self._term_ids[term] for term in terms if term in self._term_ids}
+
+
+vocabulary = SkillVocabulary()
+
+
+def to_bits(term_ids):
+    bits = 0
+    for term_id in term_ids:
+        bits |= 1 << term_id
+    return bits
+
+
+def encode_bits(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def overlap_score(job_bitset, worker_bitset):
+    """Share of the job's canonical skill terms that the worker has."""
+    if not job_bitset.term_count:
+        return 0.0
+    return (job_bitset.bits & worker_bitset.bits).bit_count() / job_bitset.term_count
+
+
+def job_skill_names(job):
+    """Listed job skills and the top description keywords, as the matcher has always used."""
+    from .utils import MatchEngine
+    listed = [s for s in job.skills.split(',') if s.strip()]
+    return listed, MatchEngine.extract_keywords(job.description)[:5]
+
+
+def worker_skill_names(worker):
+    return [skill.name for skill in worker.skills.all()]
+
+
+def _save(entity_type, entity_id, bitset):
+    SkillBitset.objects.update_or_create(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        defaults={'bits': encode_bits(bitset.bits), 'term_count': bitset.term_count}
+    )
+    return bitset
+
+
+def invalidate_keyword_bitsets(names):
+    """Drop job bitsets whose description may hold a newly added term as a keyword.
+
+    Keywords are single words, so only single-word spellings of the terms qualify; the jobs
+    holding them come from the search index (FULLTEXT on MySQL, postings elsewhere), a
+    superset of those with the word among their description keywords.
+    """
+    from apps.jobs.search import jobs_with_terms
+    from .utils import MatchEngine
+    words = [name for name in vocabulary.spellings(names) if MatchEngine.extract_keywords(name) == [name]]
+    if words:
+        SkillBitset.objects.filter(entity_type='job', entity_id__in=jobs_with_terms(words)).delete()
+
+
+def refresh_job_bitset(job):
+    vocabulary.sync()
+    listed, keywords = job_skill_names(job)
+    term_ids = vocabulary.term_ids(listed) | vocabulary.known_term_ids(keywords)
+    term_count = len(vocabulary.canonical_terms(listed + keywords))
+    return _save('job', job.id, Bitset(to_bits(term_ids), term_count))
+
+
+def refresh_worker_bitset(worker):
+    vocabulary.sync()
+    term_ids = vocabulary.term_ids(worker_skill_names(worker))
+    return _save('worker', worker.id, Bitset(to_bits(term_ids), len(term_ids)))
+
+
+def _load(entity_type, objects, refresh):
+    """Stored bitsets keyed by object id, computing (and storing) any that are missing."""
+    objects = list(objects)
+    stored = {
+        row.entity_id: Bitset(row.value, row.term_count)
+        for row in SkillBitset.objects.filter(entity_type=entity_type, entity_id__in=[o.id for o in objects])
+    }
+    for obj in objects:
+        if obj.id not in stored:
+            stored[obj.id] = refresh(obj)
+    return stored
+
+
+def get_job_bitsets(jobs):
+    return _load('job', jobs, refresh_job_bitset)
+
+
+def get_worker_bitsets(workers):
+    return _load('worker', workers, refresh_worker_bitset)
+
+
+def get_job_bitset(job):
+    return get_job_bitsets([job])[job.id]
+
+
+def get_worker_bitset(worker):
+    return get_worker_bitsets([worker])[worker.id]
@@ -0,0 +1,566 @@
+from io import StringIO
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.jobs.models import Category, Job, JobApplication
+from apps.users.models import Client, Education, Skill, TargetJob, User, Worker
+from . import embedding_store, evaluation, feature_snapshot, feeds, gazetteer, market, skills, views
+from .models import Embedding, MatchResult, SkillBitset, SkillSynonym
+from .singleflight import SingleFlightTimeout, lock_path, single_flight
+from .skills import vocabulary
+from .utils import MatchEngine
+
+
+class RecommendationQueryCountTests(TestCase):
+    """A cached 10-item recommendation list costs the same number of queries however it is expanded.
+
+    The job has more cached matches than that, as after a market pass; only the best 10 are served.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        cls.client_user = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=cls.client_user)
+        cls.job = Job.objects.create(
+            client=cls.client_user, title='Fix a leak', location='Adama', skills='pipe,drain',
+            description='Kitchen sink leaks', category=category, payment_method='cash'
+        )
+        workers = []
+        for i in range(15):
+            user = User.objects.create(username=f'worker{i}', email=f'worker{i}@example.com')
+            worker = Worker.objects.create(user=user, location='Adama')
+            Skill.objects.create(worker=worker, name='pipe', level='mid')
+            TargetJob.objects.create(worker=worker, job_title='Plumbing', level='mid')
+            Education.objects.create(
+                worker=worker, institute_name='TVET', level_of_study='certificate', field_of_study='plumbing',
+                country='ET', city='Adama', graduation_month='May', graduation_year=2020
+            )
+            workers.append(worker)
+        # Created last: saving workers and their profiles invalidates stored matches
+        MatchResult.objects.bulk_create([
+            MatchResult(job=cls.job, worker=worker, score=1 - i / 20) for i, worker in enumerate(workers)
+        ])
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def get(self, query, queries):
+        with self.assertNumQueries(queries):
+            response = self.api.get(f'/recommendations/jobs/{self.job.id}/workers/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual([row['score'] for row in response.data], [1 - i / 20 for i in range(10)])
+        return response
+
+    def test_compact(self):
+        response = self.get('', 4)
+        self.assertNotIn('job', response.data[0])
+
+    def test_expanded(self):
+        response = self.get('?expand=job,worker', 7)
+        self.assertEqual(response.data[0]['job']['id'], self.job.id)
+        self.assertEqual(len(response.data[0]['worker']['skills']), 1)
+
+
+class BackgroundCompletionTests(TestCase):
+    """Partial lists are completed once, in the background, and cached lists survive logins."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        cls.job = Job.objects.create(
+            client=client, title='Fix a leak', location='Adama', skills='pipe',
+            description='Kitchen sink leaks', category=category, payment_method='cash'
+        )
+        user = User.objects.create(username='worker', email='worker@example.com')
+        cls.worker = Worker.objects.create(user=user, location='Adama')
+        MatchResult.objects.create(job=cls.job, worker=cls.worker, score=0.5)
+
+    def setUp(self):
+        self.addCleanup(feeds.mark_partial, 'job', self.job.id, False)
+
+    def test_complete_list_is_not_rebuilt(self):
+        feeds.mark_partial('job', self.job.id, False)
+        with mock.patch.object(feeds, 'build_job_matches') as build:
+            feeds.complete_job_matches(self.job.id)
+        build.assert_not_called()
+
+    def test_partial_list_is_completed_within_a_budget(self):
+        feeds.mark_partial('job', self.job.id, True)
+        with mock.patch.object(feeds, 'build_job_matches') as build:
+            feeds.complete_job_matches(self.job.id)
+        build.assert_called_once_with(self.job, feeds.BACKGROUND_TIME_BUDGET, complete_later=False)
+
+    def test_completion_clears_the_mark(self):
+        feeds.mark_partial('job', self.job.id, True)
+        with mock.patch.object(feeds, 'run_in_background') as queue:
+            feeds.complete_job_matches(self.job.id)
+        queue.assert_not_called()
+        self.assertTrue(feeds.is_complete('job', self.job.id, feeds.cached_job_matches(self.job)))
+
+    def test_activity_keeps_matches(self):
+        self.worker.save(update_fields=['last_activity'])
+        self.assertTrue(MatchResult.objects.filter(worker=self.worker).exists())
+        self.worker.save()
+        self.assertFalse(MatchResult.objects.filter(worker=self.worker).exists())
+
+
+class CandidateParityTests(TestCase):
+    """The feature snapshot and the market pass pick the same candidates, with the same scores,
+    as the database path."""
+
+    SKILLS = ['plumbing', 'pipe fitting', 'drain', 'wiring', 'figma', 'design']
+    LOCATIONS = ['Adama', 'Bahir Dar', 'Hawassa']
+
+    @classmethod
+    def setUpTestData(cls):
+        # Synonyms fold both ways: "pipe fitting" jobs match "plumbing" workers and vice versa
+        SkillSynonym.objects.create(skill='plumbing', synonyms=['pipe fitting', 'drain'])
+        SkillSynonym.objects.create(skill='design', synonyms=['figma'])
+        vocabulary.clear()
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        categories = [Category.objects.create(name=name) for name in ('Plumbing', 'Design')]
+        for i in range(24):
+            user = User.objects.create(username=f'worker{i}', email=f'worker{i}@example.com', is_verified=True)
+            worker = Worker.objects.create(user=user, location=cls.LOCATIONS[i % 3], has_experience=bool(i % 2))
+            Skill.objects.create(worker=worker, name=cls.SKILLS[i % 6], level='mid')
+            TargetJob.objects.create(worker=worker, job_title=categories[i % 2].name, level='mid')
+        cls.jobs = [
+            Job.objects.create(
+                client=client, title=f'Job {i}', location=cls.LOCATIONS[i % 3],
+                skills=cls.SKILLS[i % 6], description='Small repair', category=categories[i % 2],
+                payment_method='cash'
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        vocabulary.clear()
+
+    @staticmethod
+    def ranking(results):
+        return sorted((r['worker'].id, round(float(r['score']), 4)) for r in results)
+
+    def database_ranking(self, job):
+        weights = MatchEngine.get_weights(job.category)
+        return self.ranking(MatchEngine.score_workers(job, MatchEngine.candidate_workers(job), weights))
+
+    def test_snapshot_matches_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'features.bin')
+            feature_snapshot.build_snapshot(path)
+            snapshot = feature_snapshot.FeatureSnapshot(path)
+            for job in self.jobs:
+                weights = MatchEngine.get_weights(job.category)
+                with self.subTest(job=job.title, skills=job.skills):
+                    self.assertEqual(
+                        self.ranking(feature_snapshot.match_job(snapshot, job, weights, limit=100)),
+                        self.database_ranking(job)
+                    )
+
+    def test_batch_candidates_match_database(self):
+        vocabulary.canonical('')
+        with self.assertNumQueries(1):
+            batch = MatchEngine.batch_candidate_ids(self.jobs, budget=0)
+        self.assertEqual(batch, {job.id: MatchEngine.candidate_ids(job, budget=0) for job in self.jobs})
+        # Over budget, each job is sampled as it would be alone
+        self.assertEqual(
+            MatchEngine.batch_candidate_ids(self.jobs, budget=5),
+            {job.id: MatchEngine.candidate_ids(job, budget=5) for job in self.jobs}
+        )
+
+    def test_market_matches_database(self):
+        matches = market.match_jobs(self.jobs, k=100)
+        for job in self.jobs:
+            with self.subTest(job=job.title, skills=job.skills):
+                self.assertFalse(matches[job.id].partial)
+                self.assertEqual(self.ranking(matches[job.id]), self.database_ranking(job))
+
+
+class KeywordInvalidationTests(TestCase):
+    """A new vocabulary term drops only the bitsets of jobs that mention it, found through
+    the search index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SkillSynonym.objects.create(skill='welding', synonyms=['soldering'])
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        category = Category.objects.create(name='Metalwork')
+        cls.soldering, cls.welding, cls.other = [
+            Job.objects.create(
+                client=client, title=f'Job {i}', location='Adama', skills='metal',
+                description=description, category=category, payment_method='cash'
+            )
+            for i, description in enumerate(['Soldering copper pipes', 'Welding a gate', 'Painting a fence'])
+        ]
+
+    def setUp(self):
+        vocabulary.clear()
+        self.addCleanup(vocabulary.clear)
+
+    def test_only_jobs_with_the_term(self):
+        jobs = [self.soldering, self.welding, self.other]
+        skills.get_job_bitsets(jobs)
+        with CaptureQueriesContext(connection) as queries:
+            vocabulary.term_ids(['Welding'])
+        self.assertFalse(any('description' in query['sql'] for query in queries))
+        # The synonym folds onto the new term too
+        self.assertEqual(
+            set(SkillBitset.objects.filter(entity_type='job').values_list('entity_id', flat=True)), {self.other.id}
+        )
+        bitsets = skills.get_job_bitsets(jobs)
+        welding = skills.to_bits(vocabulary.known_term_ids(['welding']))
+        self.assertEqual(bitsets[self.soldering.id].bits & welding, welding)
+        self.assertEqual(bitsets[self.welding.id].bits & welding, welding)
+
+    def test_multi_word_terms_are_never_keywords(self):
+        skills.get_job_bitsets([self.soldering, self.welding, self.other])
+        vocabulary.term_ids(['copper pipes'])
+        self.assertEqual(SkillBitset.objects.filter(entity_type='job').count(), 3)
+
+
+class LocationSimilarityTests(TestCase):
+    """Resolved places never rank below a location that cannot be resolved."""
+
+    @classmethod
+    def setUpTestData(cls):
+        gazetteer.load_gazetteer()
+        # The process-wide index would otherwise outlive the rolled-back rows
+        cls.addClassCleanup(gazetteer.location_index.clear)
+
+    def setUp(self):
+        gazetteer.location_index.clear()
+
+    def test_ordering(self):
+        # Job in Addis Ababa: itself, a sub-city, ~45 km, ~75 km, ~200 km, and unresolvable
+        names = ['Addis Ababa', 'Bole', 'Bishoftu', 'Adama', 'Hawassa', 'Nowhere Town', '']
+        scores = [MatchEngine.compute_location_similarity('Addis Ababa', name) for name in names]
+        same, sub_location, nearby, far, beyond, unknown, empty = scores
+        self.assertEqual((same, sub_location), (1.0, 0.9))
+        self.assertGreater(sub_location, nearby)
+        self.assertGreater(nearby, far)
+        self.assertGreater(far, unknown)
+        self.assertEqual(beyond, gazetteer.UNKNOWN_LOCATION_SCORE)
+        self.assertEqual(unknown, empty)
+        self.assertEqual(unknown, gazetteer.UNKNOWN_LOCATION_SCORE)
+        self.assertEqual(list(feature_snapshot.location_scores('Addis Ababa', names)), scores)
+
+
+class EmbeddingStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = embedding_store.EmbeddingStore(directory.name)
+
+    def vector(self, *keywords):
+        return embedding_store.keyword_vector(keywords)
+
+    def test_put_get(self):
+        self.assertIsNone(self.store.get('job', 1))
+        self.assertTrue(self.store.put('job', 1, self.vector('plumbing', 'drain')))
+        self.assertFalse(self.store.put('job', 1, self.vector('drain', 'plumbing')))
+        self.assertTrue(self.store.put('job', 1, self.vector('wiring')))
+        self.store.put('worker', 1, self.vector('figma'))
+        np.testing.assert_array_equal(self.store.get('job', 1), self.vector('wiring'))
+        np.testing.assert_array_equal(self.store.get('worker', 1), self.vector('figma'))
+        # Another process's appends are visible to this reader
+        other = embedding_store.EmbeddingStore(self.store.root)
+        other.put('job', 2, self.vector('design'))
+        np.testing.assert_array_equal(self.store.get('job', 2), self.vector('design'))
+
+    def test_compact(self):
+        for i in range(3):
+            self.store.put('job', 1, self.vector(f'term{i}'))
+        self.store.put('worker', 1, self.vector('figma'))
+        self.assertEqual(self.store.compact(), (2, 2))
+        self.assertEqual(embedding_store._read_current(self.store.root), 'g1')
+        np.testing.assert_array_equal(self.store.get('job', 1), self.vector('term2'))
+        np.testing.assert_array_equal(self.store.get('worker', 1), self.vector('figma'))
+        self.assertEqual(self.store.compact(), (2, 0))
+
+    def test_read_during_compaction(self):
+        expected = {i: self.vector(f'term{i}', 'shared') for i in range(200)}
+        for i, vector in expected.items():
+            self.store.put('worker', i, self.vector('stale'))
+            self.store.put('worker', i, vector)
+        errors, done = [], threading.Event()
+
+        def read():
+            reader = embedding_store.EmbeddingStore(self.store.root)
+            while not done.is_set():
+                for i, vector in expected.items():
+                    try:
+                        np.testing.assert_array_equal(reader.get('worker', i), vector)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        try:
+            for _ in range(5):
+                self.store.compact()
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_record_past_mapped_data(self):
+        self.store.put('job', 1, self.vector('plumbing'))
+        stale = self.store._load()
+        self.store.put('job', 2, self.vector('wiring'))
+        self.store._load()  # Extends the offsets stale shares, and maps the grown data
+        with mock.patch.object(self.store, '_load', return_value=stale):
+            np.testing.assert_array_equal(self.store.get('job', 2), self.vector('wiring'))
+
+
+class StoreEmbeddingsTests(TestCase):
+    """Matching rewrites an entity's Embedding row only when its keywords change."""
+
+    def check_writes(self):
+        texts = {1: 'Plumbing repair, kitchen drain', 2: 'Electrical wiring'}
+        self.assertEqual(MatchEngine.store_embeddings('job', texts), 2)
+        with self.assertNumQueries(1 if embedding_store.get_store() is None else 0):
+            self.assertEqual(MatchEngine.store_embeddings('job', texts), 0)
+        texts[2] = 'Electrical wiring and lighting'
+        self.assertEqual(MatchEngine.store_embeddings('job', texts), 1)
+        self.assertEqual(Embedding.objects.filter(entity_type='job').count(), 2)
+        np.testing.assert_array_equal(
+            MatchEngine.load_keyword_vectors('job', [2])[2],
+            embedding_store.keyword_vector(['electrical', 'wiring', 'lighting'])
+        )
+
+    def test_database(self):
+        with override_settings(EMBEDDING_BACKEND='db'):
+            self.check_writes()
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(EMBEDDING_BACKEND='mmap', EMBEDDING_STORE_PATH=directory):
+            self.check_writes()
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        lock_dir = override_settings(SINGLE_FLIGHT_LOCK_DIR=directory.name)
+        lock_dir.enable()
+        self.addCleanup(lock_dir.disable)
+        self.directory = directory.name
+
+    def test_leader_and_follower(self):
+        computing, release, done = threading.Event(), threading.Event(), []
+
+        def compute():
+            computing.set()
+            release.wait(5)
+            done.append(True)
+            return 'result'
+
+        results = {}
+        leader = threading.Thread(target=lambda: results.update(
+            leader=single_flight('job', 1, compute, lambda: bool(done))
+        ))
+        leader.start()
+        computing.wait(5)
+        follower = threading.Thread(target=lambda: results.update(
+            follower=single_flight('job', 1, compute, lambda: bool(done))
+        ))
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+        # The follower waited for the leader and found its result
+        self.assertEqual(results, {'leader': 'result', 'follower': None})
+        self.assertEqual(done, [True])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_timeout(self):
+        computing, release = threading.Event(), threading.Event()
+        leader = threading.Thread(target=single_flight, args=(
+            'job', 1, lambda: computing.set() or release.wait(5), lambda: False
+        ))
+        leader.start()
+        computing.wait(5)
+        try:
+            with self.assertRaises(SingleFlightTimeout):
+                single_flight('job', 1, lambda: None, lambda: False, timeout=0.1)
+        finally:
+            release.set()
+            leader.join()
+        self.assertFalse(os.path.exists(lock_path('job', 1)))
+
+    def test_one_computation_under_contention(self):
+        computed, done = [], threading.Event()
+
+        def compute():
+            computed.append(True)
+            time.sleep(0.01)
+            done.set()
+
+        def call():
+            for _ in range(20):
+                single_flight('jobs', 'batch', compute, lambda: done.is_set())
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class PendingResponseTests(TestCase):
+    """A request that outwaits another computing the same matches is told to retry."""
+
+    def test_202_retry_after(self):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        job = Job.objects.create(
+            client=client, title='Fix a leak', location='Adama', skills='pipe',
+            description='Kitchen sink leaks', category=category, payment_method='cash'
+        )
+        api = APIClient()
+        api.force_authenticate(client)
+        with mock.patch.object(views, 'single_flight', side_effect=SingleFlightTimeout):
+            response = api.get(f'/recommendations/jobs/{job.id}/workers/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], str(views.PENDING_RETRY_AFTER))
+
+
+def criteria(skills=0.0, location=0.0):
+    return [skills, 0.0, 0.0, 0.0, location, 0.0]
+
+
+class EvaluationMetricTests(SimpleTestCase):
+    """precision@k and MRR against a hand-ranked snapshot, padding included."""
+
+    SKILLS_ONLY = criteria(skills=1.0)
+    LOCATION_ONLY = criteria(location=1.0)
+
+    def snapshot(self):
+        # Job 0 has three candidates; job 1 two, padded with a column that would outrank both
+        features = np.array([
+            [criteria(0.9, 0.1), criteria(0.5, 0.8), criteria(0.2, 0.5)],
+            [criteria(0.3, 0.9), criteria(0.6, 0.2), criteria(1.0, 1.0)],
+        ], dtype=np.float32)
+        labels = np.array([[False, True, False], [True, False, False]])
+        mask = np.array([[True, True, True], [True, True, False]])
+        return evaluation.ReplaySnapshot(
+            features, np.zeros((2, 3), dtype=np.float32), labels, mask,
+            np.array([10, 11]), np.array([7, 7]), {7: 'Plumbing'}
+        )
+
+    def test_metrics(self):
+        snapshot = self.snapshot()
+        self.assertEqual((snapshot.job_count, snapshot.pair_count), (2, 5))
+        precision, reciprocal_rank = evaluation.evaluate(
+            snapshot, [self.SKILLS_ONLY, self.LOCATION_ONLY], k=1, batch_size=1
+        )
+        # By skills the accepted worker ranks second in both jobs (the padding does not count);
+        # by location, first
+        np.testing.assert_allclose(precision, [[0, 1], [0, 1]])
+        np.testing.assert_allclose(reciprocal_rank, [[0.5, 1], [0.5, 1]])
+        precision, reciprocal_rank = evaluation.evaluate(snapshot, [self.SKILLS_ONLY], k=2)
+        np.testing.assert_allclose(precision, [[0.5], [0.5]])
+
+        summary = evaluation.summarize_by_category(snapshot, *evaluation.evaluate(
+            snapshot, [self.SKILLS_ONLY, self.LOCATION_ONLY], k=1
+        ))
+        self.assertEqual(list(summary), [7])
+        np.testing.assert_allclose(summary[7], [[0, 1], [0.5, 1]])
+
+    def test_tie_breakers_are_clipped(self):
+        snapshot = self.snapshot()
+        # Lifts job 1's accepted worker above the other, but no score goes past 1
+        snapshot.bonus[1, 0] = 0.5
+        _, reciprocal_rank = evaluation.evaluate(snapshot, [self.SKILLS_ONLY], k=1)
+        np.testing.assert_allclose(reciprocal_rank, [[0.5], [1]])
+
+    def test_empty_snapshot(self):
+        empty = evaluation.ReplaySnapshot(
+            np.zeros((0, 0, 6), dtype=np.float32), np.zeros((0, 0), dtype=np.float32),
+            np.zeros((0, 0), dtype=bool), np.zeros((0, 0), dtype=bool),
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), {}
+        )
+        precision, reciprocal_rank = evaluation.evaluate(empty, [self.SKILLS_ONLY])
+        self.assertEqual((precision.shape, reciprocal_rank.shape), ((0, 1), (0, 1)))
+
+    def test_weight_grid(self):
+        grid = evaluation.weight_grid(0.5)
+        # Two halves among six weights: 6 ways to put both on one, 15 to split them
+        self.assertEqual(len(grid), 21)
+        self.assertEqual(len({tuple(row) for row in grid}), 21)
+        np.testing.assert_allclose(grid.sum(axis=1), 1.0)
+        self.assertEqual(evaluation.grid_size(0.05), len(evaluation.weight_grid(0.05)))
+        with self.assertRaises(ValueError):
+            evaluation.weight_grid(0.3)
+
+
+class EvaluateWeightsCommandTests(TestCase):
+    """The command replays accepted applications from cached criteria."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Plumbing')
+        client = User.objects.create(username='client', email='client@example.com')
+        Client.objects.create(user=client)
+        job = Job.objects.create(
+            client=client, title='Fix a leak', location='Adama', skills='pipe',
+            description='Leaking pipe', category=category, payment_method='cash', status='in_progress'
+        )
+        # The accepted worker is nearby; the other has the closer skills
+        for i, (values, status) in enumerate([(criteria(0.2, 0.8), 'accepted'), (criteria(0.9, 0.1), 'rejected')]):
+            user = User.objects.create(username=f'worker{i}', email=f'worker{i}@example.com')
+            worker = Worker.objects.create(user=user, location='Adama')
+            JobApplication.objects.create(job=job, worker=worker, status=status)
+            MatchResult.objects.create(
+                job=job, worker=worker, score=0.5, criteria=dict(zip(evaluation.CRITERIA, values))
+            )
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('evaluate_weights', *args, stdout=out)
+        return out.getvalue()
+
+    def test_report(self):
+        snapshot = evaluation.build_snapshot()
+        self.assertEqual((snapshot.job_count, snapshot.pair_count), (1, 2))
+        np.testing.assert_allclose(snapshot.features[0, :, 4], [0.8, 0.1])
+        self.assertEqual(snapshot.labels.tolist(), [[True, False]])
+
+        output = self.call('--step', '0.5', '--k', '1', '--top', '1')
+        self.assertIn('Snapshot: 1 jobs, 2 candidate pairs', output)
+        self.assertIn('Replayed 21 weight vectors', output)
+        self.assertIn('Plumbing (1 jobs)', output)
+        # Some grid vector leans on location and ranks the accepted worker first
+        best = next(line for line in output.splitlines() if 'best #1' in line)
+        self.assertIn('P@1=1.000 MRR=1.000', best)
+
+    def test_nothing_to_replay(self):
+        JobApplication.objects.update(status='pending')
+        self.assertIn('No jobs with accepted workers to replay.', self.call('--samples', '5', '--seed', '1'))
+
+    def test_bad_step(self):
+        with self.assertRaises(CommandError):
+            self.call('--step', '0.3')
@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('jobs/workers/', views.BatchJobWorkerRecommendationView.as_view(), name='batch-job-worker-recommendations'),
     path('jobs/<int:job_id>/workers/', views.JobWorkerRecommendationView.as_view(), name='job-worker-recommendations'),
     path('workers/me/jobs/', views.WorkerJobRecommendationView.as_view(), name='worker-job-recommendations'),
 ]
\ No newline at end of file
@@ -1,17 +1,69 @@
 from apps.users.models import Worker
 from apps.jobs.models import Job, Feedback, ClientFeedback, Category
-from .models import Embedding, SkillSynonym, Location, WeightConfig
+from .models import Embedding, SkillSynonym, WeightConfig
+from . import skills, feature_snapshot, embedding_store, gazetteer
 import logging
 from difflib import SequenceMatcher
 import re
 import json
+import time
+from collections import defaultdict
+import numpy as np
 from django.utils import timezone
 from datetime import timedelta
+from django.conf import settings
 from django.db.models import Avg, Q
+from django.db.models.functions import Lower
 
 logger = logging.getLogger(__name__)
 
+# Criterion name (as in MatchResult.criteria) -> weight name (as returned by get_weights)
+CRITERIA_WEIGHT_KEYS = {
+    'skills': 'skill',
+    'target_job': 'target_job',
+    'experience': 'experience',
+    'education': 'education',
+    'location': 'location',
+    'rating': 'rating',
+}
+
+BLUE_COLLAR_CATEGORIES = ['plumbing', 'electrical', 'construction', 'carpentry']
+
+
+# Location-only candidates beyond the budget are sampled across these last-activity strata (days)
+RECENCY_STRATA = (7, 30, 90)
+
+
+class MatchResults(list):
+    """Ranked match dicts, flagged ``partial`` when a time budget ran out after ``evaluated`` candidates.
+
+    ``sampled`` counts location-only candidates left out by the candidate budget;
+    ``duration`` is the engine's wall time in seconds, when measured by the caller.
+    """
+
+    def __init__(self, results=(), partial=False, evaluated=0, sampled=0):
+        super().__init__(results)
+        self.partial = partial
+        self.evaluated = evaluated
+        self.sampled = sampled
+        self.duration = None
+
+    def top(self, k):
+        return MatchResults(self[:k], partial=self.partial, evaluated=self.evaluated, sampled=self.sampled)
+
+
+class Candidates(list):
+    """Candidate workers; ``sampled`` location-only matches were dropped to stay within budget."""
+
+    def __init__(self, workers=(), sampled=0):
+        super().__init__(workers)
+        self.sampled = sampled
+
+
 class MatchEngine:
+    # Bump when scoring changes, so concurrent computations of old and new results don't coalesce
+    VERSION = 1
+
     DEFAULT_SKILL_WEIGHT = 0.45
     DEFAULT_TARGET_JOB_WEIGHT = 0.2
     DEFAULT_EXPERIENCE_WEIGHT = 0.2
@@ -31,23 +83,10 @@ class MatchEngine:
         return [w for w in words if len(w) > 3]  # Filter short words
 
     @staticmethod
-    def calculate_skill_match(job_skills, worker_skills, job_description=''):
-        """Match skills, including synonyms and description keywords."""
-        job_skill_list = [s.strip().lower() for s in job_skills.split(',') if s.strip()]
-        job_keywords = MatchEngine.extract_keywords(job_description)
-        worker_skill_set = set(s.name.lower() for s in worker_skills.all())
-        
-        # Include synonyms
-        synonym_map = {s.skill.lower(): [syn.lower() for syn in s.synonyms] for s in SkillSynonym.objects.all()}
-        extended_job_skills = set(job_skill_list)
-        for skill in job_skill_list:
-            extended_job_skills.update(synonym_map.get(skill, []))
-        extended_job_skills.update(job_keywords[:5])  # Top 5 keywords from description
-        
-        if not extended_job_skills:
-            return 0.0
-        common_skills = extended_job_skills.intersection(worker_skill_set)
-        return len(common_skills) / len(extended_job_skills)
+    def calculate_skill_match(job_bitset, worker_bitset):
+        """Match skills as the share of the job's canonical terms (skills, synonyms folded,
+        and top description keywords) that the worker has."""
+        return skills.overlap_score(job_bitset, worker_bitset)
 
     @staticmethod
     def calculate_experience_score(worker):
@@ -77,18 +116,29 @@ class MatchEngine:
         return 0.0
 
     @staticmethod
-    def compute_education_score(job, worker_educations):
-        """Match education, prioritizing certificates for blue-collar jobs."""
+    def education_requirements(job):
+        """Required (field, levels) for a job, prioritizing certificates for blue-collar jobs."""
         job_keywords = MatchEngine.normalize_string(job.description + ' ' + job.skills)
-        is_blue_collar = job.category.name.lower() in ['plumbing', 'electrical', 'construction', 'carpentry']
-        
-        if is_blue_collar:
-            required_level = ['certificate', 'training', 'any']
-            required_field = job.category.name.lower()
-        else:
-            required_field = 'engineering' if 'engineer' in job_keywords else None
-            required_level = ['bachelor', 'any'] if 'degree' in job_keywords else ['any']
+        category_name = job.category.name.lower()
 
+        if category_name in BLUE_COLLAR_CATEGORIES:
+            return category_name, ('certificate', 'training', 'any')
+        required_field = 'engineering' if 'engineer' in job_keywords else None
+        required_level = ('bachelor', 'any') if 'degree' in job_keywords else ('any',)
+        return required_field, required_level
+
+    @staticmethod
+    def education_profiles():
+        """Every (field, levels) pair education_requirements can return."""
+        profiles = [(name, ('certificate', 'training', 'any')) for name in BLUE_COLLAR_CATEGORIES]
+        for required_field in ('engineering', None):
+            for required_level in (('bachelor', 'any'), ('any',)):
+                profiles.append((required_field, required_level))
+        return profiles
+
+    @staticmethod
+    def score_education(requirements, worker_educations):
+        required_field, required_level = requirements
         for education in worker_educations:
             field = MatchEngine.normalize_string(education.field_of_study or '')
             level = MatchEngine.normalize_string(education.level_of_study or '')
@@ -97,29 +147,16 @@ class MatchEngine:
             return (field_match + level_match) / 2
         return 0.0
 
+    @staticmethod
+    def compute_education_score(job, worker_educations):
+        """Match education, prioritizing certificates for blue-collar jobs."""
+        return MatchEngine.score_education(MatchEngine.education_requirements(job), worker_educations)
+
     @staticmethod
     def compute_location_similarity(job_location, worker_location):
-        """Compute location similarity using hierarchy."""
-        job_loc = MatchEngine.normalize_string(job_location)
-        worker_loc = MatchEngine.normalize_string(worker_location or '')
-        if not job_loc or not worker_loc:
-            return 0.5
-        
-        try:
-            job_location_obj = Location.objects.get(name__iexact=job_loc)
-            worker_location_obj = Location.objects.get(name__iexact=worker_loc)
-            
-            if job_location_obj == worker_location_obj:
-                return 1.0
-            # Check parent hierarchy
-            current = worker_location_obj
-            while current.parent:
-                if current.parent == job_location_obj:
-                    return 0.9  # Sub-location match
-                current = current.parent
-            return 0.5  # No hierarchy match
-        except Location.DoesNotExist:
-            return 0.5 if SequenceMatcher(None, job_loc, worker_loc).ratio() > 0.8 else 0.5
+        """Compute location similarity from the gazetteer: hierarchy, then distance."""
+        index = gazetteer.location_index
+        return index.similarity(index.resolve(job_location), index.resolve(worker_location))
 
     @staticmethod
     def store_embedding(entity_type, entity_id, data):
@@ -131,6 +168,29 @@ class MatchEngine:
             entity_id=entity_id,
             defaults={'vector': vector}
         )
+        store = embedding_store.get_store()
+        if store is not None:
+            try:
+                store.put(entity_type, entity_id, embedding_store.keyword_vector(keywords))
+            except Exception as e:
+                logger.error(f"Error appending {entity_type} {entity_id} to embedding store: {str(e)}")
+
+    @staticmethod
+    def load_keyword_vectors(entity_type, entity_ids):
+        """Keyword hash vectors by id, from the embedding store when enabled, else the Embedding table."""
+        entity_ids = list(entity_ids)
+        store = embedding_store.get_store()
+        vectors = store.get_many(entity_type, entity_ids) if store is not None else {}
+        missing = [entity_id for entity_id in entity_ids if entity_id not in vectors]
+        if missing:
+            for entity_id, vector in Embedding.objects.filter(
+                entity_type=entity_type, entity_id__in=missing
+            ).values_list('entity_id', 'vector'):
+                data = json.loads(vector) if isinstance(vector, str) else vector
+                vectors[entity_id] = embedding_store.keyword_vector(data.get('keywords', []))
+                if store is not None:
+                    store.put(entity_type, entity_id, vectors[entity_id])
+        return vectors
 
     @classmethod
     def get_weights(cls, category):
@@ -167,82 +227,296 @@ class MatchEngine:
                 }
 
     @classmethod
-    def match_job_to_workers(cls, job):
-        """Match a job to workers with pre-filtering."""
+    def compute_criteria(cls, job, worker, job_bitset=None, worker_bitset=None):
+        """Compute the per-criterion scores for a job/worker pair.
+
+        Pass preloaded skill bitsets when scoring many pairs to avoid per-pair lookups.
+        """
+        if job_bitset is None:
+            job_bitset = skills.get_job_bitset(job)
+        if worker_bitset is None:
+            worker_bitset = skills.get_worker_bitset(worker)
+        return {
+            'skills': cls.calculate_skill_match(job_bitset, worker_bitset),
+            'target_job': cls.compute_target_job_similarity(job.category, worker.target_jobs.all()),
+            'experience': cls.calculate_experience_score(worker),
+            'education': cls.compute_education_score(job, worker.educations.all()),
+            'location': cls.compute_location_similarity(job.location, worker.location),
+            'rating': cls.calculate_rating_score(worker)
+        }
+
+    @staticmethod
+    def calculate_tie_breaker(worker):
+        """Small bonus for experienced and recently active workers."""
+        bonus = 0.0
+        if worker.has_experience:
+            bonus += 0.01
+        if worker.last_activity and worker.last_activity > timezone.now() - timedelta(days=30):
+            bonus += 0.01
+        return bonus
+
+    @classmethod
+    def combine_scores(cls, weights, criteria, worker):
+        """Weight the criteria into a single score clamped to [0, 1]."""
+        total_score = sum(
+            weights[weight_key] * criteria[criterion]
+            for criterion, weight_key in CRITERIA_WEIGHT_KEYS.items()
+        )
+        total_score += cls.calculate_tie_breaker(worker)
+        return min(max(total_score, 0.0), 1.0)
+
+    @staticmethod
+    def worker_text(worker):
+        return (
+            f"{[s.name for s in worker.skills.all()]} "
+            f"{[e.field_of_study for e in worker.educations.all()]} "
+            f"{[t.job_title for t in worker.target_jobs.all()]}"
+        )
+
+    @staticmethod
+    def job_text(job):
+        return f"{job.title} {job.skills} {job.description} {getattr(job.category, 'name', '')}"
+
+    @classmethod
+    def store_embeddings(cls, entity_type, texts):
+        """store_embedding for many entities, rewriting only those whose keywords changed.
+
+        ``texts`` maps entity ids to their text. The stored vectors come from
+        load_keyword_vectors: zero-copy slices when the embedding store is enabled, one
+        Embedding query otherwise, rather than an update_or_create per row. Returns the
+        number of rows written.
+        """
+        try:
+            stored = cls.load_keyword_vectors(entity_type, texts)
+        except Exception as e:
+            logger.error(f"Error loading {entity_type} keyword vectors: {str(e)}")
+            stored = {}
+        written = 0
+        for entity_id, text in texts.items():
+            current = stored.get(entity_id)
+            if current is not None and np.array_equal(
+                current, embedding_store.keyword_vector(cls.extract_keywords(text))
+            ):
+                continue
+            try:
+                cls.store_embedding(entity_type, entity_id, text)
+                written += 1
+            except Exception as e:
+                logger.error(f"Error storing embedding for {entity_type} {entity_id}: {str(e)}")
+        return written
+
+    @classmethod
+    def store_worker_embeddings(cls, workers):
+        return cls.store_embeddings('worker', {worker.id: cls.worker_text(worker) for worker in workers})
+
+    @staticmethod
+    def location_filter(job):
+        return Q(location__iexact=MatchEngine.normalize_string(job.location))
+
+    @staticmethod
+    def listed_spellings(job):
+        """Every skill name that folds onto one of the job's listed skills, as the skill
+        bitsets (and so the feature snapshot and market paths) fold them."""
+        terms = skills.vocabulary.canonical_terms(s for s in job.skills.split(',') if s.strip())
+        return skills.vocabulary.spellings(terms)
+
+    @classmethod
+    def skill_filter(cls, job):
+        """Q for workers with a skill that folds onto one of the job's listed skills."""
+        return Q(skills__name__in=cls.listed_spellings(job))
+
+    @classmethod
+    def candidate_filter(cls, job):
+        """Q for workers sharing the job's location or one of its skills (synonyms included)."""
+        return cls.location_filter(job) | cls.skill_filter(job)
+
+    @classmethod
+    def candidate_workers(cls, job, worker_ids=None, budget=None):
+        """Workers sharing the job's location or one of its skills (synonyms included).
+
+        Past ``budget`` candidates (default settings.MATCH_CANDIDATE_BUDGET), every
+        skill match is kept and location-only matches are sampled.
+        """
+        budget = settings.MATCH_CANDIDATE_BUDGET if budget is None else budget
+        base = cls.matchable_workers(worker_ids)
+        candidates = base.filter(cls.candidate_filter(job)).distinct().select_related('user')
+        if not budget or candidates.count() <= budget:
+            return Candidates(candidates)
+        ids, sampled = cls.sample_candidates(job, base, budget)
+        return Candidates(Worker.objects.filter(id__in=ids).select_related('user'), sampled=sampled)
+
+    @classmethod
+    def candidate_ids(cls, job, budget=None):
+        """(ids, sampled) of the workers candidate_workers would return, without loading them."""
+        budget = settings.MATCH_CANDIDATE_BUDGET if budget is None else budget
+        base = cls.matchable_workers()
+        candidates = base.filter(cls.candidate_filter(job)).distinct()
+        if not budget or candidates.count() <= budget:
+            return set(candidates.values_list('id', flat=True)), 0
+        return cls.sample_candidates(job, base, budget)
+
+    @classmethod
+    def batch_candidate_ids(cls, jobs, budget=None, deadline=None):
+        """{job id: (ids, sampled)} as candidate_ids gives each job, from one query for all of them.
+
+        Jobs over ``budget`` are then sampled one at a time, as candidate_ids does; those
+        reached after ``deadline`` are left out.
+        """
+        budget = settings.MATCH_CANDIDATE_BUDGET if budget is None else budget
+        jobs_by_location, jobs_by_spelling = defaultdict(set), defaultdict(set)
+        for job in jobs:
+            jobs_by_location[cls.normalize_string(job.location)].add(job.id)
+            for name in cls.listed_spellings(job):
+                jobs_by_spelling[name].add(job.id)
+
+        candidates = {job.id: set() for job in jobs}
+        base = cls.matchable_workers()
+        # One row per (worker, skill); location matches come with all their skills
+        rows = base.annotate(location_key=Lower('location')).filter(
+            Q(location_key__in=list(jobs_by_location)) | Q(skills__name__in=list(jobs_by_spelling))
+        ).values_list('id', 'location_key', 'skills__name')
+        for worker_id, location, skill in rows:
+            matched = jobs_by_location.get(location, set()) | jobs_by_spelling.get((skill or '').lower(), set())
+            for job_id in matched:
+                candidates[job_id].add(worker_id)
+
+        result = {}
+        for job in jobs:
+            ids = candidates[job.id]
+            if not budget or len(ids) <= budget:
+                result[job.id] = (ids, 0)
+            elif deadline is None or time.monotonic() < deadline:
+                result[job.id] = cls.sample_candidates(job, base, budget)
+        return result
+
+    @staticmethod
+    def matchable_workers(worker_ids=None):
+        # Unavailable, inactive, suspended and orphaned workers are never matchable
+        base = Worker.objects.filter(is_matchable=True)
+        if worker_ids is not None:
+            base = base.filter(id__in=worker_ids)
+        return base
+
+    @classmethod
+    def sample_candidates(cls, job, base, budget):
+        """(ids, sampled): every skill match, and location-only matches sampled down to ``budget``."""
+        skill_ids = set(base.filter(cls.skill_filter(job)).values_list('id', flat=True))
+        location_only = [
+            row for row in base.filter(cls.location_filter(job)).annotate(
+                rating=Avg('feedback__rating')
+            ).values_list('id', 'last_activity', 'rating')
+            if row[0] not in skill_ids
+        ]
+        chosen = cls.stratified_sample(location_only, max(budget - len(skill_ids), 0))
+        sampled = len(location_only) - len(chosen)
+        logger.info(
+            f"Job {job.id}: {len(skill_ids)} skill and {len(location_only)} location-only candidates; "
+            f"sampled out {sampled} to stay within budget {budget}"
+        )
+        return skill_ids | chosen, sampled
+
+    @staticmethod
+    def stratified_sample(rows, size):
+        """Ids of ``size`` (id, last_activity, rating) rows, allocated across recency strata in
+        proportion to their size and taking the best rated (then most recent) in each."""
+        if size >= len(rows):
+            return {row[0] for row in rows}
+        now = timezone.now()
+        strata = [[] for _ in range(len(RECENCY_STRATA) + 1)]
+        for row in rows:
+            age = (now - row[1]).days if row[1] else None
+            index = next((i for i, days in enumerate(RECENCY_STRATA) if age is not None and age <= days), len(RECENCY_STRATA))
+            strata[index].append(row)
+
+        # Largest-remainder proportional allocation
+        shares = [size * len(stratum) / len(rows) for stratum in strata]
+        quotas = [int(share) for share in shares]
+        by_remainder = sorted(range(len(strata)), key=lambda i: shares[i] - quotas[i], reverse=True)
+        for i in by_remainder[:size - sum(quotas)]:
+            quotas[i] += 1
+
+        chosen = set()
+        for stratum, quota in zip(strata, quotas):
+            stratum.sort(key=lambda row: (row[2] or 0, row[1].timestamp() if row[1] else 0), reverse=True)
+            chosen.update(row[0] for row in stratum[:quota])
+        return chosen
+
+    @classmethod
+    def score_workers(cls, job, workers, weights, deadline=None):
+        """Score workers against a job, best first.
+
+        Candidates are scored in priority order (exact location, then skill overlap);
+        once ``deadline`` (a time.monotonic() value) passes, the best so far is returned
+        with ``partial`` set.
+        """
         results = []
-        weights = cls.get_weights(job.category)
-        
-        # Pre-filter workers by location and skills
-        job_loc = MatchEngine.normalize_string(job.location)
-        job_skills = {s.strip().lower() for s in job.skills.split(',') if s.strip()}
-        synonym_map = {s.skill.lower(): [syn.lower() for syn in s.synonyms] for s in SkillSynonym.objects.all()}
-        extended_skills = job_skills.copy()
-        for skill in job_skills:
-            extended_skills.update(synonym_map.get(skill, []))
-        
-        workers = Worker.objects.filter(
-            Q(location__iexact=job_loc) |
-            Q(skills__name__in=extended_skills)
-        ).distinct().select_related('user')
-        # Filter out orphaned workers (no related user)
-        workers = [w for w in workers if hasattr(w, 'user') and w.user is not None]
-        
-        # Store job embedding
-        job_text = f"{job.title} {job.skills} {job.description} {job.category.name}"
-        cls.store_embedding('job', job.id, job_text)
+        workers_in = workers
+        job_bitset = skills.get_job_bitset(job)
+        worker_bitsets = skills.get_worker_bitsets(workers)
+        job_loc = cls.normalize_string(job.location)
+        workers = sorted(workers, key=lambda w: (
+            cls.normalize_string(w.location) == job_loc,
+            skills.overlap_score(job_bitset, worker_bitsets[w.id]),
+        ), reverse=True)
 
+        evaluated = 0
         for worker in workers:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            evaluated += 1
             try:
-                # Store worker embedding
-                worker_text = (
-                    f"{[s.name for s in worker.skills.all()]} "
-                    f"{[e.field_of_study for e in worker.educations.all()]} "
-                    f"{[t.job_title for t in worker.target_jobs.all()]}"
-                )
-                cls.store_embedding('worker', worker.id, worker_text)
-
-                skill_score = cls.calculate_skill_match(job.skills, worker.skills, job.description)
-                target_job_score = cls.compute_target_job_similarity(job.category, worker.target_jobs.all())
-                experience_score = cls.calculate_experience_score(worker)
-                education_score = cls.compute_education_score(job, worker.educations.all())
-                location_score = cls.compute_location_similarity(job.location, worker.location)
-                rating_score = cls.calculate_rating_score(worker)
-                
-                total_score = (
-                    weights['skill'] * skill_score +
-                    weights['target_job'] * target_job_score +
-                    weights['experience'] * experience_score +
-                    weights['education'] * education_score +
-                    weights['location'] * location_score +
-                    weights['rating'] * rating_score
-                )
-                
-                # Tie-breakers
-                if worker.has_experience:
-                    total_score += 0.01
-                if worker.last_activity and worker.last_activity > timezone.now() - timedelta(days=30):
-                    total_score += 0.01
-
-                criteria = {
-                    'skills': skill_score,
-                    'target_job': target_job_score,
-                    'experience': experience_score,
-                    'education': education_score,
-                    'location': location_score,
-                    'rating': rating_score
-                }
+                criteria = cls.compute_criteria(job, worker, job_bitset, worker_bitsets[worker.id])
+                total_score = cls.combine_scores(weights, criteria, worker)
                 results.append({
                     'worker': worker,
-                    'score': min(max(total_score, 0.0), 1.0),
+                    'score': total_score,
                     'criteria': criteria
                 })
             except Exception as e:
                 logger.error(f"Error matching job {job.id} to worker {worker.id}: {str(e)}")
-        return sorted(results, key=lambda x: x['score'], reverse=True)[:10]
+        cls.store_worker_embeddings(workers[:evaluated])
+        return MatchResults(
+            sorted(results, key=lambda x: x['score'], reverse=True),
+            partial=evaluated < len(workers),
+            evaluated=evaluated,
+            sampled=getattr(workers_in, 'sampled', 0),
+        )
+
+    @staticmethod
+    def deadline(time_budget):
+        return time.monotonic() + time_budget if time_budget is not None else None
 
     @classmethod
-    def match_worker_to_jobs(cls, worker):
-        """Match a worker to open jobs with pre-filtering."""
+    def match_job_to_workers(cls, job, time_budget=None):
+        """Match a job to workers, from the shared feature snapshot when one covers the job.
+
+        With ``time_budget`` (seconds), database scoring stops at the deadline and
+        returns the best so far flagged ``partial``.
+        """
+        deadline = cls.deadline(time_budget)
+        weights = cls.get_weights(job.category)
+
+        cls.store_embeddings('job', {job.id: cls.job_text(job)})
+
+        snapshot = feature_snapshot.current_snapshot()
+        if snapshot is not None and snapshot.covers(job):
+            try:
+                return feature_snapshot.match_job(snapshot, job, weights, limit=10, deadline=deadline).top(10)
+            except Exception as e:
+                logger.error(f"Error matching job {job.id} from feature snapshot: {str(e)}")
+
+        workers = cls.candidate_workers(job)
+        return cls.score_workers(job, workers, weights, deadline).top(10)
+
+    @classmethod
+    def match_worker_to_jobs(cls, worker, time_budget=None):
+        """Match a worker to open jobs with pre-filtering.
+
+        With ``time_budget`` (seconds), jobs are scored in priority order (exact
+        location, then skill overlap) until the deadline; the best so far is then
+        returned flagged ``partial``.
+        """
+        deadline = cls.deadline(time_budget)
         results = []
         weights = cls.get_weights(None)  # Default weights for worker-to-job
         
@@ -259,55 +533,33 @@ class MatchEngine:
             (Q(location__iexact=worker_loc) | Q(skills__in=extended_skills))
         ).distinct()
         
-        # Store worker embedding
-        worker_text = (
-            f"{[s.name for s in worker.skills.all()]} "
-            f"{[e.field_of_study for e in worker.educations.all()]} "
-            f"{[t.job_title for t in worker.target_jobs.all()]}"
-        )
-        cls.store_embedding('worker', worker.id, worker_text)
+        cls.store_worker_embeddings([worker])
+
+        worker_bitset = skills.get_worker_bitset(worker)
+        job_bitsets = skills.get_job_bitsets(jobs)
+        jobs = sorted(jobs, key=lambda j: (
+            cls.normalize_string(j.location) == worker_loc,
+            skills.overlap_score(job_bitsets[j.id], worker_bitset),
+        ), reverse=True)
 
+        evaluated = 0
         for job in jobs:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            evaluated += 1
             try:
-                # Store job embedding
-                job_text = f"{job.title} {job.skills} {job.description} {job.category.name}"
-                cls.store_embedding('job', job.id, job_text)
-
-                skill_score = cls.calculate_skill_match(job.skills, worker.skills, job.description)
-                target_job_score = cls.compute_target_job_similarity(job.category, worker.target_jobs.all())
-                experience_score = cls.calculate_experience_score(worker)
-                education_score = cls.compute_education_score(job, worker.educations.all())
-                location_score = cls.compute_location_similarity(job.location, worker.location)
-                rating_score = cls.calculate_rating_score(worker)
-                
-                total_score = (
-                    weights['skill'] * skill_score +
-                    weights['target_job'] * target_job_score +
-                    weights['experience'] * experience_score +
-                    weights['education'] * education_score +
-                    weights['location'] * location_score +
-                    weights['rating'] * rating_score
-                )
-                
-                # Tie-breakers
-                if worker.has_experience:
-                    total_score += 0.01
-                if worker.last_activity and worker.last_activity > timezone.now() - timedelta(days=30):
-                    total_score += 0.01
-
-                criteria = {
-                    'skills': skill_score,
-                    'target_job': target_job_score,
-                    'experience': experience_score,
-                    'education': education_score,
-                    'location': location_score,
-                    'rating': rating_score
-                }
+                criteria = cls.compute_criteria(job, worker, job_bitsets[job.id], worker_bitset)
+                total_score = cls.combine_scores(weights, criteria, worker)
                 results.append({
                     'job': job,
-                    'score': min(max(total_score, 0.0), 1.0),
+                    'score': total_score,
                     'criteria': criteria
                 })
             except Exception as e:
                 logger.error(f"Error matching worker {worker.id} to job {job.id}: {str(e)}")
-        return sorted(results, key=lambda x: x['score'], reverse=True)[:10]
\ No newline at end of file
+        cls.store_embeddings('job', {job.id: cls.job_text(job) for job in jobs[:evaluated]})
+        return MatchResults(
+            sorted(results, key=lambda x: x['score'], reverse=True),
+            partial=evaluated < len(jobs),
+            evaluated=evaluated,
+        ).top(10)
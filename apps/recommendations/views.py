@@ -4,23 +4,70 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from apps.jobs.models import Job
 from apps.users.models import Worker
 from .models import MatchResult
-from .serializers import MatchResultSerializer
-from .utils import MatchEngine
+from .serializers import RecommendationSerializer, BatchRecommendationRequestSerializer
+from .feeds import (
+    MATCH_TIME_BUDGET, build_batch_job_matches, build_job_matches, build_worker_feed, cached_feed, cached_job_matches
+)
+from .singleflight import single_flight, SingleFlightTimeout
+from . import shadow
 from core.utils import IsClient, IsWorker
+from core.serializers import parse_list_param
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Seconds clients should wait before retrying a 202
+PENDING_RETRY_AFTER = 2
+# Recommendations returned per job or worker; the market pass caches more rows than this
+RECOMMENDATIONS_LIMIT = 10
+
+expand_parameter = openapi.Parameter(
+    'expand', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="Comma-separated nested objects to include: job, worker; job.<relation> expands the job's own relations"
+)
+
+def serialize_recommendations(request, queryset, limit=RECOMMENDATIONS_LIMIT):
+    expand = parse_list_param(request, 'expand')
+    queryset = RecommendationSerializer.setup_eager_loading(queryset, expand)
+    if limit is not None:
+        queryset = queryset[:limit]
+    return RecommendationSerializer(queryset, many=True, context={'request': request, 'expand': expand}).data
+
+def pending_response():
+    """202 for a request that waited too long on another request computing the same matches."""
+    return Response(
+        {"message": "Recommendations are being computed. Please retry shortly."},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Retry-After': str(PENDING_RETRY_AFTER)}
+    )
+
+def match_headers(results):
+    """Flag recommendations cut short by MATCH_TIME_BUDGET (the full list is completed in the
+    background) or drawn from a sample of candidates beyond MATCH_CANDIDATE_BUDGET."""
+    if results is None:
+        return None
+    headers = {}
+    if results.partial:
+        headers.update({'X-Recommendations-Partial': 'true', 'X-Candidates-Evaluated': str(results.evaluated)})
+    if results.sampled:
+        headers['X-Candidates-Sampled'] = str(results.sampled)
+    return headers or None
+
 class JobWorkerRecommendationView(APIView):
     permission_classes = [IsAuthenticated, IsClient]
 
     @swagger_auto_schema(
         operation_description="Get recommended workers for a specific job.",
+        manual_parameters=[expand_parameter],
         responses={
-            200: MatchResultSerializer(many=True),
+            200: RecommendationSerializer(many=True),
+            202: 'Recommendations are being computed; retry after Retry-After seconds',
             401: 'Unauthorized',
             403: 'Forbidden',
             404: 'Not Found'
@@ -44,30 +91,31 @@ class JobWorkerRecommendationView(APIView):
         # Check cached results
         existing_matches = MatchResult.objects.filter(job=job).order_by('-score')
         if existing_matches.exists():
-            serializer = MatchResultSerializer(existing_matches, many=True)
-            return Response(serializer.data)
-
-        # Generate matches
-        match_results = MatchEngine.match_job_to_workers(job)
-        for result in match_results[:10]:  # Top 10
-            MatchResult.objects.create(
-                job=job,
-                worker=result['worker'],
-                score=result['score'],
-                criteria=result['criteria']
+            return Response(serialize_recommendations(request, existing_matches))
+
+        # Generate matches, once across concurrent requests
+        try:
+            results = single_flight(
+                'job', job.id,
+                lambda: build_job_matches(job, MATCH_TIME_BUDGET),
+                lambda: cached_job_matches(job).exists()
             )
+        except SingleFlightTimeout:
+            return pending_response()
+        shadow.sample('job', job.id, results)
 
         matches = MatchResult.objects.filter(job=job).order_by('-score')
-        serializer = MatchResultSerializer(matches, many=True)
-        return Response(serializer.data)
+        return Response(serialize_recommendations(request, matches), headers=match_headers(results))
 
 class WorkerJobRecommendationView(APIView):
     permission_classes = [IsAuthenticated, IsWorker]
 
     @swagger_auto_schema(
         operation_description="Get recommended jobs for the authenticated worker.",
+        manual_parameters=[expand_parameter],
         responses={
-            200: MatchResultSerializer(many=True),
+            200: RecommendationSerializer(many=True),
+            202: 'Recommendations are being computed; retry after Retry-After seconds',
             401: 'Unauthorized',
             403: 'Forbidden'
         }
@@ -78,19 +126,102 @@ class WorkerJobRecommendationView(APIView):
         # Check cached results
         existing_matches = MatchResult.objects.filter(worker=worker, job__status='open').order_by('-score')
         if existing_matches.exists():
-            serializer = MatchResultSerializer(existing_matches, many=True)
-            return Response(serializer.data)
-
-        # Generate matches
-        match_results = MatchEngine.match_worker_to_jobs(worker)
-        for result in match_results[:10]:  # Top 10
-            MatchResult.objects.create(
-                job=result['job'],
-                worker=worker,
-                score=result['score'],
-                criteria=result['criteria']
+            return Response(serialize_recommendations(request, existing_matches))
+
+        # Generate matches, once across concurrent requests
+        try:
+            results = single_flight(
+                'worker', worker.id,
+                lambda: build_worker_feed(worker, MATCH_TIME_BUDGET),
+                lambda: cached_feed(worker).exists()
             )
+        except SingleFlightTimeout:
+            return pending_response()
+        shadow.sample('worker', worker.id, results)
 
         matches = MatchResult.objects.filter(worker=worker, job__status='open').order_by('-score')
-        serializer = MatchResultSerializer(matches, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serialize_recommendations(request, matches), headers=match_headers(results))
+
+class BatchJobWorkerRecommendationView(APIView):
+    permission_classes = [IsAuthenticated, IsClient]
+
+    @swagger_auto_schema(
+        operation_description="Get recommended workers for several of the client's jobs in one request.",
+        request_body=BatchRecommendationRequestSerializer,
+        manual_parameters=[expand_parameter],
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'job_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'recommendations': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                                'partial': openapi.Schema(
+                                    type=openapi.TYPE_BOOLEAN,
+                                    description='Cut short by the time budget; completed in the background'
+                                ),
+                            }
+                        )
+                    )
+                }
+            ),
+            202: 'Recommendations are being computed; retry after Retry-After seconds',
+            400: 'Bad Request',
+            401: 'Unauthorized',
+            403: 'Forbidden',
+            404: 'Not Found'
+        }
+    )
+    def post(self, request):
+        serializer = BatchRecommendationRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        job_ids = list(dict.fromkeys(serializer.validated_data['job_ids']))
+
+        jobs = {job.id: job for job in Job.objects.filter(id__in=job_ids).select_related('category')}
+        missing = [job_id for job_id in job_ids if job_id not in jobs]
+        if missing:
+            logger.error(f"Jobs {missing} not found.")
+            return Response({"error": f"Jobs not found: {missing}"}, status=status.HTTP_404_NOT_FOUND)
+        if any(job.client_id != request.user.id for job in jobs.values()):
+            logger.error(f"User {request.user.id} not authorized to access jobs {job_ids}.")
+            return Response({"error": "Not authorized to view these jobs"}, status=status.HTTP_403_FORBIDDEN)
+
+        # Score the jobs without cached matches together in one pass, once across concurrent requests
+        def uncached_jobs():
+            cached = set(MatchResult.objects.filter(job_id__in=job_ids).values_list('job_id', flat=True))
+            return [
+                jobs[job_id] for job_id in job_ids
+                if job_id not in cached and jobs[job_id].category_id is not None
+            ]
+
+        results = None
+        uncached = uncached_jobs()
+        if uncached:
+            batch_key = hashlib.sha1(','.join(map(str, sorted(job.id for job in uncached))).encode()).hexdigest()[:16]
+            try:
+                results = single_flight(
+                    'jobs', batch_key,
+                    lambda: build_batch_job_matches(uncached_jobs(), MATCH_TIME_BUDGET),
+                    lambda: not uncached_jobs()
+                )
+            except SingleFlightTimeout:
+                return pending_response()
+        partial = {job_id for job_id, match_results in (results or {}).items() if match_results.partial}
+
+        recommendations = {job_id: [] for job_id in job_ids}
+        queryset = MatchResult.objects.filter(job_id__in=job_ids).annotate(
+            rank=Window(RowNumber(), partition_by=F('job_id'), order_by=F('score').desc())
+        ).filter(rank__lte=RECOMMENDATIONS_LIMIT).order_by('job_id', '-score')
+        for row in serialize_recommendations(request, queryset, limit=None):
+            recommendations[row['job_id']].append(row)
+        return Response({
+            "results": [
+                {"job_id": job_id, "recommendations": rows, "partial": job_id in partial}
+                for job_id, rows in recommendations.items()
+            ]
+        }, headers={'X-Recommendations-Partial': 'true'} if partial else None)
@@ -0,0 +1,52 @@
+"""Background warm-up of worker job feeds, so the first feed request after sign-in is a cache hit."""
+from datetime import timedelta
+import logging
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.users.models import Worker
+from .feeds import build_worker_feed, cached_feed, run_in_background
+from .singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the same worker's feed can be queued again
+WARMUP_INTERVAL = 300
+# Cached feeds older than this are recomputed
+FEED_MAX_AGE = timedelta(hours=6)
+
+
+def feed_is_fresh(worker):
+    return cached_feed(worker).filter(updated_at__gte=timezone.now() - FEED_MAX_AGE).exists()
+
+
+def warm_worker_feed(worker_id):
+    worker = Worker.objects.filter(id=worker_id).select_related('user').first()
+    if worker is None:
+        return
+    single_flight('worker', worker.id, lambda: build_worker_feed(worker), lambda: feed_is_fresh(worker))
+    logger.info(f"Warmed job feed for worker {worker_id}")
+
+
+def queue_worker_feed_warmup(user):
+    """Queue a feed warm-up for a worker user whose feed is missing or stale.
+
+    Deduplicated and rate-limited per worker through the shared cache (CACHES), so
+    one warm-up per WARMUP_INTERVAL across all web processes; the file cache's add()
+    can race, and single_flight then makes the second warm-up a no-op. Runs after
+    the current transaction commits so it sees the login's own writes.
+    """
+    worker = getattr(user, 'worker', None)
+    if worker is None:
+        return False
+    try:
+        if not cache.add(f"recommendations:feed-warmup:{worker.id}", True, timeout=WARMUP_INTERVAL):
+            return False
+        if feed_is_fresh(worker):
+            return False
+        run_in_background(warm_worker_feed, worker.id)
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing feed warm-up for worker {worker.id}: {str(e)}")
+        return False
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -110,6 +111,10 @@ class Worker(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='worker')
     profile_pic = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
+    # Gazetteer entry for location, resolved on save
+    place = models.ForeignKey(
+        'recommendations.Location', on_delete=models.SET_NULL, null=True, blank=True, related_name='workers'
+    )
     birthdate = models.DateField(blank=True, null=True)
     nationality = models.CharField(max_length=100, blank=True, null=True)
     gender = models.CharField(max_length=10, blank=True, null=True)
@@ -123,6 +128,31 @@ class Worker(models.Model):
     )
     monthly_applications_count = models.PositiveIntegerField(default=0)
     last_application_reset = models.DateField(default=timezone.now)
+    # Can be recommended; kept in sync by recommendation signals and refresh_matchable_workers
+    is_matchable = models.BooleanField(default=False, db_index=True)
+
+    @staticmethod
+    def matchable_q(now=None):
+        """Active, unsuspended users who, if they listed target jobs, are open to work in at least one."""
+        now = now or timezone.now()
+        return (
+            Q(user__is_active=True) &
+            (Q(user__suspended_until__isnull=True) | Q(user__suspended_until__lte=now)) &
+            (Q(target_jobs__isnull=True) | Q(target_jobs__open_to_work=True))
+        )
+
+    @classmethod
+    def refresh_matchable(cls, worker_ids=None):
+        """Recompute is_matchable for worker_ids (default: all workers); returns the ids that changed."""
+        workers = cls.objects.all() if worker_ids is None else cls.objects.filter(id__in=worker_ids)
+        matchable = set(workers.filter(cls.matchable_q()).values_list('id', flat=True))
+        current = dict(workers.values_list('id', 'is_matchable'))
+        gained = [worker_id for worker_id, flag in current.items() if not flag and worker_id in matchable]
+        lost = [worker_id for worker_id, flag in current.items() if flag and worker_id not in matchable]
+        for ids, flag in ((gained, True), (lost, False)):
+            for start in range(0, len(ids), 1000):
+                cls.objects.filter(id__in=ids[start:start + 1000]).update(is_matchable=flag)
+        return gained + lost
 
     @property
     def years_of_experience(self):
@@ -9,7 +9,7 @@ import uuid
 import random
 from django.core.mail import send_mail
 from django.conf import settings
-from twilio.rest import Client as TwilioClient
+from apps.management.sms import send_sms
 from django.core.cache import cache
 from datetime import timedelta
 from apps.jobs.models import Job, JobRequest, Feedback
@@ -104,13 +104,7 @@ class SignupRequestSerializer(serializers.Serializer):
                 logger.error(f"DNS resolution failed for {identifier}: {str(e)}")
                 if user.phone_number:
                     try:
-                        twilio_client = TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                        sms_message = f"Your SkillConnect verification code is: {code}"
-                        twilio_client.messages.create(
-                            body=sms_message,
-                            from_=settings.TWILIO_PHONE_NUMBER,
-                            to=user.phone_number
-                        )
+                        send_sms(user.phone_number, f"Your SkillConnect verification code is: {code}")
                         logger.info(f"Fallback SMS sent to {user.phone_number}")
                     except Exception as sms_e:
                         logger.error(f"Failed to send fallback SMS to {user.phone_number}: {str(sms_e)}")
@@ -128,13 +122,7 @@ class SignupRequestSerializer(serializers.Serializer):
                 )
         else:
             try:
-                twilio_client = TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                message = f"Your SkillConnect verification code is: {code}"
-                twilio_client.messages.create(
-                    body=message,
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    to=identifier
-                )
+                send_sms(identifier, f"Your SkillConnect verification code is: {code}")
                 logger.info(f"SMS sent to {identifier}")
             except Exception as e:
                 logger.error(f"Failed to send SMS to {identifier}: {str(e)}")
@@ -319,13 +307,7 @@ class PasswordResetRequestSerializer(serializers.Serializer):
                 fail_silently=False,
             )
         else:
-            twilio_client = TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-            message = f"Your SkillConnect password reset code is: {code}"
-            twilio_client.messages.create(
-                body=message,
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=identifier
-            )
+            send_sms(identifier, f"Your SkillConnect password reset code is: {code}")
 
 class PasswordResetConfirmSerializer(serializers.Serializer):
     identifier = serializers.CharField(max_length=255)
@@ -5,7 +5,7 @@ from .views import (
     AuthSignupCompleteView, AuthPasswordResetView, AuthPasswordResetConfirmView,
     UserProfileView, UserProfileClientView, UserProfileWorkerView, 
     UserRatingStatsView, UserReviewsView, RecentReviewsView, PaymentPreferenceView,
-    WorkersByPaymentMethodView, JobsByPaymentMethodView, LogoutView,
+    WorkersByPaymentMethodView, JobsByPaymentMethodView, NearbyWorkerListView, LogoutView,
     purchase_premium, chapa_webhook,
     hello_world
 )
@@ -31,6 +31,7 @@ urlpatterns = [
     # Payment Preferences
     path('users/payment-preference/', PaymentPreferenceView.as_view(), name='payment_preference'),
     path('users/workers/by-payment-method/', WorkersByPaymentMethodView.as_view(), name='workers_by_payment_method'),
+    path('users/workers/nearby/', NearbyWorkerListView.as_view(), name='nearby_workers'),
     path('users/jobs/by-payment-method/', JobsByPaymentMethodView.as_view(), name='jobs_by_payment_method'),
     
     # Rating Statistics
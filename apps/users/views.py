@@ -10,14 +10,13 @@ from .serializers import (
     ClientProfileSerializer, UserSerializer, WorkerProfileSerializer, FeedbackSerializer
 )
 from apps.jobs.models import Job, JobApplication
-from apps.jobs.serializers import JobApplicationSerializer, JobSerializer
+from apps.jobs.serializers import JobApplicationSerializer, JobSerializer, PublicWorkerProfileSerializer
 from core.utils import IsWorker, IsClient
 from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
 from .permissions import RoleBasedPermission
 from .models import VerificationToken, Worker
 from django.utils import timezone
-from twilio.rest import Client as TwilioClient 
 from django.conf import settings
 import random
 import logging
@@ -25,6 +24,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.db.models import Q
 from apps.management.models import PremiumPlan
+from apps.recommendations.warmup import queue_worker_feed_warmup
+from apps.recommendations.gazetteer import search_center, within_radius
+from core.pagination import RankedResultsPagination
+from core.serializers import parse_list_param
+from apps.jobs.sync import changed_since_parameter, entity_list_response
 
 User = get_user_model()
 logger = logging.getLogger('django')
@@ -83,7 +87,9 @@ class AuthLoginView(APIView):
                 token, created = Token.objects.get_or_create(user=user)
                 if hasattr(user, 'worker'):
                     user.worker.last_activity = timezone.now()
-                    user.worker.save()
+                    # Activity alone keeps the worker's cached matches (see invalidate_worker_matches)
+                    user.worker.save(update_fields=['last_activity'])
+                    queue_worker_feed_warmup(user)
                 return Response({
                     "token": token.key,
                     "user": UserSerializer(user).data
@@ -211,6 +217,7 @@ class AuthSignupCompleteView(APIView):
         if serializer.is_valid():
             user = serializer.save()
             token, created = Token.objects.get_or_create(user=user)
+            queue_worker_feed_warmup(user)
             return Response(
                 {"token": token.key, "user": UserSerializer(user).data},
                 status=status.HTTP_201_CREATED
@@ -415,6 +422,7 @@ class UserApplicationsView(APIView):
 
     @swagger_auto_schema(
         operation_description="List all applications submitted by the worker.",
+        manual_parameters=[changed_since_parameter],
         responses={
             200: openapi.Response(
                 description='List of applications',
@@ -432,6 +440,7 @@ class UserApplicationsView(APIView):
                     )
                 )
             ),
+            304: 'Not Modified',
             401: openapi.Response(
                 description='Unauthorized',
                 schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={'detail': openapi.Schema(type=openapi.TYPE_STRING)})
@@ -444,8 +453,9 @@ class UserApplicationsView(APIView):
     )
     def get(self, request):
         applications = JobApplication.objects.filter(worker=request.user.worker)
-        serializer = JobApplicationSerializer(applications, many=True)
-        return Response(serializer.data)
+        return entity_list_response(
+            request, applications, JobApplicationSerializer, 'application', worker_id=request.user.worker.id
+        )
 
 class UserRatingStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -706,6 +716,41 @@ class WorkersByPaymentMethodView(APIView):
         serializer = WorkerProfileSerializer(workers, many=True, context={'request': request})
         return Response(serializer.data)
 
+class NearbyWorkerListView(APIView):
+    permission_classes = [IsAuthenticated, IsClient]
+    pagination_class = RankedResultsPagination
+
+    @swagger_auto_schema(
+        operation_description="List available workers within a radius, nearest first.",
+        manual_parameters=[
+            openapi.Parameter('radius_km', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Search radius in km (default 10, max 300)"),
+            openapi.Parameter('lat', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Centre latitude (with lng)"),
+            openapi.Parameter('lng', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Centre longitude (with lat)"),
+            openapi.Parameter('location', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Centre place name; defaults to your own location"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Results per page (default 20, max 100)"),
+            openapi.Parameter('offset', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Results to skip"),
+        ],
+        responses={
+            200: PublicWorkerProfileSerializer(many=True),
+            400: 'Invalid centre or radius',
+            401: 'Unauthorized',
+            403: 'Forbidden'
+        }
+    )
+    def get(self, request):
+        center, error = search_center(request.query_params, request.user.client.location)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        workers = within_radius(
+            PublicWorkerProfileSerializer.setup_eager_loading(Worker.objects.filter(is_matchable=True)), *center
+        ).order_by('distance_km', '-last_activity', 'id')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(workers, request, view=self)
+        data = PublicWorkerProfileSerializer(page, many=True, context={'request': request}).data
+        for item, worker in zip(data, page):
+            item['distance_km'] = round(worker.distance_km, 1)
+        return paginator.get_paginated_response(data)
+
 class JobsByPaymentMethodView(APIView):
     permission_classes = [IsAuthenticated, IsWorker]
 
@@ -741,7 +786,8 @@ class JobsByPaymentMethodView(APIView):
             status='open',
             client__payment_method_preference=worker_preference
         )
-        serializer = JobSerializer(jobs, many=True)
+        jobs = JobSerializer.setup_eager_loading(jobs, parse_list_param(request, 'expand'))
+        serializer = JobSerializer(jobs, many=True, context={'request': request})
         return Response(serializer.data)
 
 class LogoutView(APIView):
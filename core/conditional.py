@@ -0,0 +1,54 @@
+"""Conditional GET for polled list endpoints.
+
+A list's validators come from a single aggregate over its filtered queryset: the row
+count and newest ``updated_at`` of the listed rows, plus those of any related rows the
+representation embeds. A poll carrying a matching ``If-None-Match`` is answered 304
+before anything is loaded or serialized.
+
+There is deliberately no ``Last-Modified``: the newest ``updated_at`` of the listed rows
+does not move when a row leaves the list (deleted, or filtered out like a cancelled
+job), so ``If-Modified-Since`` would keep answering 304 to a stale copy. The ETag
+covers the row counts and sees those removals.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+
+class ListValidators:
+    """ETag of a list response.
+
+    ``timestamps`` are fields (or lookups through relations) whose newest value moves
+    when a listed or embedded row changes; ``counts`` are relations whose size is part
+    of the list, so deletions show up too. The ETag also covers the user and the full
+    query string, since both shape the response.
+    """
+
+    def __init__(self, request, queryset, timestamps=('updated_at',), counts=()):
+        aggregates = {'rows': Count('pk', distinct=True)}
+        for i, lookup in enumerate(timestamps):
+            aggregates[f'modified_{i}'] = Max(lookup)
+        for i, lookup in enumerate(counts):
+            aggregates[f'count_{i}'] = Count(lookup, distinct=True)
+        values = queryset.order_by().aggregate(**aggregates)
+
+        seed = '|'.join([
+            str(getattr(request.user, 'pk', '')),
+            request.get_full_path(),
+            *(f'{key}={value.isoformat() if hasattr(value, "isoformat") else value}'
+              for key, value in sorted(values.items())),
+        ])
+        self.etag = f'W/"{hashlib.md5(seed.encode("utf-8")).hexdigest()}"'
+
+    def not_modified(self, request):
+        """A 304 response when the client's copy is current, else None."""
+        response = get_conditional_response(getattr(request, '_request', request), etag=self.etag)
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        # Per-user lists: clients revalidate every time, shared caches keep nothing
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
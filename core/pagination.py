@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest-first cursor pages over (created_at, id); stable while rows are inserted."""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class RankedResultsPagination(LimitOffsetPagination):
+    """Limit/offset pages for relevance-ordered results, which have no stable cursor field."""
+    default_limit = 20
+    max_limit = 100
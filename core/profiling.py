@@ -0,0 +1,180 @@
+"""On-demand and sampled cProfile capture of API requests.
+
+Admins add ``?__profile=1`` or an ``X-Profile: 1`` header to any request and get the
+profile's id back in ``X-Profile-Id``; with ``PROFILING_SAMPLE_RATE = N`` every Nth
+request per endpoint is profiled too, without the header.
+Stats are dumped to ``PROFILING_DIR/<request id>.prof`` with a JSON sidecar and
+served by the management profile endpoints.
+"""
+import cProfile
+from collections import defaultdict
+import itertools
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.urls import resolve, Resolver404
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls', 'pcalls', 'filename', 'name')
+
+
+def profile_dir():
+    return settings.PROFILING_DIR
+
+
+def _authenticated_user(request):
+    """The user DRF views would authenticate, leaving ``request.user`` as the view will find it.
+
+    The session user comes from AuthenticationMiddleware; the other authenticators are asked
+    directly, since reading ``Request.user`` would store the result on the request.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    drf_request = Request(request)
+    for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            authenticated = auth().authenticate(drf_request)
+        except Exception:
+            return None
+        if authenticated is not None:
+            return authenticated[0]
+    return None
+
+
+def _is_admin(request):
+    user = _authenticated_user(request)
+    return bool(user and user.is_authenticated and (user.is_superuser or user.is_staff))
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self._counters = defaultdict(itertools.count)
+        self._lock = threading.Lock()
+
+    def _sampled(self, request):
+        if not self.sample_rate:
+            return False
+        try:
+            endpoint = resolve(request.path_info).view_name
+        except Resolver404:
+            return False
+        with self._lock:
+            return next(self._counters[endpoint]) % self.sample_rate == 0
+
+    def __call__(self, request):
+        requested = request.GET.get('__profile') == '1' or request.headers.get('X-Profile') == '1'
+        if requested and not _is_admin(request):
+            requested = False
+        if not requested and not self._sampled(request):
+            return self.get_response(request)
+
+        profile_id = uuid.uuid4().hex
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+        try:
+            save_profile(profile_id, profiler, {
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'user_id': getattr(getattr(request, 'user', None), 'id', None),
+                'sampled': not requested,
+            })
+            # Sampled requests are profiled silently; only the admin who asked learns the id
+            if requested:
+                response['X-Profile-Id'] = profile_id
+        except Exception as e:
+            logger.error(f"Error saving profile {profile_id}: {str(e)}")
+        return response
+
+
+def save_profile(profile_id, profiler, meta):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f"{profile_id}.prof"))
+    meta = {'id': profile_id, 'created_at': timezone.now().isoformat(), **meta}
+    with open(os.path.join(directory, f"{profile_id}.json"), 'w') as f:
+        json.dump(meta, f)
+    _prune(directory)
+
+
+def _prune(directory):
+    """Keep the newest PROFILING_MAX_FILES profiles."""
+    limit = getattr(settings, 'PROFILING_MAX_FILES', 200)
+    sidecars = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in sidecars[limit:]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.unlink(os.path.join(directory, entry.name[:-5] + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.json'):
+            try:
+                with open(entry.path) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return sorted(profiles, key=lambda p: p['created_at'], reverse=True)
+
+
+def profile_path(profile_id):
+    """Path of a stored profile, or None for unknown or malformed ids."""
+    if not PROFILE_ID.match(profile_id or ''):
+        return None
+    path = os.path.join(profile_dir(), f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
+
+
+def top_functions(profile_id, sort='cumulative', limit=30):
+    """The stored profile's top ``limit`` functions by ``sort``, as table rows."""
+    path = profile_path(profile_id)
+    if path is None:
+        return None
+    stats = pstats.Stats(path)
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f"{filename}:{line}({name})",
+            'ncalls': calls if calls == primitive_calls else f"{calls}/{primitive_calls}",
+            'tottime': round(total_time, 6),
+            'percall_tottime': round(total_time / calls, 6) if calls else 0.0,
+            'cumtime': round(cumulative_time, 6),
+            'percall_cumtime': round(cumulative_time / primitive_calls, 6) if primitive_calls else 0.0,
+        })
+    return {'total_calls': stats.total_calls, 'total_time': round(stats.total_tt, 6), 'functions': rows}
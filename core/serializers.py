@@ -0,0 +1,63 @@
+def parse_list_param(request, name):
+    """Comma-separated query parameter as a set, e.g. ?expand=job,worker."""
+    if request is None:
+        return set()
+    raw = request.query_params.get(name, '') if hasattr(request, 'query_params') else request.GET.get(name, '')
+    return {value.strip() for value in raw.split(',') if value.strip()}
+
+
+class ExpandableFieldsMixin:
+    """
+    Serializer mixin that adds nested representations only when asked for via ?expand=,
+    and trims the output to ?fields= when given.
+
+    Subclasses declare ``Meta.expandable_fields = {'name': (SerializerClass, kwargs)}``;
+    an expansion replaces any field of the same name. Expansions are read from
+    ``context['expand']`` or the request's ``expand`` parameter, with dotted names for
+    nested serializers (``?expand=job.applications``). When none apply,
+    ``get_default_expansions`` decides. ``fields`` works the same way for the outermost
+    serializer only.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.get_expansions()
+        for name, (serializer_class, options) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand:
+                fields[name] = serializer_class(read_only=True, **options)
+        sparse = self.get_sparse_fields()
+        if sparse:
+            fields = {name: field for name, field in fields.items() if name in sparse or field.write_only}
+        return fields
+
+    def expansion_path(self):
+        """Dotted field names from the outermost serializer down to this one ('' at the top)."""
+        names = []
+        node = self
+        while getattr(node, 'parent', None) is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return '.'.join(reversed(names))
+
+    def get_expansions(self):
+        requested = self.requested(self.context, 'expand')
+        path = self.expansion_path()
+        if requested and path:
+            prefix = path + '.'
+            requested = {name[len(prefix):] for name in requested if name.startswith(prefix)}
+        return requested or self.get_default_expansions()
+
+    def get_default_expansions(self):
+        return set()
+
+    def get_sparse_fields(self):
+        if self.expansion_path() or hasattr(self, 'initial_data'):
+            return set()
+        return self.requested(self.context, 'fields')
+
+    @staticmethod
+    def requested(context, name):
+        if name in context:
+            return set(context[name] or ())
+        return parse_list_param(context.get('request'), name)
@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 # CORS settings
@@ -144,6 +145,41 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Memory-mapped worker features shared by all web processes (see build_feature_snapshot)
+FEATURE_SNAPSHOT_PATH = env('FEATURE_SNAPSHOT_PATH', default=os.path.join(BASE_DIR, 'var', 'worker_features.bin'))
+
+# 'mmap' also keeps keyword vectors in a memory-mapped store, read zero-copy to skip unchanged
+# Embedding writes while matching; the Embedding table stays the source of truth
+EMBEDDING_BACKEND = env('EMBEDDING_BACKEND', default='db')
+EMBEDDING_STORE_PATH = env('EMBEDDING_STORE_PATH', default=os.path.join(BASE_DIR, 'var', 'embeddings'))
+
+# Shared by every web process, so cache-based dedup and rate limits (feed warm-ups, login
+# attempts) hold across gunicorn workers; CACHE_URL may point at e.g. redis:// instead
+CACHES = {
+    'default': env.cache('CACHE_URL', default=f"filecache://{os.path.join(BASE_DIR, 'var', 'cache')}")
+}
+
+# Lock files coalescing concurrent recommendation cache misses across processes
+SINGLE_FLIGHT_LOCK_DIR = env('SINGLE_FLIGHT_LOCK_DIR', default=os.path.join(BASE_DIR, 'var', 'locks'))
+
+# Candidates scored per match before location-only matches are sampled (0 = no limit)
+MATCH_CANDIDATE_BUDGET = env.int('MATCH_CANDIDATE_BUDGET', default=2000)
+
+# Shadow mode: a MatchEngine-compatible class (dotted path) re-run in the background on this
+# fraction of recommendation cache misses; compare with `manage.py shadow_report`
+SHADOW_ENGINE = env('SHADOW_ENGINE', default='')
+SHADOW_SAMPLE_RATE = env.float('SHADOW_SAMPLE_RATE', default=0.0)
+
+# cProfile capture: admins opt in per request with ?__profile=1 or X-Profile: 1;
+# a sample rate N also profiles every Nth request per endpoint (0 disables sampling)
+PROFILING_DIR = env('PROFILING_DIR', default=os.path.join(BASE_DIR, 'var', 'profiles'))
+PROFILING_SAMPLE_RATE = env.int('PROFILING_SAMPLE_RATE', default=0)
+PROFILING_MAX_FILES = env.int('PROFILING_MAX_FILES', default=200)
+
+# Delta sync (?changed_since=): deletions are remembered this long; older cursors get 410
+# and clients fall back to a full listing. Prune with `manage.py prune_tombstones`
+TOMBSTONE_RETENTION_DAYS = env.int('TOMBSTONE_RETENTION_DAYS', default=30)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -170,6 +206,10 @@ SWAGGER_SETTINGS = {
     'DEFAULT_MODEL_RENDERING': 'example',
 }
 
+# Error log, under the ignored var/ directory rather than wherever the process was started
+LOG_FILE = env('LOG_FILE', default=os.path.join(BASE_DIR, 'var', 'notifications.log'))
+os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -183,7 +223,7 @@ LOGGING = {
         'file': {
             'level': 'ERROR',
             'class': 'logging.FileHandler',
-            'filename': 'notifications.log',
+            'filename': LOG_FILE,
             'formatter': 'verbose',
         },
         'console': {
@@ -206,6 +246,12 @@ TWILIO_ACCOUNT_SID = env('TWILIO_ACCOUNT_SID', default='')
 TWILIO_AUTH_TOKEN = env('TWILIO_AUTH_TOKEN', default='')
 TWILIO_PHONE_NUMBER = env('TWILIO_PHONE_NUMBER', default='')
 
+# SMS gateway: transport class (apps.management.sms.FakeTransport sends nothing), concurrent
+# sends, and messages per second across the process (0 = no limit)
+SMS_TRANSPORT = env('SMS_TRANSPORT', default='apps.management.sms.TwilioTransport')
+SMS_CONCURRENCY = env.int('SMS_CONCURRENCY', default=4)
+SMS_RATE_LIMIT = env.float('SMS_RATE_LIMIT', default=10.0)
+
 # Email configuration from .env
 EMAIL_HOST = env('EMAIL_HOST', default='smtp.gmail.com')
 EMAIL_PORT = env.int('EMAIL_PORT', default=587)
@@ -219,6 +265,13 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # Add timeout settings to prevent hanging
 EMAIL_TIMEOUT = 30
 
+# Notification outbox, drained by `manage.py dispatch_notifications`: concurrent email
+# sends, and attempts before a notification is logged as failed
+NOTIFICATION_EMAIL_CONCURRENCY = env.int('NOTIFICATION_EMAIL_CONCURRENCY', default=4)
+NOTIFICATION_MAX_ATTEMPTS = env.int('NOTIFICATION_MAX_ATTEMPTS', default=5)
+# Emails sent over one SMTP connection before it is replaced
+EMAIL_MESSAGES_PER_CONNECTION = env.int('EMAIL_MESSAGES_PER_CONNECTION', default=100)
+
 # Additional SMTP settings for better reliability
 EMAIL_SSL_CERTFILE = None
 EMAIL_SSL_KEYFILE = None